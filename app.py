@@ -1,11 +1,23 @@
-import json
 from datetime import datetime
+from domain.inventory_snapshot import EstoquePersistente, comparar_partida_a_frio
+from domain.inventory_sort import CHAVE_COMPOSTA
+from domain.solver_metrics import exportar_prometheus
 from domain.stock_manager import StockManager
 
-with open("data.json", "r", encoding="utf-8") as file:
-    data = json.load(file)
-    
-estoque = StockManager(data)
+# Estado salvo em dados/ (snapshot binário + journal de mutações); o
+# data.json só é lido, em fluxo, na primeira execução
+DIRETORIO_DADOS = "dados"
+estoque = StockManager("data.json", persistencia=EstoquePersistente(DIRETORIO_DADOS))
+carga = estoque.estatisticas_carga
+print(f"{carga['registros']} itens lidos do {carga['fonte']} em {carga['segundos']:.3f}s "
+      f"({carga['registros_por_segundo']:.0f} itens/s)")
+if carga['journal_reaplicado']:
+    print(f"{carga['journal_reaplicado']} alteração(ões) reaplicada(s) do journal")
+if carga['pico_rss_kb'] is not None:
+    print(f"Pico de memória: {carga['pico_rss_kb'] / 1024:.1f} MB")
+
+# Métodos com tempo estimado acima deste limite não são executados pelo menu
+LIMITE_TEMPO_SEGUNDOS = 10.0
 
 
 while True:
@@ -13,18 +25,28 @@ while True:
     print("MENU GERENCIADOR DE ESTOQUE")
     print("="*70)
     print("1. Mostrar estoque")
-    print("2. Buscar item por nome (binária)")
+    print("2. Buscar item por nome (índice)")
     print("3. Adicionar novo item")
     print("4. Mostrar itens críticos")
     print("5. Fila de reposição (itens abaixo do ideal)")
     print("6. Pilha de validade (ordem de vencimento)")
     print("7. Busca sequencial por nome")
-    print("8. Ordenar estoque por nome (Merge Sort)")
-    print("9. Ordenar estoque por nome (Quick Sort)")
+    print("8. Ordenar estoque por nome (Merge Sort bottom-up)")
+    print("9. Ordenar estoque por nome (Introsort)")
     print("10. Otimizar reabastecimento - Método RECURSIVO")
     print("11. Otimizar reabastecimento - Método MEMOIZATION")
     print("12. Otimizar reabastecimento - Método ITERATIVO")
     print("13. Comparar todos os métodos de otimização de reabastecimento")
+    print("14. Otimizar reabastecimento - Método VETORIZADO")
+    print("15. Otimizar reabastecimento - Método AUTOMÁTICO (planejador)")
+    print("16. Buscar itens por prefixo do nome")
+    print("17. Itens vencidos e a vencer nos próximos N dias")
+    print("18. Resumo por categoria e por localização")
+    print("19. Otimizar reabastecimento de uma categoria ou localização")
+    print("20. Comparar partida a frio (JSON x snapshot)")
+    print("21. Otimizar reabastecimento com métricas do solver (Prometheus)")
+    print("22. Ordenar estoque por categoria, validade e nome")
+    print("23. Exportar estoque ordenado (NDJSON, ordenação externa)")
     
     print("\n0. Sair")
     print("="*70)
@@ -124,14 +146,14 @@ while True:
             print("✗ Item não encontrado.")
 
     elif opcao == "8":
-        print("\nOrdenando estoque usando Merge Sort...")
-        estoque.ordenar_estoque_merge()
+        print("\nOrdenando estoque usando Merge Sort bottom-up...")
+        estoque.ordenar_estoque(algoritmo='merge')
         print("✓ Estoque ordenado por nome usando Merge Sort.")
 
     elif opcao == "9":
-        print("\nOrdenando estoque usando Quick Sort...")
-        estoque.ordenar_estoque_quick()
-        print("✓ Estoque ordenado por nome usando Quick Sort.")
+        print("\nOrdenando estoque usando Introsort...")
+        estoque.ordenar_estoque(algoritmo='intro')
+        print("✓ Estoque ordenado por nome usando Introsort.")
 
     # ============================================================================
     # NOVAS OPÇÕES - SPRINT 4
@@ -148,6 +170,12 @@ while True:
                 print("✗ Erro: O orçamento deve ser maior que zero.")
                 continue
             
+            plano = estoque.planejar_reabastecimento(orcamento)
+            if plano and plano['tempo_estimado_s']['recursivo'] > LIMITE_TEMPO_SEGUNDOS:
+                print(f"✗ Tempo estimado para {plano['itens']} itens: "
+                      f"{plano['tempo_estimado_s']['recursivo']:.3g} s. Use a opção 15 (automático).")
+                continue
+            
             print("\nProcessando... (pode demorar para muitos itens)")
             resultado = estoque.otimizar_reabastecimento(orcamento, 'recursivo')
             estoque.exibir_otimizacao(resultado)
@@ -208,10 +236,10 @@ while True:
                 print("✗ Erro: O orçamento deve ser maior que zero.")
                 continue
             
-            print("\nExecutando os três métodos para comparação...")
+            print("\nExecutando todos os métodos para comparação...")
             print("(Isso pode demorar alguns segundos)")
             
-            resultados = estoque.comparar_metodos_pd(orcamento)
+            resultados = estoque.comparar_metodos_pd(orcamento, LIMITE_TEMPO_SEGUNDOS)
             
             # Exibe análise adicional
             print("\n" + "="*70)
@@ -235,6 +263,141 @@ while True:
         except Exception as e:
             print(f"✗ Erro ao comparar métodos: {e}")
 
+    elif opcao == "14":
+        try:
+            print("\n" + "="*70)
+            print("OTIMIZAÇÃO DE REABASTECIMENTO - MÉTODO VETORIZADO")
+            print("="*70)
+            orcamento = float(input("\nDigite o orçamento disponível (R$): "))
+            
+            if orcamento <= 0:
+                print("✗ Erro: O orçamento deve ser maior que zero.")
+                continue
+            
+            print("\nProcessando com método vetorizado...")
+            resultado = estoque.otimizar_reabastecimento(orcamento, 'vetorizado')
+            estoque.exibir_otimizacao(resultado)
+            
+        except ValueError:
+            print("✗ Erro: Digite um valor numérico válido.")
+        except Exception as e:
+            print(f"✗ Erro ao otimizar: {e}")
+
+    elif opcao == "15":
+        try:
+            print("\n" + "="*70)
+            print("OTIMIZAÇÃO DE REABASTECIMENTO - MÉTODO AUTOMÁTICO")
+            print("="*70)
+            orcamento = float(input("\nDigite o orçamento disponível (R$): "))
+            
+            if orcamento <= 0:
+                print("✗ Erro: O orçamento deve ser maior que zero.")
+                continue
+            
+            print("\nPlanejando e processando com o solver mais barato...")
+            resultado = estoque.otimizar_reabastecimento(orcamento, 'auto')
+            estoque.exibir_otimizacao(resultado)
+            
+        except ValueError:
+            print("✗ Erro: Digite um valor numérico válido.")
+        except Exception as e:
+            print(f"✗ Erro ao otimizar: {e}")
+
+    elif opcao == "16":
+        prefixo = input("Digite o início do nome: ")
+        itens = estoque.buscar_por_prefixo(prefixo)
+        if itens:
+            print(f"\n{len(itens)} item(ns) encontrado(s):")
+            for item in itens:
+                print(20 * "-")
+                print(f"ID: {item['id']}")
+                print(f"Nome: {item['itemName']}")
+                print(f"Quantidade: {item['quantity']}")
+                print(f"Localização: {item['location']}")
+        else:
+            print("✗ Nenhum item encontrado.")
+
+    elif opcao == "17":
+        try:
+            dias = int(input("Vencendo nos próximos quantos dias? "))
+            vencidos = estoque.itens_vencidos()
+            vencendo = estoque.itens_vencendo(dias)
+            print(f"\nItens vencidos: {len(vencidos)}")
+            for item in vencidos:
+                print(f"  ✗ {item['expiryDate']} - {item['itemName']} (ID {item['id']})")
+            print(f"\nItens vencendo nos próximos {dias} dias: {len(vencendo)}")
+            for item in vencendo:
+                print(f"  ! {item['expiryDate']} - {item['itemName']} (ID {item['id']})")
+        except ValueError:
+            print("✗ Erro: Digite um número inteiro de dias.")
+
+    elif opcao == "18":
+        estoque.exibir_resumo_por_grupo('categoria')
+        estoque.exibir_resumo_por_grupo('local')
+
+    elif opcao == "19":
+        try:
+            categoria = input("Categoria (ENTER para todas): ").strip() or None
+            local = input("Localização (ENTER para todas): ").strip() or None
+            orcamento = float(input("\nDigite o orçamento disponível (R$): "))
+
+            if orcamento <= 0:
+                print("✗ Erro: O orçamento deve ser maior que zero.")
+                continue
+
+            resultado = estoque.otimizar_reabastecimento(
+                orcamento, 'auto', categoria=categoria, local=local
+            )
+            estoque.exibir_otimizacao(resultado)
+
+        except ValueError:
+            print("✗ Erro: Digite um valor numérico válido.")
+        except Exception as e:
+            print(f"✗ Erro ao otimizar: {e}")
+
+    elif opcao == "20":
+        tempos = comparar_partida_a_frio("data.json", DIRETORIO_DADOS)
+        print(f"\nPartida a frio com {tempos['registros']} itens (melhor de 3):")
+        print(f"  JSON (leitura em fluxo + índices): {tempos['json'] * 1000:.2f} ms")
+        print(f"  Snapshot binário + índices:        {tempos['snapshot'] * 1000:.2f} ms")
+        print(f"  Snapshot por mmap (só leitura):    {tempos['mmap'] * 1000:.3f} ms")
+
+    elif opcao == "21":
+        try:
+            metodo = input("Método (ENTER para 'auto'): ").strip() or 'auto'
+            orcamento = float(input("\nDigite o orçamento disponível (R$): "))
+
+            if orcamento <= 0:
+                print("✗ Erro: O orçamento deve ser maior que zero.")
+                continue
+
+            resultado = estoque.otimizar_reabastecimento(orcamento, metodo, instrumentar=True)
+            estoque.exibir_otimizacao(resultado)
+            print("\nMétricas do solver:\n")
+            print(exportar_prometheus(resultado['metricas']))
+
+        except ValueError:
+            print("✗ Erro: Digite um valor numérico válido.")
+        except Exception as e:
+            print(f"✗ Erro ao otimizar: {e}")
+
+    elif opcao == "22":
+        algoritmo = input("Algoritmo (merge, intro ou nativo; ENTER para merge): ").strip() or 'merge'
+        try:
+            estoque.ordenar_estoque(CHAVE_COMPOSTA, algoritmo)
+            print("✓ Estoque ordenado por categoria, validade e nome.")
+        except ValueError as erro:
+            print(f"✗ Erro: {erro}")
+
+    elif opcao == "23":
+        destino = input("Arquivo de saída (ENTER para estoque_ordenado.ndjson): ").strip()
+        try:
+            resultado = estoque.exportar_ordenado(destino or "estoque_ordenado.ndjson")
+            print(f"✓ {resultado['registros']} itens exportados em {resultado['blocos']} bloco(s), "
+                  f"{resultado['segundos'] * 1000:.1f} ms")
+        except (OSError, ValueError) as erro:
+            print(f"✗ Erro: {erro}")
+
     elif opcao == "0":
         print("\n" + "="*70)
         print("Encerrando o Gerenciador de Estoque...")
@@ -0,0 +1,57 @@
+"""
+Modo em lote, sem o menu interativo: lê operações em JSONL de um arquivo
+(ou da entrada padrão, com '-') e escreve uma resposta JSON por linha na
+saída padrão. Mensagens do gerenciador e o resumo de vazão vão para a
+saída de erro, então a saída padrão só tem respostas.
+
+    python batch.py operacoes.jsonl > respostas.jsonl
+    cat operacoes.jsonl | python batch.py - --estoque data.json
+
+Exemplo de operações:
+
+    {"op": "buscar", "nome": "Paracetamol 500mg"}
+    {"op": "atualizar", "id": 1, "quantity": 80}
+    {"op": "otimizar", "orcamento": 1000, "metodo": "iterativo"}
+    {"op": "otimizar", "orcamento": 2000, "metodo": "iterativo"}
+"""
+import argparse
+import contextlib
+import sys
+
+from domain.batch_pipeline import PipelineLote
+from domain.inventory_snapshot import EstoquePersistente
+from domain.stock_manager import StockManager
+
+
+def main(argumentos=None):
+    parser = argparse.ArgumentParser(description="Executa operações de estoque em lote (JSONL).")
+    parser.add_argument('operacoes', help="arquivo JSONL de operações ('-' para a entrada padrão)")
+    parser.add_argument('--estoque', default='data.json', help="arquivo de itens (JSON ou NDJSON)")
+    parser.add_argument('--dados', help="diretório de snapshot + journal (como o do app.py)")
+    parser.add_argument('--sem-agrupar', action='store_true',
+                        help="resolve cada 'otimizar' sozinho, sem agrupar orçamentos")
+    opcoes = parser.parse_args(argumentos)
+
+    saida = sys.stdout
+    with contextlib.redirect_stdout(sys.stderr):
+        persistencia = EstoquePersistente(opcoes.dados) if opcoes.dados else None
+        gerenciador = StockManager(opcoes.estoque, persistencia=persistencia)
+        pipeline = PipelineLote(gerenciador, agrupar=not opcoes.sem_agrupar)
+        entrada = sys.stdin if opcoes.operacoes == '-' else opcoes.operacoes
+        try:
+            estatisticas = pipeline.processar(entrada, saida)
+        finally:
+            if persistencia is not None:
+                persistencia.fechar()
+
+    print(
+        f"{estatisticas['operacoes']} operações em {estatisticas['segundos']:.3f}s "
+        f"({estatisticas['operacoes_por_segundo']:.0f} ops/s); "
+        f"{estatisticas['resolucoes']} otimizações, "
+        f"{estatisticas['agrupadas']} pedidos respondidos em grupo",
+        file=sys.stderr
+    )
+
+
+if __name__ == '__main__':
+    main()
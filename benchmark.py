@@ -0,0 +1,119 @@
+"""
+Suíte de benchmarks dos solvers de PD e das operações do estoque sobre
+estoques sintéticos (mesma semente, mesmo estoque), com baseline em JSON
+e comparação que acusa regressões.
+
+    python benchmark.py executar --saida baseline.json
+    python benchmark.py executar --escalas 10 100 1000 --saida atual.json
+    python benchmark.py comparar baseline.json atual.json --limiar 0.2
+    python benchmark.py gerar 10000 estoque_10k.json
+
+'comparar' termina com código 1 se houver regressão ou divergência de
+resultado, para uso em CI.
+"""
+import argparse
+import sys
+
+from domain.benchmark_suite import (
+    ESCALAS, LIMIAR_REGRESSAO, LIMITE_RECURSIVO, LIMITE_TEMPO, METODOS, ORCAMENTOS, REPETICOES,
+    carregar_baseline, comparar_baselines, executar_suite, salvar_baseline
+)
+from domain.inventory_generator import gerar_estoque, salvar_estoque
+
+
+def _formatar(registro):
+    if 'pulado' in registro:
+        return f"pulado ({registro['pulado']})"
+    if 'erro' in registro:
+        return f"erro ({registro['erro']})"
+    texto = f"{registro['segundos'] * 1000:10.3f} ms"
+    if registro['pico_memoria_bytes'] is not None:
+        texto += f"  {registro['pico_memoria_bytes'] / 1024:10.1f} KB"
+    return texto
+
+
+def _executar(opcoes):
+    baseline = executar_suite(
+        escalas=opcoes.escalas, orcamentos=opcoes.orcamentos, metodos=opcoes.metodos,
+        semente=opcoes.semente, limite_segundos=opcoes.limite_segundos,
+        limite_recursivo=opcoes.limite_recursivo, repeticoes=opcoes.repeticoes,
+        medir_memoria=not opcoes.sem_memoria, preprocessar=opcoes.preprocessar,
+        ao_medir=lambda chave, registro: print(f"{chave:<55} {_formatar(registro)}", flush=True)
+    )
+    salvar_baseline(baseline, opcoes.saida)
+    print(f"\nBaseline gravada em {opcoes.saida} ({len(baseline['resultados'])} registros)")
+    return 0
+
+
+def _comparar(opcoes):
+    comparacao = comparar_baselines(
+        carregar_baseline(opcoes.base), carregar_baseline(opcoes.atual), opcoes.limiar
+    )
+    for titulo, entradas in (('REGRESSÕES', comparacao['regressoes']),
+                             ('MELHORIAS', comparacao['melhorias'])):
+        print(f"\n{titulo} (limiar {opcoes.limiar:.0%}): {len(entradas)}")
+        for entrada in entradas:
+            print(f"  {entrada['chave']:<55} {entrada['metrica']:<20} "
+                  f"{entrada['base']:.6g} -> {entrada['atual']:.6g} ({entrada['razao']:.2f}x)")
+
+    print(f"\nDIVERGÊNCIAS DE RESULTADO: {len(comparacao['divergencias'])}")
+    for entrada in comparacao['divergencias']:
+        print(f"  {entrada['chave']:<55} benefício {entrada['base']} -> {entrada['atual']}")
+    if comparacao['nao_medidas']:
+        print(f"\nMedidas na base e não na atual: {len(comparacao['nao_medidas'])}")
+        for chave in comparacao['nao_medidas']:
+            print(f"  {chave}")
+    if comparacao['novas']:
+        print(f"\nMedidas só na atual: {len(comparacao['novas'])}")
+
+    return 1 if comparacao['regressoes'] or comparacao['divergencias'] else 0
+
+
+def _gerar(opcoes):
+    salvar_estoque(gerar_estoque(opcoes.itens, opcoes.semente), opcoes.saida)
+    print(f"{opcoes.itens} itens gravados em {opcoes.saida}")
+    return 0
+
+
+def main(argumentos=None):
+    parser = argparse.ArgumentParser(description="Benchmarks dos solvers e operações do estoque.")
+    subcomandos = parser.add_subparsers(dest='comando', required=True)
+
+    executar = subcomandos.add_parser('executar', help="executa a suíte e grava a baseline")
+    executar.add_argument('--saida', default='baseline.json', help="arquivo JSON da baseline")
+    executar.add_argument('--escalas', type=int, nargs='+', default=list(ESCALAS),
+                          help="números de itens dos estoques gerados")
+    executar.add_argument('--orcamentos', type=int, nargs='+', default=list(ORCAMENTOS),
+                          help="orçamentos (R$) de cada otimização")
+    executar.add_argument('--metodos', nargs='+', choices=METODOS, default=list(METODOS))
+    executar.add_argument('--semente', type=int, default=0)
+    executar.add_argument('--limite-segundos', type=float, default=LIMITE_TEMPO,
+                          help="pula otimizações com tempo estimado acima deste")
+    executar.add_argument('--limite-recursivo', type=int, default=LIMITE_RECURSIVO,
+                          help="máximo de itens críticos do método recursivo")
+    executar.add_argument('--repeticoes', type=int, default=REPETICOES)
+    executar.add_argument('--sem-memoria', action='store_true',
+                          help="não mede o pico de memória (tracemalloc)")
+    executar.add_argument('--preprocessar', action='store_true',
+                          help="aplica a redução antes dos solvers, como otimizar_reabastecimento")
+    executar.set_defaults(funcao=_executar)
+
+    comparar = subcomandos.add_parser('comparar', help="compara duas baselines")
+    comparar.add_argument('base')
+    comparar.add_argument('atual')
+    comparar.add_argument('--limiar', type=float, default=LIMIAR_REGRESSAO,
+                          help="piora relativa que conta como regressão (0.2 = 20%%)")
+    comparar.set_defaults(funcao=_comparar)
+
+    gerar = subcomandos.add_parser('gerar', help="grava um estoque sintético no formato do data.json")
+    gerar.add_argument('itens', type=int)
+    gerar.add_argument('saida')
+    gerar.add_argument('--semente', type=int, default=0)
+    gerar.set_defaults(funcao=_gerar)
+
+    opcoes = parser.parse_args(argumentos)
+    return opcoes.funcao(opcoes)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
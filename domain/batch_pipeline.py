@@ -0,0 +1,278 @@
+import json
+import math
+import os
+import time
+
+# Métodos exatos: o ótimo de cada orçamento é o da fronteira (PD vetorizada),
+# então vários orçamentos seguidos podem ser respondidos por uma única PD
+_METODOS_AGRUPAVEIS = {
+    'auto', 'recursivo', 'memoization', 'memoization_pilha', 'iterativo', 'vetorizado', 'esparso'
+}
+# Campos de 'otimizar' com que o pedido ainda pode entrar em um grupo
+_CAMPOS_AGRUPAVEIS = {'op', 'request_id', 'orcamento', 'metodo', 'preprocessar'}
+# Acima deste número de estados n * (W + 1) a fronteira (tabela densa) não
+# compensa: cada pedido do grupo vai para o próprio solver
+_LIMITE_ESTADOS_FRONTEIRA = 50_000_000
+# Parâmetros de 'otimizar' repassados a StockManager.otimizar_reabastecimento
+_PARAMETROS_OTIMIZAR = (
+    'limite_nos', 'limite_tempo', 'epsilon', 'precisao', 'preprocessar', 'modo', 'categoria', 'local',
+    'instrumentar'
+)
+
+
+def ler_orcamento(valor):
+    """
+    Orçamento de um pedido como float finito e não negativo. 'inf', 'nan'
+    e negativos levantam ValueError aqui, antes de chegar aos solvers
+    (int(inf) levanta OverflowError no meio da otimização).
+    """
+    orcamento = float(valor)
+    if not math.isfinite(orcamento) or orcamento < 0:
+        raise ValueError(f"Orçamento inválido: {valor!r} (deve ser um número finito e não negativo)")
+    return orcamento
+
+
+class _LinhaInvalida:
+    """Linha da entrada que não é JSON válido (vira uma resposta de erro)."""
+
+    def __init__(self, numero, erro):
+        self.numero = numero
+        self.erro = erro
+
+
+def ler_operacoes(entrada):
+    """
+    Lê as operações de `entrada` (caminho ou arquivo de texto em JSONL),
+    uma por linha, ignorando linhas em branco. Uma linha que não decodifica
+    não interrompe a leitura: no lugar dela sai um _LinhaInvalida com o
+    número da linha.
+    """
+    if isinstance(entrada, (str, os.PathLike)):
+        with open(entrada, 'r', encoding='utf-8') as arquivo:
+            yield from ler_operacoes(arquivo)
+        return
+
+    for numero, linha in enumerate(entrada, 1):
+        if not linha.strip():
+            continue
+        try:
+            yield json.loads(linha)
+        except json.JSONDecodeError as erro:
+            yield _LinhaInvalida(numero, erro)
+
+
+def _item_json(item):
+    return None if item is None else dict(item)
+
+
+def resultado_para_json(resultado):
+    """Resultado de otimização sem as visões do estoque e sem as estatísticas internas."""
+    saida = {chave: valor for chave, valor in resultado.items() if chave != 'estatisticas'}
+    saida['itens_selecionados'] = [
+        {
+            'id': selecionado['item']['id'],
+            'itemName': selecionado['item']['itemName'],
+            'quantidade': selecionado['quantidade'],
+            'custo': selecionado['custo'],
+            'beneficio': selecionado['beneficio'],
+        }
+        for selecionado in resultado['itens_selecionados']
+    ]
+    return saida
+
+
+def _agrupavel(operacao):
+    return (
+        operacao.get('op') == 'otimizar'
+        and operacao.get('metodo', 'auto') in _METODOS_AGRUPAVEIS
+        and set(operacao) <= _CAMPOS_AGRUPAVEIS
+    )
+
+
+class PipelineLote:
+    """
+    Executa operações em lote sobre um StockManager, sem o menu
+    interativo. Cada operação é um dict com 'op' e seus campos:
+
+    - buscar: 'id', 'nome' ou 'prefixo'
+    - adicionar: 'item' (dict no formato do data.json)
+    - atualizar: 'id', 'quantity' e opcionalmente 'ideal_quantity'
+    - criticos: opcionais 'k' e 'por' ('deficit' ou 'criticidade')
+    - resumo: opcional 'por' ('categoria' ou 'local')
+    - validade: opcionais 'k' (os k próximos a vencer a partir de hoje;
+      sem 'k', a pilha de validade inteira) e 'incluir_vencidos'
+    - otimizar: 'orcamento' e opcionais 'metodo' (padrão 'auto') e os
+      parâmetros de otimizar_reabastecimento
+
+    Cada resposta traz 'op', 'ok' e 'resultado' (ou 'erro'), mais o
+    'request_id' do pedido quando há. Respostas saem na ordem dos pedidos.
+    Um pedido que falha (inclusive por OverflowError ou MemoryError do
+    solver) vira uma resposta de erro e o lote segue com os próximos.
+
+    Com `agrupar`, pedidos 'otimizar' seguidos, sem mutação entre eles e
+    com método exato e parâmetros padrão, são respondidos por uma única
+    fronteira de reabastecimento resolvida para o maior orçamento do grupo
+    (uma PD em vez de uma por pedido; o benefício é o mesmo, o plano é o
+    mais barato entre os de benefício máximo). Grupos cuja tabela passaria
+    de _LIMITE_ESTADOS_FRONTEIRA estados são executados pedido a pedido.
+    """
+
+    def __init__(self, gerenciador, agrupar=True):
+        self.gerenciador = gerenciador
+        self.agrupar = agrupar
+        self.operacoes = 0
+        self.resolucoes = 0
+        self.agrupadas = 0
+
+    def executar(self, operacoes):
+        """Gera as respostas de `operacoes` (iterável de dicts) na ordem."""
+        grupo = []
+        for operacao in operacoes:
+            if self.agrupar and isinstance(operacao, dict) and _agrupavel(operacao):
+                grupo.append(operacao)
+                continue
+            yield from self._executar_grupo(grupo)
+            grupo = []
+            yield self.executar_uma(operacao)
+        yield from self._executar_grupo(grupo)
+
+    def processar(self, entrada, saida):
+        """
+        Lê operações em JSONL de `entrada` (caminho ou arquivo, ver
+        ler_operacoes) e grava uma resposta JSON por linha em `saida`, à
+        medida que ficam prontas. Uma linha malformada vira uma resposta de
+        erro com o número dela em 'linha', e as seguintes são executadas.
+
+        Returns:
+            dict com 'operacoes', 'resolucoes' (chamadas de otimização: uma
+            por grupo), 'agrupadas' (pedidos respondidos por um grupo),
+            'segundos' e 'operacoes_por_segundo'
+        """
+        inicio = time.perf_counter()
+        for resposta in self.executar(ler_operacoes(entrada)):
+            saida.write(json.dumps(resposta, ensure_ascii=False) + '\n')
+        segundos = time.perf_counter() - inicio
+        return {
+            'operacoes': self.operacoes,
+            'resolucoes': self.resolucoes,
+            'agrupadas': self.agrupadas,
+            'segundos': segundos,
+            'operacoes_por_segundo': self.operacoes / segundos if segundos > 0 else 0.0
+        }
+
+    def _executar_grupo(self, grupo):
+        if len(grupo) < 2:
+            for operacao in grupo:
+                yield self.executar_uma(operacao)
+            return
+
+        try:
+            orcamentos = [ler_orcamento(operacao['orcamento']) for operacao in grupo]
+        except (KeyError, TypeError, ValueError):
+            # Algum pedido inválido: cada um segue sozinho e reporta o próprio erro
+            orcamentos = None
+        criticos = len(self.gerenciador.estoque.linhas_criticas())
+        fronteira = None
+        if orcamentos is not None and criticos * (max(orcamentos) + 1) <= _LIMITE_ESTADOS_FRONTEIRA:
+            try:
+                fronteira = self.gerenciador.fronteira_reabastecimento(max(orcamentos))
+            except (OverflowError, MemoryError):
+                # Sem memória para a tabela do grupo: cada pedido tenta o próprio solver
+                fronteira = None
+        if fronteira is None:
+            for operacao in grupo:
+                yield self.executar_uma(operacao)
+            return
+
+        self.resolucoes += 1
+        self.agrupadas += len(grupo)
+        for operacao, orcamento in zip(grupo, orcamentos):
+            self.operacoes += 1
+            resultado = resultado_para_json(fronteira.consultar(orcamento))
+            resultado['agrupado_com'] = len(grupo)
+            yield self.montar_resposta(operacao, resultado)
+
+    def executar_uma(self, operacao):
+        """Executa uma operação e devolve sua resposta (erros viram ok=False)."""
+        self.operacoes += 1
+        if isinstance(operacao, _LinhaInvalida):
+            return {
+                'op': None, 'ok': False, 'linha': operacao.numero,
+                'erro': f"JSON inválido na linha {operacao.numero}: {operacao.erro}"
+            }
+        if not isinstance(operacao, dict):
+            return {'op': None, 'ok': False, 'erro': "Operação deve ser um objeto JSON"}
+        tipo = operacao.get('op')
+        executor = getattr(self, f'_op_{tipo}', None) if isinstance(tipo, str) else None
+        if executor is None:
+            return self.montar_erro(operacao, f"Operação desconhecida: {tipo!r}")
+        try:
+            return self.montar_resposta(operacao, executor(operacao))
+        except (KeyError, TypeError, ValueError, OverflowError) as erro:
+            return self.montar_erro(operacao, erro)
+        except MemoryError:
+            return self.montar_erro(operacao, "Memória insuficiente para a operação")
+
+    @staticmethod
+    def montar_resposta(operacao, resultado):
+        resposta = {'op': operacao['op'], 'ok': True, 'resultado': resultado}
+        if 'request_id' in operacao:
+            resposta['request_id'] = operacao['request_id']
+        return resposta
+
+    @staticmethod
+    def montar_erro(operacao, erro):
+        mensagem = f"campo ausente: {erro}" if isinstance(erro, KeyError) else str(erro)
+        resposta = {'op': operacao.get('op'), 'ok': False, 'erro': mensagem}
+        if 'request_id' in operacao:
+            resposta['request_id'] = operacao['request_id']
+        return resposta
+
+    # -------------------
+    # OPERAÇÕES
+    # -------------------
+    def _op_buscar(self, operacao):
+        if 'id' in operacao:
+            return _item_json(self.gerenciador.buscar_por_id(operacao['id']))
+        if 'nome' in operacao:
+            return _item_json(self.gerenciador.buscar_por_nome(operacao['nome']))
+        if 'prefixo' in operacao:
+            return [dict(item) for item in self.gerenciador.buscar_por_prefixo(operacao['prefixo'])]
+        raise ValueError("buscar exige 'id', 'nome' ou 'prefixo'")
+
+    def _op_adicionar(self, operacao):
+        self.gerenciador.adicionar_item(operacao['item'])
+        return {'itens': len(self.gerenciador.estoque)}
+
+    def _op_atualizar(self, operacao):
+        item = self.gerenciador.atualizar_quantidade(
+            operacao['id'], operacao['quantity'], operacao.get('ideal_quantity')
+        )
+        if item is None:
+            raise ValueError(f"Item com id {operacao['id']} não encontrado")
+        return dict(item)
+
+    def _op_criticos(self, operacao):
+        itens = self.gerenciador.mais_criticos(operacao.get('k'), operacao.get('por', 'deficit'))
+        return [dict(item) for item in itens]
+
+    def _op_resumo(self, operacao):
+        return self.gerenciador.resumo_por_grupo(operacao.get('por', 'categoria'))
+
+    def _op_validade(self, operacao):
+        if 'k' not in operacao:
+            return [dict(item) for item in self.gerenciador.pilha_de_validade()]
+        itens = self.gerenciador.proximos_a_vencer(
+            operacao['k'], incluir_vencidos=operacao.get('incluir_vencidos', False)
+        )
+        return [dict(item) for item in itens]
+
+    def _op_otimizar(self, operacao):
+        parametros = {
+            nome: operacao[nome] for nome in _PARAMETROS_OTIMIZAR if nome in operacao
+        }
+        resultado = self.gerenciador.otimizar_reabastecimento(
+            ler_orcamento(operacao['orcamento']), operacao.get('metodo', 'auto'), **parametros
+        )
+        self.resolucoes += 1
+        return resultado_para_json(resultado)
@@ -0,0 +1,435 @@
+import contextlib
+import io
+import json
+import math
+import os
+import platform
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime, timezone
+
+from domain.inventory_generator import DATA_BASE, gerar_estoque
+from domain.inventory_sort import CHAVE_COMPOSTA
+from domain.stock_manager import (
+    StockManager, EPSILON_PADRAO, LIMITE_NOS_BB, MARGEM_RECURSAO, SEGUNDOS_POR_OPERACAO
+)
+
+VERSAO_BASELINE = 1
+
+ESCALAS = (10, 100, 1_000, 10_000, 100_000)
+ORCAMENTOS = (1_000, 10_000, 100_000, 1_000_000, 10_000_000)
+METODOS = (
+    'recursivo', 'memoization', 'memoization_pilha', 'iterativo', 'vetorizado', 'esparso',
+    'dual', 'branch_and_bound', 'aproximado', 'auto', 'incremental'
+)
+
+# Tempo estimado máximo (segundos) para uma medição rodar
+LIMITE_TEMPO = 10.0
+# O recursivo puro é O(2^n): acima deste número de itens críticos não roda
+LIMITE_RECURSIVO = 20
+# Tempo por palavra de 64 bits do passo de somas alcançáveis (planejador do 'auto')
+_SEGUNDOS_POR_PALAVRA_BITSET = 2e-9
+# Tempo por estado do método incremental, que também guarda linhas de checkpoint
+_SEGUNDOS_POR_ESTADO_INCREMENTAL = 2e-7
+# Repetições de cada medição de tempo (vale o menor tempo); para de repetir
+# quando as execuções já somam _TEMPO_REPETICOES segundos
+REPETICOES = 3
+_TEMPO_REPETICOES = 1.0
+# Consultas por medição de busca
+_CONSULTAS = 1_000
+# Janela de itens_vencendo e k de proximos_a_vencer
+_DIAS_VENCENDO = 30
+_K_VALIDADE = 10
+
+# Comparação: piora relativa que conta como regressão e diferenças
+# absolutas abaixo das quais a variação é tratada como ruído
+LIMIAR_REGRESSAO = 0.2
+_PISO_SEGUNDOS = 1e-3
+_PISO_MEMORIA = 64 * 1024
+
+
+def medir(funcao, preparar=None, repeticoes=REPETICOES, medir_memoria=True):
+    """
+    Mede `funcao()`: o menor tempo entre até `repeticoes` execuções (menos,
+    se elas já somam _TEMPO_REPETICOES segundos) e, com `medir_memoria`,
+    o pico de memória alocada por Python (tracemalloc) em uma execução a
+    mais, separada para não pesar no tempo. `preparar()` roda antes de
+    cada execução, fora da medição.
+
+    Returns:
+        dict com 'segundos', 'repeticoes', 'pico_memoria_bytes' (None sem
+        medir_memoria) e 'resultado' (o retorno da última execução)
+    """
+    tempos = []
+    while len(tempos) < max(repeticoes, 1) and sum(tempos) < _TEMPO_REPETICOES:
+        if preparar is not None:
+            preparar()
+        inicio = time.perf_counter()
+        resultado = funcao()
+        tempos.append(time.perf_counter() - inicio)
+
+    pico = None
+    if medir_memoria:
+        if preparar is not None:
+            preparar()
+        tracemalloc.start()
+        try:
+            resultado = funcao()
+            pico = tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+
+    return {
+        'segundos': min(tempos),
+        'repeticoes': len(tempos),
+        'pico_memoria_bytes': pico,
+        'resultado': resultado
+    }
+
+
+def estimar_segundos(metodo, itens_criticos, orcamento):
+    """
+    Tempo estimado de `metodo` sobre os itens críticos, pelas mesmas
+    contagens de operações do planejador (StockManager._planejar_solver),
+    mas sem o passo de somas alcançáveis: a PD esparsa é limitada pela
+    densa. Com pré-processamento é um limite superior, já que ele só reduz
+    a instância. math.inf quando o método não se aplica.
+    """
+    n = len(itens_criticos)
+    if n == 0:
+        return 0.0
+    capacidade = int(orcamento)
+    custos = [item['custo'] for item in itens_criticos]
+    beneficios = [item['beneficio'] for item in itens_criticos]
+    estados = n * (capacidade + 1)
+    exponencial = 2.0 ** (n + 1) if n < 1000 else math.inf
+    profundo = n + MARGEM_RECURSAO > sys.getrecursionlimit()
+    custo_zero = min(custos) == 0
+
+    operacoes = {
+        'recursivo': math.inf if profundo else exponencial,
+        'memoization': math.inf if profundo else estados,
+        'memoization_pilha': estados,
+        'iterativo': estados,
+        'vetorizado': estados,
+        'esparso': estados,
+        'dual': math.inf if custo_zero else n * (sum(beneficios) + 1),
+        'branch_and_bound': math.inf if custo_zero else min(exponencial, LIMITE_NOS_BB),
+    }
+    tempos = {
+        nome: quantidade * SEGUNDOS_POR_OPERACAO[nome] for nome, quantidade in operacoes.items()
+    }
+
+    if metodo == 'aproximado':
+        # Tabela dual com benefícios escalados: no máximo 2n/epsilon colunas
+        return n * min(2 * n / EPSILON_PADRAO, sum(beneficios) + 1) * SEGUNDOS_POR_OPERACAO['dual']
+    if metodo == 'incremental':
+        return estados * _SEGUNDOS_POR_ESTADO_INCREMENTAL
+    if metodo == 'auto':
+        bitset = n * (capacidade / 64 + 1) * _SEGUNDOS_POR_PALAVRA_BITSET
+        return bitset + min(tempos.values())
+    return tempos[metodo]
+
+
+def _chave(grupo, operacao, itens, orcamento=None):
+    chave = f"{grupo}/{operacao}/n={itens}"
+    return chave if orcamento is None else f"{chave}/orcamento={orcamento}"
+
+
+def _registro(grupo, operacao, itens, medicao, **campos):
+    registro = {'grupo': grupo, 'operacao': operacao, 'itens': itens}
+    registro.update(campos)
+    registro['segundos'] = medicao['segundos']
+    registro['repeticoes'] = medicao['repeticoes']
+    registro['pico_memoria_bytes'] = medicao['pico_memoria_bytes']
+    return registro
+
+
+def executar_suite(escalas=ESCALAS, orcamentos=ORCAMENTOS, metodos=METODOS, semente=0,
+                   limite_segundos=LIMITE_TEMPO, limite_recursivo=LIMITE_RECURSIVO,
+                   repeticoes=REPETICOES, medir_memoria=True, preprocessar=False,
+                   ao_medir=None):
+    """
+    Executa a suíte sobre estoques gerados por gerar_estoque(n, semente)
+    para cada n em `escalas`:
+
+    - carregar: StockManager sobre a lista de itens, com os índices montados
+    - otimizar/<metodo>: cada método de otimizar_reabastecimento (sem
+      cache) para cada orçamento em `orcamentos`. Sem `preprocessar`, o
+      padrão, mede o solver sobre a instância inteira: com orçamentos
+      grandes a redução fixa quase todos os itens e o solver não chega a
+      ser exercitado. Combinações com tempo estimado (estimar_segundos)
+      acima de `limite_segundos`, ou com mais de `limite_recursivo` itens
+      críticos no 'recursivo', são registradas como puladas
+    - validade: pilha_de_validade, itens_vencendo e proximos_a_vencer
+    - buscar: por nome, por id, por prefixo e sequencial (_CONSULTAS
+      nomes sorteados), e busca binária depois de ordenar
+    - ordenar: o merge e o quick sort originais, o merge sort bottom-up,
+      o introsort e o Timsort por nome, a chave composta (categoria,
+      validade, nome) e a exportação com ordenação externa, a partir da
+      ordem gerada; os quatro primeiros também a partir da ordem por nome
+      (o quick sort original estoura a recursão aí, registrado como erro)
+
+    `ao_medir(chave, registro)` é chamado a cada registro (progresso).
+    Mensagens do StockManager são descartadas.
+
+    Returns:
+        baseline: dict com 'versao', 'criado_em', 'python', 'plataforma',
+        'configuracao' e 'resultados' (chave -> registro), pronto para
+        salvar_baseline
+    """
+    resultados = {}
+    saida = sys.stdout
+
+    def registrar(chave, registro):
+        resultados[chave] = registro
+        if ao_medir is not None:
+            with contextlib.redirect_stdout(saida):
+                ao_medir(chave, registro)
+
+    silencio = io.StringIO()
+    for n in escalas:
+        itens = gerar_estoque(n, semente)
+        with contextlib.redirect_stdout(silencio):
+            _medir_escala(
+                n, itens, orcamentos, metodos, semente, limite_segundos, limite_recursivo,
+                repeticoes, medir_memoria, preprocessar, registrar
+            )
+        silencio.seek(0)
+        silencio.truncate()
+
+    return {
+        'versao': VERSAO_BASELINE,
+        'criado_em': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'plataforma': platform.platform(),
+        'configuracao': {
+            'escalas': list(escalas),
+            'orcamentos': list(orcamentos),
+            'metodos': list(metodos),
+            'semente': semente,
+            'limite_segundos': limite_segundos,
+            'limite_recursivo': limite_recursivo,
+            'repeticoes': repeticoes,
+            'medir_memoria': medir_memoria,
+            'preprocessar': preprocessar
+        },
+        'resultados': resultados
+    }
+
+
+def _medir_escala(n, itens, orcamentos, metodos, semente, limite_segundos, limite_recursivo,
+                  repeticoes, medir_memoria, preprocessar, registrar):
+    def carregar():
+        gerenciador = StockManager(itens, usar_cache=False)
+        gerenciador.estoque.linhas_criticas()
+        return gerenciador
+
+    medicao = medir(carregar, repeticoes=repeticoes, medir_memoria=medir_memoria)
+    registrar(_chave('carregar', 'lista', n), _registro('carregar', 'lista', n, medicao))
+    gerenciador = medicao['resultado']
+
+    itens_criticos = gerenciador._montar_itens_criticos()
+    for orcamento in orcamentos:
+        for metodo in metodos:
+            chave = _chave('otimizar', metodo, n, orcamento)
+            base = {
+                'grupo': 'otimizar', 'operacao': metodo, 'itens': n, 'orcamento': orcamento,
+                'itens_criticos': len(itens_criticos)
+            }
+            estimativa = estimar_segundos(metodo, itens_criticos, orcamento)
+            base['tempo_estimado_s'] = estimativa if math.isfinite(estimativa) else None
+            if metodo == 'recursivo' and len(itens_criticos) > limite_recursivo:
+                registrar(chave, dict(base, pulado=f"mais de {limite_recursivo} itens críticos"))
+                continue
+            if estimativa > limite_segundos:
+                registrar(chave, dict(base, pulado=f"tempo estimado acima de {limite_segundos} s"))
+                continue
+
+            def preparar():
+                # O incremental guarda a PD entre chamadas: cada medição a reconstrói
+                gerenciador._estado_incremental = None
+
+            try:
+                medicao = medir(
+                    lambda: gerenciador.otimizar_reabastecimento(
+                        orcamento, metodo, preprocessar=preprocessar
+                    ),
+                    preparar, repeticoes, medir_memoria
+                )
+            except (RecursionError, MemoryError, ValueError) as erro:
+                registrar(chave, dict(base, erro=f"{type(erro).__name__}: {erro}"))
+                continue
+            resultado = medicao['resultado']
+            registrar(chave, _registro(
+                'otimizar', metodo, n, medicao, orcamento=orcamento,
+                itens_criticos=len(itens_criticos), tempo_estimado_s=base['tempo_estimado_s'],
+                beneficio_maximo=resultado['beneficio_maximo'],
+                custo_total=resultado['custo_total']
+            ))
+    gerenciador._estado_incremental = None
+
+    hoje = DATA_BASE
+    validade = {
+        'pilha': gerenciador.pilha_de_validade,
+        'vencendo': lambda: gerenciador.itens_vencendo(_DIAS_VENCENDO, hoje),
+        'proximos': lambda: gerenciador.proximos_a_vencer(_K_VALIDADE, hoje),
+    }
+    for operacao, funcao in validade.items():
+        medicao = medir(funcao, repeticoes=repeticoes, medir_memoria=medir_memoria)
+        registrar(_chave('validade', operacao, n), _registro(
+            'validade', operacao, n, medicao, encontrados=len(medicao['resultado'])
+        ))
+
+    aleatorio = random.Random(semente)
+    consultas = [item['itemName'] for item in aleatorio.sample(itens, min(_CONSULTAS, n))]
+    ids = [item['id'] for item in aleatorio.sample(itens, min(_CONSULTAS, n))]
+    prefixos = [nome.split(' ')[0] for nome in consultas]
+    buscas = {
+        'nome': lambda: [gerenciador.buscar_por_nome(nome) for nome in consultas],
+        'id': lambda: [gerenciador.buscar_por_id(item_id) for item_id in ids],
+        'prefixo': lambda: [len(gerenciador.buscar_por_prefixo(prefixo)) for prefixo in prefixos],
+        'sequencial': lambda: [gerenciador.busca_sequencial_nome(nome) for nome in consultas],
+    }
+    for operacao, funcao in buscas.items():
+        medicao = medir(funcao, repeticoes=repeticoes, medir_memoria=medir_memoria)
+        registrar(_chave('buscar', operacao, n), _registro(
+            'buscar', operacao, n, medicao, consultas=len(consultas)
+        ))
+
+    ordem_gerada = list(gerenciador.estoque)
+    ordem_por_nome = sorted(ordem_gerada, key=lambda item: item['itemName'])
+    ordenacoes = {
+        # Ordenações originais (recursivas, só por nome) e o motor de inventory_sort
+        'merge': gerenciador.ordenar_estoque_merge,
+        'quick': gerenciador.ordenar_estoque_quick,
+        'merge_bottom_up': lambda: gerenciador.ordenar_estoque(algoritmo='merge'),
+        'introsort': lambda: gerenciador.ordenar_estoque(algoritmo='intro'),
+        'nativo': lambda: gerenciador.ordenar_estoque(algoritmo='nativo'),
+        'composta': lambda: gerenciador.ordenar_estoque(CHAVE_COMPOSTA, 'merge'),
+    }
+    with tempfile.TemporaryDirectory() as diretorio:
+        # Ordenação externa com ~8 blocos, para exercitar a fusão em k vias
+        destino = os.path.join(diretorio, 'exportacao.ndjson')
+        ordenacoes['externa'] = lambda: gerenciador.exportar_ordenado(
+            destino, CHAVE_COMPOSTA, max(n // 8, 1)
+        )
+        casos = [(operacao, funcao, ordem_gerada) for operacao, funcao in ordenacoes.items()]
+        # Entrada já ordenada por nome: pior caso do quick sort com pivô no primeiro
+        casos += [
+            (f'{operacao}_ordenado', ordenacoes[operacao], ordem_por_nome)
+            for operacao in ('merge', 'quick', 'merge_bottom_up', 'introsort')
+        ]
+        _medir_ordenacoes(gerenciador, casos, n, repeticoes, medir_memoria, registrar)
+
+    # Busca binária só faz sentido com o estoque ordenado por nome
+    gerenciador.estoque.reordenar(ordem_por_nome)
+    medicao = medir(
+        lambda: [gerenciador.busca_binaria(nome) for nome in consultas],
+        repeticoes=repeticoes, medir_memoria=medir_memoria
+    )
+    registrar(_chave('buscar', 'binaria', n), _registro(
+        'buscar', 'binaria', n, medicao, consultas=len(consultas)
+    ))
+
+
+def _medir_ordenacoes(gerenciador, casos, n, repeticoes, medir_memoria, registrar):
+    """Mede cada (operação, função, ordem inicial), voltando à ordem inicial antes de cada execução."""
+    for operacao, funcao, ordem_inicial in casos:
+        try:
+            medicao = medir(
+                funcao, lambda: gerenciador.estoque.reordenar(ordem_inicial),
+                repeticoes, medir_memoria
+            )
+        except RecursionError as erro:
+            registrar(_chave('ordenar', operacao, n), {
+                'grupo': 'ordenar', 'operacao': operacao, 'itens': n,
+                'erro': f"RecursionError: {erro}"
+            })
+            continue
+        registrar(_chave('ordenar', operacao, n), _registro('ordenar', operacao, n, medicao))
+
+
+def salvar_baseline(baseline, caminho):
+    """Grava a baseline como JSON (chaves ordenadas, para diffs legíveis)."""
+    with open(caminho, 'w', encoding='utf-8') as arquivo:
+        json.dump(baseline, arquivo, ensure_ascii=False, indent=2, sort_keys=True)
+        arquivo.write('\n')
+
+
+def carregar_baseline(caminho):
+    """Lê uma baseline gravada por salvar_baseline."""
+    with open(caminho, 'r', encoding='utf-8') as arquivo:
+        baseline = json.load(arquivo)
+    if baseline.get('versao') != VERSAO_BASELINE or 'resultados' not in baseline:
+        raise ValueError(f"{caminho} não é uma baseline da versão {VERSAO_BASELINE}")
+    return baseline
+
+
+def comparar_baselines(base, atual, limiar=LIMIAR_REGRESSAO, piso_segundos=_PISO_SEGUNDOS,
+                       piso_memoria=_PISO_MEMORIA):
+    """
+    Compara duas baselines registro a registro (mesma chave). Tempo ou pico
+    de memória contam como regressão quando o atual passa do base em mais
+    de `limiar` (0.2 = 20%) e a diferença absoluta passa do piso
+    (`piso_segundos`, `piso_memoria` bytes); o simétrico conta como
+    melhoria. Otimizações medidas nas duas com benefício máximo diferente
+    são divergências (erro de corretude, não de desempenho).
+
+    Returns:
+        dict com 'regressoes', 'melhorias' e 'divergencias' (listas de
+        dicts com 'chave', 'metrica', 'base', 'atual' e, nas duas
+        primeiras, 'razao'), 'nao_medidas' (chaves medidas na base e
+        puladas, com erro ou ausentes na atual) e 'novas' (medidas só na
+        atual)
+    """
+    if limiar < 0:
+        raise ValueError("limiar não pode ser negativo")
+
+    def medido(registro):
+        return registro is not None and 'segundos' in registro
+
+    resultados_base = base['resultados']
+    resultados_atuais = atual['resultados']
+    comparacao = {'regressoes': [], 'melhorias': [], 'divergencias': [], 'nao_medidas': [], 'novas': []}
+
+    for chave in sorted(resultados_base):
+        anterior = resultados_base[chave]
+        novo = resultados_atuais.get(chave)
+        if not medido(anterior):
+            continue
+        if not medido(novo):
+            comparacao['nao_medidas'].append(chave)
+            continue
+
+        if anterior.get('beneficio_maximo') != novo.get('beneficio_maximo'):
+            comparacao['divergencias'].append({
+                'chave': chave, 'metrica': 'beneficio_maximo',
+                'base': anterior.get('beneficio_maximo'), 'atual': novo.get('beneficio_maximo')
+            })
+
+        for metrica, piso in (('segundos', piso_segundos), ('pico_memoria_bytes', piso_memoria)):
+            valor_base, valor_atual = anterior.get(metrica), novo.get(metrica)
+            if valor_base is None or valor_atual is None:
+                continue
+            diferenca = valor_atual - valor_base
+            if abs(diferenca) <= piso:
+                continue
+            razao = valor_atual / valor_base if valor_base else math.inf
+            entrada = {
+                'chave': chave, 'metrica': metrica, 'base': valor_base,
+                'atual': valor_atual, 'razao': razao
+            }
+            if razao > 1 + limiar:
+                comparacao['regressoes'].append(entrada)
+            elif razao < 1 / (1 + limiar):
+                comparacao['melhorias'].append(entrada)
+
+    comparacao['novas'] = sorted(
+        chave for chave, registro in resultados_atuais.items()
+        if medido(registro) and not medido(resultados_base.get(chave))
+    )
+    return comparacao
@@ -0,0 +1,83 @@
+import json
+import random
+from datetime import date, timedelta
+
+# Base de nomes, apresentações e faixas de preço por categoria, no formato do data.json
+_CATEGORIAS = {
+    'Analgésicos': (('Paracetamol', 'Dipirona', 'Tramadol'), ('500mg', '750mg', '1g'), (0.2, 2.0)),
+    'Anti-inflamatórios': (('Ibuprofeno', 'Diclofenaco', 'Nimesulida'), ('50mg', '100mg', '600mg'), (0.3, 3.0)),
+    'Antibióticos': (('Amoxicilina', 'Azitromicina', 'Cefalexina'), ('250mg', '500mg', '875mg'), (0.8, 5.0)),
+    'Anti-hipertensivos': (('Losartana', 'Enalapril', 'Anlodipino'), ('5mg', '10mg', '50mg'), (0.1, 1.5)),
+    'Antidiabéticos': (('Metformina', 'Insulina NPH', 'Glibenclamida'), ('5mg', '850mg', '10ml'), (0.2, 60.0)),
+    'Corticoides': (('Prednisona', 'Dexametasona', 'Hidrocortisona'), ('4mg', '20mg', '100mg'), (0.3, 12.0)),
+    'Soluções Intravenosas': (('Soro Fisiológico', 'Soro Glicosado', 'Ringer Lactato'), ('250ml', '500ml', '1000ml'), (2.0, 10.0)),
+    'Material Hospitalar': (('Luva de Procedimento', 'Seringa', 'Máscara Cirúrgica', 'Gaze Estéril', 'Cateter'), ('P', 'M', '5ml', '10ml', 'Nº 20'), (0.1, 8.0)),
+    'Antissépticos': (('Álcool 70%', 'Clorexidina', 'Povidine'), ('100ml', '500ml', '1L'), (3.0, 20.0)),
+    'Analgésicos Opioides': (('Morfina', 'Codeína', 'Fentanil'), ('10mg', '30mg', '2ml'), (5.0, 40.0)),
+    'Ansiolíticos': (('Diazepam', 'Clonazepam', 'Alprazolam'), ('2mg', '5mg', '10mg'), (0.2, 2.5)),
+    'Equipamentos': (('Termômetro Digital', 'Esfigmomanômetro', 'Estetoscópio'), ('Adulto', 'Infantil', 'Padrão'), (25.0, 250.0)),
+    'Diagnóstico': (('Teste COVID-19', 'Teste de Gravidez', 'Fita de Glicemia'), ('Unidade', 'Caixa 10', 'Caixa 50'), (1.0, 90.0)),
+    'Gases Medicinais': (('Oxigênio', 'Ar Comprimido', 'Óxido Nitroso'), ('Cilindro 1m³', 'Cilindro 3m³', 'Cilindro 10m³'), (80.0, 400.0)),
+}
+
+_LOCAIS = (
+    [f'Prateleira {letra}{numero} - Farmácia' for letra in 'ABCDEF' for numero in (1, 2, 3)]
+    + [f'Refrigerador {numero} - Farmácia' for numero in range(1, 5)]
+    + [f'Almoxarifado - Prateleira {numero}' for numero in range(1, 7)]
+    + ['Almoxarifado - Setor Limpeza', 'Almoxarifado - Setor Equipamentos',
+       'Armário Controlados - Cofre', 'Armário Controlados - Prateleira 1',
+       'Depósito Central - Setor A', 'Sala de Gases - Setor 1', 'Refrigerador 5 - Laboratório']
+)
+
+# Data de referência das validades geradas: fixa para que a mesma semente
+# gere sempre o mesmo estoque, em qualquer dia
+DATA_BASE = date(2026, 1, 1)
+
+
+def gerar_estoque(n, semente=0, fracao_critica=0.8, fracao_sem_validade=0.1):
+    """
+    Gera `n` itens no formato do data.json, sempre os mesmos para a mesma
+    `semente`. Ids vão de 1 a n e nomes são únicos (o número do item vai no
+    nome). Uma `fracao_critica` dos itens fica abaixo do ideal, com preços
+    na faixa da categoria (distribuição log-uniforme) e ideais de 30 a
+    5000 unidades; validades vão de 60 dias antes a 4 anos depois de
+    DATA_BASE, e `fracao_sem_validade` dos itens não tem validade.
+    """
+    if n < 0:
+        raise ValueError("n não pode ser negativo")
+    if not 0 <= fracao_critica <= 1 or not 0 <= fracao_sem_validade <= 1:
+        raise ValueError("As frações devem estar entre 0 e 1")
+
+    aleatorio = random.Random(semente)
+    categorias = list(_CATEGORIAS.items())
+    itens = []
+    for item_id in range(1, n + 1):
+        categoria, (nomes, apresentacoes, (preco_min, preco_max)) = aleatorio.choice(categorias)
+        ideal = int(30 * (5000 / 30) ** aleatorio.random())
+        if aleatorio.random() < fracao_critica:
+            quantidade = aleatorio.randint(0, ideal - 1)
+        else:
+            quantidade = aleatorio.randint(ideal, ideal * 2)
+        preco = round(preco_min * (preco_max / preco_min) ** aleatorio.random(), 2)
+        if aleatorio.random() < fracao_sem_validade:
+            validade = None
+        else:
+            validade = (DATA_BASE + timedelta(days=aleatorio.randint(-60, 4 * 365))).isoformat()
+
+        itens.append({
+            'id': item_id,
+            'itemName': f'{aleatorio.choice(nomes)} {aleatorio.choice(apresentacoes)} #{item_id}',
+            'category': categoria,
+            'quantity': quantidade,
+            'ideal_quantity': ideal,
+            'unity_price': preco,
+            'location': aleatorio.choice(_LOCAIS),
+            'expiryDate': validade
+        })
+    return itens
+
+
+def salvar_estoque(itens, caminho):
+    """Grava `itens` como array JSON (o formato do data.json)."""
+    with open(caminho, 'w', encoding='utf-8') as arquivo:
+        json.dump(itens, arquivo, ensure_ascii=False, indent=2)
@@ -0,0 +1,135 @@
+import json
+import os
+import re
+import time
+from itertools import islice
+
+try:
+    import resource
+except ImportError:  # Windows: sem getrusage, o pico de RSS não é medido
+    resource = None
+
+# Bloco lido do arquivo por vez
+_TAMANHO_BLOCO = 1 << 16
+# Registros entregues ao estoque por lote
+_TAMANHO_LOTE = 10_000
+
+_ESPACOS = re.compile(r'\s*')
+_ESPACOS_E_VIRGULAS = re.compile(r'[\s,]*')
+
+
+def ler_registros(origem, tamanho_bloco=_TAMANHO_BLOCO):
+    """
+    Lê os itens de `origem` (caminho ou arquivo de texto aberto) um a um,
+    sem carregar o arquivo inteiro. Aceita, sem precisar dizer o formato:
+
+    - um array JSON de objetos ([{...}, {...}])
+    - NDJSON (um objeto por linha)
+    - vários arrays seguidos, como em exportações em partes ([...][...])
+
+    O texto é lido em blocos de `tamanho_bloco` caracteres e cada objeto é
+    decodificado assim que termina; só o bloco atual fica em memória.
+
+    Raises:
+        ValueError: JSON malformado, array não terminado ou registro que
+            não é um objeto
+    """
+    if isinstance(origem, (str, os.PathLike)):
+        with open(origem, 'r', encoding='utf-8') as arquivo:
+            yield from ler_registros(arquivo, tamanho_bloco)
+        return
+
+    decodificador = json.JSONDecoder()
+    texto = ''
+    posicao = 0
+    fim_do_arquivo = False
+    dentro_do_array = False
+
+    while True:
+        separadores = _ESPACOS_E_VIRGULAS if dentro_do_array else _ESPACOS
+        posicao = separadores.match(texto, posicao).end()
+        if posicao == len(texto):
+            if fim_do_arquivo:
+                break
+            bloco = origem.read(tamanho_bloco)
+            fim_do_arquivo = not bloco
+            texto, posicao = texto[posicao:] + bloco, 0
+            continue
+
+        caractere = texto[posicao]
+        if caractere == '[':
+            if dentro_do_array:
+                raise ValueError("Arrays aninhados não são registros de estoque")
+            dentro_do_array = True
+            posicao += 1
+            continue
+        if caractere == ']':
+            if not dentro_do_array:
+                raise ValueError("']' sem array aberto")
+            dentro_do_array = False
+            posicao += 1
+            continue
+
+        try:
+            registro, fim = decodificador.raw_decode(texto, posicao)
+        except json.JSONDecodeError as erro:
+            if fim_do_arquivo:
+                raise ValueError(f"JSON inválido: {erro}") from None
+            # Objeto cortado no fim do bloco: lê mais e tenta de novo
+            bloco = origem.read(tamanho_bloco)
+            fim_do_arquivo = not bloco
+            texto, posicao = texto[posicao:] + bloco, 0
+            continue
+
+        if not isinstance(registro, dict):
+            raise ValueError(f"Registro de estoque deve ser um objeto, não {type(registro).__name__}")
+        yield registro
+        posicao = fim
+
+    if dentro_do_array:
+        raise ValueError("Array JSON não terminado")
+
+
+def pico_rss_kb():
+    """Pico de memória residente do processo em KB (None onde não há getrusage)."""
+    if resource is None:
+        return None
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+
+def carregar_estoque(origem, estoque, tamanho_lote=_TAMANHO_LOTE, ao_carregar_lote=None):
+    """
+    Carrega os registros de `origem` (ver ler_registros) no ItemStore
+    `estoque` em lotes de `tamanho_lote`. Os índices do estoque ficam
+    pendentes até o primeiro uso, então cada lote só preenche as colunas.
+
+    `ao_carregar_lote(total)` é chamado depois de cada lote com o número de
+    itens já carregados: o chamador pode responder consultas sobre o
+    estoque parcial antes do fim do arquivo.
+
+    Returns:
+        dict com 'registros', 'segundos', 'registros_por_segundo' e
+        'pico_rss_kb' (pico do processo até o fim da carga)
+    """
+    if tamanho_lote <= 0:
+        raise ValueError("tamanho_lote deve ser positivo")
+
+    inicio = time.perf_counter()
+    registros = ler_registros(origem)
+    total = 0
+    while True:
+        lote = list(islice(registros, tamanho_lote))
+        if not lote:
+            break
+        estoque.extend(lote, adiar_indices=True)
+        total += len(lote)
+        if ao_carregar_lote is not None:
+            ao_carregar_lote(total)
+    segundos = time.perf_counter() - inicio
+
+    return {
+        'registros': total,
+        'segundos': segundos,
+        'registros_por_segundo': total / segundos if segundos > 0 else 0.0,
+        'pico_rss_kb': pico_rss_kb()
+    }
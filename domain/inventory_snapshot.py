@@ -0,0 +1,440 @@
+import json
+import mmap
+import os
+import struct
+import sys
+import time
+from array import array
+from datetime import date
+
+from domain.inventory_loader import carregar_estoque, pico_rss_kb
+from domain.item_store import ItemStore
+
+# Formato do snapshot (ordem de bytes nativa, marcada na assinatura):
+#   cabeçalho de 64 bytes: assinatura, versão, nº de itens, último número de
+#   sequência do journal incluído, nº de strings, bytes de strings, bytes de extras
+#   ids, quantidades, ideais (int64), preços (float64), validades (int64, ordinal)
+#   nomes, categorias, locais: índice (uint32) na tabela de strings
+#   tabela de strings: deslocamentos (uint64, n + 1) e bytes UTF-8
+#   extras: JSON {linha: {campo: valor}} dos campos fora do esquema
+_ASSINATURA = b'ESTQSNP' + (b'L' if sys.byteorder == 'little' else b'B')
+_VERSAO = 1
+_CABECALHO = struct.Struct('=8sI4xQQQQQ')
+_TAMANHO_CABECALHO = 64
+
+_COLUNAS_NUMERICAS = (('ids', 'q'), ('quantidades', 'q'), ('ideais', 'q'),
+                      ('precos', 'd'), ('validades', 'q'))
+_COLUNAS_TEXTO = ('nomes', 'categorias', 'locais')
+
+# Entradas do journal que disparam a compactação em um novo snapshot
+_LIMITE_JOURNAL = 1000
+
+
+def _alinhar(posicao, tamanho=8):
+    return (posicao + tamanho - 1) // tamanho * tamanho
+
+
+def salvar_snapshot(estoque, caminho, sequencia=0):
+    """
+    Grava o ItemStore `estoque` em `caminho` no formato binário do
+    snapshot. `sequencia` é o número da última entrada do journal já
+    refletida no estoque. A escrita vai para um arquivo temporário
+    substituído de uma vez (os.replace), então um snapshot pela metade
+    nunca fica no lugar do anterior. Complexidade: O(n)
+    """
+    tabela = {}
+    indices = {
+        nome: array('I', [tabela.setdefault(texto, len(tabela)) for texto in getattr(estoque, nome)])
+        for nome in _COLUNAS_TEXTO
+    }
+    codificadas = [texto.encode('utf-8') for texto in tabela]
+    deslocamentos = array('Q', [0])
+    for codificada in codificadas:
+        deslocamentos.append(deslocamentos[-1] + len(codificada))
+    extras = json.dumps(estoque.extras_por_linha()).encode('utf-8')
+
+    temporario = f"{caminho}.tmp"
+    with open(temporario, 'wb') as arquivo:
+        cabecalho = _CABECALHO.pack(
+            _ASSINATURA, _VERSAO, len(estoque), sequencia,
+            len(codificadas), deslocamentos[-1], len(extras)
+        )
+        arquivo.write(cabecalho.ljust(_TAMANHO_CABECALHO, b'\0'))
+        for nome, _ in _COLUNAS_NUMERICAS:
+            arquivo.write(getattr(estoque, nome).tobytes())
+        for nome in _COLUNAS_TEXTO:
+            arquivo.write(indices[nome].tobytes())
+        arquivo.write(b'\0' * (_alinhar(arquivo.tell()) - arquivo.tell()))
+        arquivo.write(deslocamentos.tobytes())
+        arquivo.write(b''.join(codificadas))
+        arquivo.write(extras)
+        arquivo.flush()
+        os.fsync(arquivo.fileno())
+    os.replace(temporario, caminho)
+
+
+class SnapshotEstoque:
+    """
+    Snapshot aberto por mmap, somente leitura. Abrir só lê o cabeçalho e
+    cria memoryviews sobre as colunas (O(1), sem copiar dados); cada
+    leitura vai direto às páginas do arquivo. Use com `with` ou chame
+    fechar().
+    """
+
+    def __init__(self, caminho):
+        self._arquivo = open(caminho, 'rb')
+        try:
+            self._mapa = mmap.mmap(self._arquivo.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            self._arquivo.close()
+            raise ValueError(f"Snapshot vazio: {caminho}") from None
+        self._visoes = []
+        try:
+            self._abrir()
+        except ValueError:
+            self.fechar()
+            raise
+
+    def _abrir(self):
+        if len(self._mapa) < _TAMANHO_CABECALHO:
+            raise ValueError("Snapshot truncado")
+        (assinatura, versao, self.total, self.sequencia, total_strings,
+         bytes_strings, bytes_extras) = _CABECALHO.unpack_from(self._mapa)
+        if assinatura != _ASSINATURA:
+            raise ValueError("Arquivo não é um snapshot de estoque desta plataforma")
+        if versao != _VERSAO:
+            raise ValueError(f"Versão de snapshot não suportada: {versao}")
+
+        dados = memoryview(self._mapa)
+        self._visoes.append(dados)
+        posicao = _TAMANHO_CABECALHO
+        secoes = {}
+        for nome, tipo in _COLUNAS_NUMERICAS:
+            secoes[nome] = (posicao, tipo, self.total)
+            posicao += 8 * self.total
+        for nome in _COLUNAS_TEXTO:
+            secoes[nome] = (posicao, 'I', self.total)
+            posicao += 4 * self.total
+        posicao = _alinhar(posicao)
+        secoes['_deslocamentos'] = (posicao, 'Q', total_strings + 1)
+        posicao += 8 * (total_strings + 1)
+        self._inicio_strings = posicao
+        self._inicio_extras = posicao + bytes_strings
+        # '{}' (2 bytes) quando nenhum item tem campos fora do esquema
+        self._tem_extras = bytes_extras > 2
+        if self._inicio_extras + bytes_extras != len(self._mapa):
+            raise ValueError("Snapshot truncado")
+
+        for nome, (inicio, tipo, quantidade) in secoes.items():
+            tamanho = array(tipo).itemsize * quantidade
+            visao = dados[inicio:inicio + tamanho].cast(tipo)
+            self._visoes.append(visao)
+            setattr(self, nome, visao)
+        self._extras = None
+
+    def __len__(self):
+        return self.total
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *erro):
+        self.fechar()
+
+    def texto(self, indice):
+        """String `indice` da tabela de strings."""
+        inicio = self._inicio_strings + self._deslocamentos[indice]
+        fim = self._inicio_strings + self._deslocamentos[indice + 1]
+        return self._mapa[inicio:fim].decode('utf-8')
+
+    def textos(self):
+        """Tabela de strings inteira, decodificada."""
+        deslocamentos = self._deslocamentos.tolist()
+        bloco = self._mapa[self._inicio_strings:self._inicio_strings + deslocamentos[-1]]
+        return [
+            sys.intern(bloco[inicio:fim].decode('utf-8'))
+            for inicio, fim in zip(deslocamentos, deslocamentos[1:])
+        ]
+
+    def extras(self):
+        """Campos fora do esquema por linha (lidos na primeira chamada)."""
+        if self._extras is None:
+            bruto = self._mapa[self._inicio_extras:len(self._mapa)]
+            self._extras = {int(linha): campos for linha, campos in json.loads(bruto).items()}
+        return self._extras
+
+    def item(self, linha):
+        """Item da linha `linha` como dict, no formato do data.json. Complexidade: O(1)"""
+        if not 0 <= linha < self.total:
+            raise IndexError(linha)
+        validade = self.validades[linha]
+        item = {
+            'id': self.ids[linha],
+            'itemName': self.texto(self.nomes[linha]),
+            'category': self.texto(self.categorias[linha]),
+            'quantity': self.quantidades[linha],
+            'ideal_quantity': self.ideais[linha],
+            'unity_price': self.precos[linha],
+            'location': self.texto(self.locais[linha]),
+            'expiryDate': date.fromordinal(validade).isoformat() if validade else None,
+        }
+        if self._tem_extras:
+            item.update(self.extras().get(linha, {}))
+        return item
+
+    def __getitem__(self, linha):
+        return self.item(linha)
+
+    def __iter__(self):
+        return map(self.item, range(self.total))
+
+    def fechar(self):
+        # As memoryviews precisam ser liberadas antes de fechar o mmap
+        for visao in reversed(self._visoes):
+            visao.release()
+        self._visoes = []
+        self._mapa.close()
+        self._arquivo.close()
+
+
+def carregar_snapshot(caminho, estoque):
+    """
+    Preenche o ItemStore vazio `estoque` com o snapshot de `caminho`: as
+    colunas numéricas são copiadas em bloco do mmap e cada string da
+    tabela é decodificada uma vez. Retorna o número de sequência do journal
+    registrado no snapshot. Complexidade: O(n), sem parsing de JSON
+    """
+    with SnapshotEstoque(caminho) as snapshot:
+        colunas = {}
+        for nome, tipo in _COLUNAS_NUMERICAS:
+            coluna = array(tipo)
+            coluna.frombytes(getattr(snapshot, nome).cast('B'))
+            colunas[nome] = coluna
+        textos = snapshot.textos()
+        for nome in _COLUNAS_TEXTO:
+            indices = getattr(snapshot, nome)
+            colunas[nome] = list(map(textos.__getitem__, indices))
+        estoque.preencher_colunas(colunas, snapshot.extras())
+        return snapshot.sequencia
+
+
+class JournalEstoque:
+    """
+    Journal de mutações somente de acréscimo: uma linha JSON por mutação
+    ('adicionar' com o item inteiro, 'quantidade' com id e novas
+    quantidades), numeradas em sequência. Cada linha é gravada e enviada
+    ao sistema operacional (flush) antes de a mutação ser confirmada.
+    """
+
+    def __init__(self, caminho):
+        self.caminho = caminho
+        self.sequencia = 0
+        self.entradas = 0
+        self._arquivo = None
+
+    def registrar_adicao(self, item):
+        self._escrever({'op': 'adicionar', 'item': dict(item)})
+
+    def registrar_quantidade(self, item_id, quantidade, quantidade_ideal=None):
+        self._escrever({
+            'op': 'quantidade', 'id': item_id,
+            'quantity': quantidade, 'ideal_quantity': quantidade_ideal
+        })
+
+    def _escrever(self, entrada):
+        if self._arquivo is None:
+            self._arquivo = open(self.caminho, 'a', encoding='utf-8')
+        self.sequencia += 1
+        entrada['seq'] = self.sequencia
+        self._arquivo.write(json.dumps(entrada, ensure_ascii=False) + '\n')
+        self._arquivo.flush()
+        self.entradas += 1
+
+    def reaplicar(self, estoque, desde=0):
+        """
+        Reaplica em `estoque` as entradas com sequência > `desde` (as
+        anteriores já estão no snapshot). Uma última linha sem '\n' (queda
+        no meio da escrita, mesmo que o trecho gravado já seja um JSON
+        válido) nunca foi confirmada: é cortada do arquivo sem ser aplicada,
+        para a próxima escrita começar em uma linha nova. Retorna quantas
+        entradas foram aplicadas.
+        """
+        self.sequencia = desde
+        self.entradas = 0
+        if not os.path.exists(self.caminho):
+            return 0
+
+        aplicadas = 0
+        with open(self.caminho, 'r', encoding='utf-8', newline='') as arquivo:
+            linhas = arquivo.readlines()
+        if linhas and not linhas[-1].endswith('\n'):
+            # A entrada só é confirmada depois do '\n': corta a linha incompleta
+            del linhas[-1]
+            os.truncate(self.caminho, sum(len(linha.encode('utf-8')) for linha in linhas))
+        for numero, linha in enumerate(linhas, 1):
+            try:
+                entrada = json.loads(linha)
+            except json.JSONDecodeError:
+                raise ValueError(f"Journal corrompido na linha {numero}") from None
+
+            self.entradas += 1
+            self.sequencia = max(self.sequencia, entrada['seq'])
+            if entrada['seq'] <= desde:
+                continue
+            if entrada['op'] == 'adicionar':
+                estoque.append(entrada['item'])
+            elif entrada['op'] == 'quantidade':
+                item = estoque.visao_por_id(entrada['id'])
+                if item is not None:
+                    item['quantity'] = entrada['quantity']
+                    if entrada['ideal_quantity'] is not None:
+                        item['ideal_quantity'] = entrada['ideal_quantity']
+            else:
+                raise ValueError(f"Operação desconhecida no journal: {entrada['op']}")
+            aplicadas += 1
+        return aplicadas
+
+    def limpar(self):
+        """Esvazia o journal (depois de um snapshot que inclui todas as entradas)."""
+        self.fechar()
+        with open(self.caminho, 'w', encoding='utf-8'):
+            pass
+        self.entradas = 0
+
+    def fechar(self):
+        if self._arquivo is not None:
+            self._arquivo.close()
+            self._arquivo = None
+
+
+class EstoquePersistente:
+    """
+    Persistência do estoque em `diretorio`: snapshot binário
+    (estoque.snapshot) mais journal de mutações (estoque.journal).
+
+    Ao abrir, carrega o snapshot e reaplica o journal; sem snapshot, lê a
+    origem JSON e grava o primeiro snapshot. Com `limite_journal` entradas
+    no journal, o estado atual é compactado em um novo snapshot e o
+    journal é esvaziado. O snapshot guarda a sequência da última entrada
+    incluída, então uma queda entre gravar o snapshot e esvaziar o journal
+    não reaplica nada em dobro.
+    """
+
+    def __init__(self, diretorio, limite_journal=_LIMITE_JOURNAL):
+        if limite_journal <= 0:
+            raise ValueError("limite_journal deve ser positivo")
+        self.diretorio = diretorio
+        self.limite_journal = limite_journal
+        self.caminho_snapshot = os.path.join(diretorio, 'estoque.snapshot')
+        self.journal = JournalEstoque(os.path.join(diretorio, 'estoque.journal'))
+        self.compactacoes = 0
+        self._estoque = None
+
+    def abrir(self, estoque, origem=None):
+        """
+        Carrega o estado persistido no ItemStore vazio `estoque`.
+        `origem` (caminho de JSON/NDJSON) só é lida quando ainda não há
+        snapshot.
+
+        Returns:
+            dict com 'fonte' ('snapshot' ou 'json'), 'registros',
+            'journal_reaplicado', 'segundos', 'registros_por_segundo' e
+            'pico_rss_kb', como carregar_estoque
+        """
+        inicio = time.perf_counter()
+        os.makedirs(self.diretorio, exist_ok=True)
+        self._estoque = estoque
+        if os.path.exists(self.caminho_snapshot):
+            sequencia = carregar_snapshot(self.caminho_snapshot, estoque)
+            fonte = 'snapshot'
+        elif origem is not None:
+            carregar_estoque(origem, estoque)
+            sequencia = 0
+            fonte = 'json'
+        else:
+            raise ValueError("Sem snapshot em disco, é preciso informar a origem dos itens")
+
+        reaplicadas = self.journal.reaplicar(estoque, sequencia)
+        if fonte == 'json' or self.journal.entradas >= self.limite_journal:
+            self.compactar()
+
+        segundos = time.perf_counter() - inicio
+        return {
+            'fonte': fonte,
+            'registros': len(estoque),
+            'journal_reaplicado': reaplicadas,
+            'segundos': segundos,
+            'registros_por_segundo': len(estoque) / segundos if segundos > 0 else 0.0,
+            'pico_rss_kb': pico_rss_kb()
+        }
+
+    def registrar_adicao(self, item):
+        self.journal.registrar_adicao(item)
+        self._compactar_se_cheio()
+
+    def registrar_quantidade(self, item_id, quantidade, quantidade_ideal=None):
+        self.journal.registrar_quantidade(item_id, quantidade, quantidade_ideal)
+        self._compactar_se_cheio()
+
+    def _compactar_se_cheio(self):
+        if self.journal.entradas >= self.limite_journal:
+            self.compactar()
+
+    def compactar(self):
+        """Grava o estado atual em um novo snapshot e esvazia o journal. Complexidade: O(n)"""
+        if self._estoque is None:
+            raise ValueError("Abra o estoque antes de compactar")
+        salvar_snapshot(self._estoque, self.caminho_snapshot, self.journal.sequencia)
+        self.journal.limpar()
+        self.compactacoes += 1
+
+    def fechar(self):
+        self.journal.fechar()
+
+
+def comparar_partida_a_frio(origem, diretorio, repeticoes=3):
+    """
+    Mede o tempo de partida (carga até a primeira consulta por id) lendo
+    `origem` em JSON e lendo o snapshot em `diretorio` (criado a partir da
+    origem se ainda não existe), e o tempo de abrir o snapshot só para
+    leitura via mmap. Usa o melhor de `repeticoes` execuções de cada.
+
+    Returns:
+        dict com 'json', 'snapshot' e 'mmap' (segundos) e 'registros'
+    """
+    persistencia = EstoquePersistente(diretorio)
+    if not os.path.exists(persistencia.caminho_snapshot):
+        persistencia.abrir(ItemStore(), origem)
+    persistencia.fechar()
+
+    def melhor(funcao):
+        tempos = []
+        for _ in range(repeticoes):
+            inicio = time.perf_counter()
+            funcao()
+            tempos.append(time.perf_counter() - inicio)
+        return min(tempos)
+
+    def partida_json():
+        estoque = ItemStore()
+        carregar_estoque(origem, estoque)
+        estoque.visao_por_id(estoque.ids[0] if len(estoque) else None)
+
+    def partida_snapshot():
+        estoque = ItemStore()
+        carregar_snapshot(persistencia.caminho_snapshot, estoque)
+        estoque.visao_por_id(estoque.ids[0] if len(estoque) else None)
+
+    def abrir_mmap():
+        with SnapshotEstoque(persistencia.caminho_snapshot) as snapshot:
+            if len(snapshot):
+                snapshot.item(0)
+
+    with SnapshotEstoque(persistencia.caminho_snapshot) as snapshot:
+        registros = len(snapshot)
+    return {
+        'registros': registros,
+        'json': melhor(partida_json),
+        'snapshot': melhor(partida_snapshot),
+        'mmap': melhor(abrir_mmap)
+    }
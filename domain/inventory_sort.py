@@ -0,0 +1,363 @@
+import bisect
+import heapq
+import json
+import operator
+import os
+import tempfile
+import time
+from datetime import date
+
+from domain.inventory_loader import ler_registros
+from domain.item_store import _COLUNAS, _SEM_VALIDADE, _ordinal_validade
+
+# Chave de validade dos itens sem validade: depois de qualquer data
+_VALIDADE_AUSENTE = date.max.toordinal() + 1
+# Trechos ordenados por inserção antes das fusões do merge sort bottom-up
+_TAMANHO_TRECHO = 32
+# Segmentos do introsort abaixo deste tamanho vão para a inserção
+_LIMITE_INSERCAO = 16
+# Ordenação externa: registros por bloco em memória e arquivos fundidos por vez
+_TAMANHO_BLOCO_EXTERNO = 100_000
+_MAXIMO_VIAS = 64
+
+ALGORITMOS = ('merge', 'intro', 'nativo')
+CHAVE_COMPOSTA = ('category', 'expiryDate', 'itemName')
+
+
+def _validar_campos(campos):
+    campos = (campos,) if isinstance(campos, str) else tuple(campos)
+    if not campos:
+        raise ValueError("Informe ao menos um campo de ordenação")
+    desconhecidos = [campo for campo in campos if campo not in _COLUNAS]
+    if desconhecidos:
+        raise ValueError(f"Campos de ordenação desconhecidos: {', '.join(desconhecidos)}")
+    return campos
+
+
+def chaves_do_estoque(estoque, campos=('itemName',)):
+    """
+    Chave de ordenação de cada linha do ItemStore `estoque`, montada uma
+    vez a partir das colunas: o valor do campo ou, com vários `campos`, a
+    tupla dos valores. Validades são ordinais, com os itens sem validade
+    por último.
+    """
+    colunas = []
+    for campo in _validar_campos(campos):
+        coluna = getattr(estoque, _COLUNAS[campo])
+        if campo == 'expiryDate':
+            coluna = [
+                _VALIDADE_AUSENTE if validade == _SEM_VALIDADE else validade for validade in coluna
+            ]
+        colunas.append(coluna)
+    return list(colunas[0]) if len(colunas) == 1 else list(zip(*colunas))
+
+
+def chave_de_registro(campos=('itemName',)):
+    """
+    Função que calcula a chave de um registro (dict no formato do
+    data.json) igual à de chaves_do_estoque para o mesmo item.
+    """
+    campos = _validar_campos(campos)
+
+    def valor(registro, campo):
+        if campo == 'expiryDate':
+            return _ordinal_validade(registro.get(campo)) or _VALIDADE_AUSENTE
+        return registro[campo]
+
+    if len(campos) == 1:
+        campo = campos[0]
+        return lambda registro: valor(registro, campo)
+    return lambda registro: tuple(valor(registro, campo) for campo in campos)
+
+
+# -------------------
+# MERGE SORT BOTTOM-UP
+# -------------------
+def ordenar_merge(chaves):
+    """
+    Merge sort bottom-up, estável e sem recursão. Trechos de
+    _TAMANHO_TRECHO são ordenados por inserção binária e depois fundidos
+    em larguras dobradas, alternando entre as listas de trabalho e um único
+    buffer alocado uma vez (nenhuma fatia nova por fusão). Pares de
+    trechos já em ordem são copiados sem comparar elemento a elemento.
+    Complexidade: O(n log n) tempo, O(n) memória extra
+
+    Returns:
+        permutação das posições de `chaves` em ordem (a ordenação em si)
+    """
+    n = len(chaves)
+    origem = list(chaves)
+    posicoes = list(range(n))
+
+    for inicio in range(0, n, _TAMANHO_TRECHO):
+        fim = min(inicio + _TAMANHO_TRECHO, n)
+        for j in range(inicio + 1, fim):
+            chave = origem[j]
+            destino = bisect.bisect_right(origem, chave, inicio, j)
+            if destino < j:
+                posicao = posicoes[j]
+                origem[destino + 1:j + 1] = origem[destino:j]
+                posicoes[destino + 1:j + 1] = posicoes[destino:j]
+                origem[destino] = chave
+                posicoes[destino] = posicao
+
+    buffer = [None] * n
+    buffer_posicoes = [0] * n
+    largura = _TAMANHO_TRECHO
+    while largura < n:
+        for esquerda in range(0, n, 2 * largura):
+            meio = min(esquerda + largura, n)
+            fim = min(esquerda + 2 * largura, n)
+            if meio >= fim or not origem[meio] < origem[meio - 1]:
+                # Sem metade direita, ou as duas metades já estão em ordem
+                buffer[esquerda:fim] = origem[esquerda:fim]
+                buffer_posicoes[esquerda:fim] = posicoes[esquerda:fim]
+                continue
+
+            i, j, k = esquerda, meio, esquerda
+            while i < meio and j < fim:
+                # Só passa o da direita se for estritamente menor: estável
+                if origem[j] < origem[i]:
+                    buffer[k] = origem[j]
+                    buffer_posicoes[k] = posicoes[j]
+                    j += 1
+                else:
+                    buffer[k] = origem[i]
+                    buffer_posicoes[k] = posicoes[i]
+                    i += 1
+                k += 1
+            if i < meio:
+                buffer[k:fim] = origem[i:meio]
+                buffer_posicoes[k:fim] = posicoes[i:meio]
+            else:
+                buffer[k:fim] = origem[j:fim]
+                buffer_posicoes[k:fim] = posicoes[j:fim]
+
+        origem, buffer = buffer, origem
+        posicoes, buffer_posicoes = buffer_posicoes, posicoes
+        largura *= 2
+
+    return posicoes
+
+
+# -------------------
+# INTROSORT
+# -------------------
+def _inserir(itens, inicio, fim):
+    """Ordenação por inserção de itens[inicio:fim] (fim exclusivo)."""
+    for j in range(inicio + 1, fim):
+        item = itens[j]
+        i = j - 1
+        while i >= inicio and item < itens[i]:
+            itens[i + 1] = itens[i]
+            i -= 1
+        itens[i + 1] = item
+
+
+def _heapsort(itens, inicio, fim):
+    """Heapsort de itens[inicio:fim] no próprio lugar (heap de máximo)."""
+    tamanho = fim - inicio
+
+    def descer(raiz, limite):
+        item = itens[inicio + raiz]
+        while True:
+            filho = 2 * raiz + 1
+            if filho >= limite:
+                break
+            if filho + 1 < limite and itens[inicio + filho] < itens[inicio + filho + 1]:
+                filho += 1
+            if not item < itens[inicio + filho]:
+                break
+            itens[inicio + raiz] = itens[inicio + filho]
+            raiz = filho
+        itens[inicio + raiz] = item
+
+    for raiz in range(tamanho // 2 - 1, -1, -1):
+        descer(raiz, tamanho)
+    for ultimo in range(tamanho - 1, 0, -1):
+        itens[inicio], itens[inicio + ultimo] = itens[inicio + ultimo], itens[inicio]
+        descer(0, ultimo)
+
+
+def ordenar_intro(chaves):
+    """
+    Introsort sem recursão: quicksort com pivô pela mediana de três e
+    pilha explícita (o segmento maior é empilhado, o menor segue), que
+    passa para heapsort no segmento quando a profundidade passa de
+    2 * log2(n) e para inserção abaixo de _LIMITE_INSERCAO. Cada chave é
+    decorada uma vez com a posição original, o que desempata iguais e
+    torna o resultado igual ao de uma ordenação estável.
+    Complexidade: O(n log n) no pior caso, inclusive com a entrada já
+    ordenada ou invertida
+
+    Returns:
+        permutação das posições de `chaves` em ordem
+    """
+    itens = list(zip(chaves, range(len(chaves))))
+    n = len(itens)
+    pilha = [(0, n, 2 * max(n, 1).bit_length())]
+
+    while pilha:
+        inicio, fim, profundidade = pilha.pop()
+        while fim - inicio > _LIMITE_INSERCAO:
+            if profundidade == 0:
+                _heapsort(itens, inicio, fim)
+                break
+            profundidade -= 1
+
+            # Mediana de três: itens[inicio] <= itens[meio] <= itens[fim - 1]
+            meio = (inicio + fim) // 2
+            if itens[meio] < itens[inicio]:
+                itens[meio], itens[inicio] = itens[inicio], itens[meio]
+            if itens[fim - 1] < itens[inicio]:
+                itens[fim - 1], itens[inicio] = itens[inicio], itens[fim - 1]
+            if itens[fim - 1] < itens[meio]:
+                itens[fim - 1], itens[meio] = itens[meio], itens[fim - 1]
+            pivo = itens[meio]
+
+            # Partição de Hoare: as pontas já servem de sentinela
+            i, j = inicio, fim - 1
+            while True:
+                i += 1
+                while itens[i] < pivo:
+                    i += 1
+                j -= 1
+                while pivo < itens[j]:
+                    j -= 1
+                if i >= j:
+                    break
+                itens[i], itens[j] = itens[j], itens[i]
+
+            # itens[inicio:j + 1] <= pivo <= itens[j + 1:fim]
+            if j + 1 - inicio < fim - j - 1:
+                pilha.append((j + 1, fim, profundidade))
+                fim = j + 1
+            else:
+                pilha.append((inicio, j + 1, profundidade))
+                inicio = j + 1
+        else:
+            _inserir(itens, inicio, fim)
+
+    return [posicao for _, posicao in itens]
+
+
+def ordenar_nativo(chaves):
+    """Timsort do Python (sorted) sobre as chaves, como referência. Estável."""
+    return sorted(range(len(chaves)), key=chaves.__getitem__)
+
+
+_ORDENADORES = {'merge': ordenar_merge, 'intro': ordenar_intro, 'nativo': ordenar_nativo}
+
+
+def ordenar_chaves(chaves, algoritmo='merge'):
+    """Permutação que ordena `chaves` com `algoritmo` ('merge', 'intro' ou 'nativo')."""
+    try:
+        ordenador = _ORDENADORES[algoritmo]
+    except KeyError:
+        raise ValueError(f"Algoritmo de ordenação desconhecido: {algoritmo!r}") from None
+    return ordenador(chaves)
+
+
+# -------------------
+# ORDENAÇÃO EXTERNA (k-way merge)
+# -------------------
+def _gravar_bloco(bloco, sequencia, chave, diretorio):
+    """Ordena um bloco em memória e grava as linhas [chave, sequência, registro]."""
+    chaves = [chave(registro) for registro in bloco]
+    descritor, caminho = tempfile.mkstemp(suffix='.ndjson', dir=diretorio)
+    with os.fdopen(descritor, 'w', encoding='utf-8') as arquivo:
+        for posicao in ordenar_merge(chaves):
+            linha = [chaves[posicao], sequencia + posicao, bloco[posicao]]
+            arquivo.write(json.dumps(linha, ensure_ascii=False) + '\n')
+    return caminho
+
+
+def _ler_bloco(caminho):
+    with open(caminho, 'r', encoding='utf-8') as arquivo:
+        for linha in arquivo:
+            yield json.loads(linha)
+
+
+def _fundir(caminhos, escrever):
+    """
+    Funde arquivos de linhas decoradas já ordenadas por (chave, sequência)
+    com heapq.merge, lendo uma linha de cada por vez.
+    """
+    leitores = [_ler_bloco(caminho) for caminho in caminhos]
+    try:
+        for decorado in heapq.merge(*leitores, key=operator.itemgetter(0, 1)):
+            escrever(decorado)
+    finally:
+        for leitor in leitores:
+            leitor.close()
+
+
+def ordenar_externo(origem, destino, campos=('itemName',), tamanho_bloco=_TAMANHO_BLOCO_EXTERNO,
+                    diretorio_temporario=None):
+    """
+    Ordenação externa para exportações maiores que a memória: lê os
+    registros de `origem` (caminho, arquivo aberto ou iterável de dicts;
+    ver inventory_loader.ler_registros) em blocos de `tamanho_bloco`,
+    ordena cada bloco com o merge sort e o grava em um arquivo temporário
+    já decorado com a chave, e funde os arquivos em k vias
+    (até _MAXIMO_VIAS arquivos abertos por passada) gravando `destino` em
+    NDJSON, um registro por linha. Estável: registros com a mesma chave
+    saem na ordem de leitura. Só um bloco e uma linha por arquivo ficam
+    em memória.
+
+    Returns:
+        dict com 'registros', 'blocos', 'passadas' (fusões intermediárias
+        mais a final) e 'segundos'
+    """
+    if tamanho_bloco <= 0:
+        raise ValueError("tamanho_bloco deve ser positivo")
+    chave = chave_de_registro(campos)
+    if isinstance(origem, (str, os.PathLike)) or hasattr(origem, 'read'):
+        origem = ler_registros(origem)
+
+    inicio = time.perf_counter()
+    with tempfile.TemporaryDirectory(dir=diretorio_temporario) as diretorio:
+        caminhos = []
+        bloco = []
+        total = 0
+        for registro in origem:
+            bloco.append(dict(registro))
+            if len(bloco) == tamanho_bloco:
+                caminhos.append(_gravar_bloco(bloco, total, chave, diretorio))
+                total += len(bloco)
+                bloco = []
+        if bloco:
+            caminhos.append(_gravar_bloco(bloco, total, chave, diretorio))
+            total += len(bloco)
+        blocos = len(caminhos)
+
+        passadas = 0
+        while len(caminhos) > _MAXIMO_VIAS:
+            # Fusões intermediárias mantêm a chave e a sequência nas linhas
+            proximos = []
+            for grupo in range(0, len(caminhos), _MAXIMO_VIAS):
+                descritor, caminho = tempfile.mkstemp(suffix='.ndjson', dir=diretorio)
+                with os.fdopen(descritor, 'w', encoding='utf-8') as arquivo:
+                    _fundir(
+                        caminhos[grupo:grupo + _MAXIMO_VIAS],
+                        lambda decorado: arquivo.write(json.dumps(decorado, ensure_ascii=False) + '\n')
+                    )
+                proximos.append(caminho)
+            for caminho in caminhos:
+                os.remove(caminho)
+            caminhos = proximos
+            passadas += 1
+
+        with open(destino, 'w', encoding='utf-8') as saida:
+            _fundir(
+                caminhos,
+                lambda decorado: saida.write(json.dumps(decorado[2], ensure_ascii=False) + '\n')
+            )
+        passadas += 1
+
+    return {
+        'registros': total,
+        'blocos': blocos,
+        'passadas': passadas,
+        'segundos': time.perf_counter() - inicio
+    }
@@ -0,0 +1,877 @@
+import bisect
+import heapq
+import operator
+import sys
+from array import array
+from collections.abc import MutableMapping
+from datetime import date
+from itertools import compress
+
+# Campo do item -> coluna do ItemStore
+_COLUNAS = {
+    'id': 'ids',
+    'itemName': 'nomes',
+    'category': 'categorias',
+    'quantity': 'quantidades',
+    'ideal_quantity': 'ideais',
+    'unity_price': 'precos',
+    'location': 'locais',
+    'expiryDate': 'validades',
+}
+
+# Validade ausente: ordinal 0 (date.toordinal() começa em 1)
+_SEM_VALIDADE = 0
+
+# Chave dos heaps de índice: prioridade << 32 | slot (um int por entrada)
+_BITS_SLOT = 32
+_MASCARA_SLOT = (1 << _BITS_SLOT) - 1
+
+# Bits fracionários da criticidade (déficit / ideal) no heap de criticidade
+_BITS_FRACAO = 30
+
+
+def _ordinal_validade(valor):
+    """Converte 'YYYY-MM-DD' (ou None/'') no ordinal guardado na coluna de validades."""
+    if not valor:
+        return _SEM_VALIDADE
+    return date.fromisoformat(valor).toordinal()
+
+
+def _internar(valor):
+    return sys.intern(valor) if isinstance(valor, str) else valor
+
+
+class ItemStore:
+    """
+    Estoque em colunas: arrays tipados para id, quantidade, quantidade
+    ideal, preço e validade (ordinal), e listas de strings internadas para
+    nome, categoria e localização. Cada item ocupa ~8 bytes por coluna em
+    vez de um dict inteiro.
+
+    Cada item tem um slot fixo; a posição (linha) muda quando o estoque é
+    reordenado, mas o slot não, então as visões (ItemView) continuam
+    apontando para o mesmo item. A visão de um slot é criada na primeira
+    vez que é pedida e reaproveitada depois, de modo que o mesmo item é
+    sempre o mesmo objeto. Campos fora do esquema ficam em um dict esparso
+    por slot.
+
+    Índices mantidos a cada inserção e a cada escrita de 'id' ou
+    'itemName' (independentes da ordem das linhas):
+    - hash id -> slot e nome -> slot: busca exata O(1); com repetidos,
+      vale o item inserido primeiro
+    - nomes ordenados (lista paralela de slots, inserção por bisect):
+      busca por prefixo e por intervalo O(log n + k)
+    - heaps de validade (só itens com validade) e de déficit e
+      criticidade (só itens abaixo do ideal), ver _IndiceHeap: inserção
+      O(log n), consultas sem varrer o estoque
+    - linhas abaixo do ideal, em ordem (array ordenado por bisect): fila
+      de reposição paginada e entrada da PD sem recalcular déficits
+    - grupos por categoria e por localização, ver _IndiceGrupo: slots de
+      cada grupo e totais (itens, valor em estoque, custo do déficit,
+      itens críticos) ajustados a cada escrita, relatórios em O(grupos)
+
+    Com extend(..., adiar_indices=True) os índices ficam pendentes e são
+    construídos de uma vez na primeira consulta ou escrita que precisa
+    deles, então carregar em lotes não reconstrói os índices a cada lote.
+
+    `mutacoes` conta as inserções e escritas de campos, inclusive as feitas
+    direto nas visões: quem guarda resultados derivados do estoque (o cache
+    do StockManager, o estado incremental) compara o contador para saber
+    se eles ainda valem.
+    """
+
+    def __init__(self, itens=()):
+        self.ids = array('q')
+        self.quantidades = array('q')
+        self.ideais = array('q')
+        self.precos = array('d')
+        self.validades = array('q')
+        self.nomes = []
+        self.categorias = []
+        self.locais = []
+        # slot -> linha atual e linha -> slot
+        self._linha_do_slot = array('q')
+        self._slot_da_linha = array('q')
+        self._extras = {}
+        # slot -> ItemView já criada (None até ser pedida)
+        self._visoes = []
+        self._slot_por_id = {}
+        self._slot_por_nome = {}
+        self._nomes_ordenados = []
+        self._slots_ordenados = array('q')
+        self._indice_validade = _IndiceHeap(self, self._prioridade_validade)
+        self._indice_deficit = _IndiceHeap(self, self._prioridade_deficit)
+        self._indice_criticidade = _IndiceHeap(self, self._prioridade_criticidade)
+        self._linhas_criticas = array('q')
+        self._grupos = {
+            'categoria': _IndiceGrupo(self, 'categorias'),
+            'local': _IndiceGrupo(self, 'locais'),
+        }
+        self._indices_pendentes = False
+        self.mutacoes = 0
+        self.extend(itens)
+
+    def __len__(self):
+        return len(self.ids)
+
+    def __iter__(self):
+        return iter(self.visoes(range(len(self))))
+
+    def __getitem__(self, indice):
+        if isinstance(indice, slice):
+            return self.visoes(range(len(self))[indice])
+        return self._visao_do_slot(self._slot_da_linha[indice])
+
+    def append(self, item):
+        """Adiciona um item (dict ou ItemView) ao fim do estoque e retorna sua visão."""
+        self._anexar(item)
+        return self._visao_do_slot(len(self._visoes) - 1)
+
+    def extend(self, itens, adiar_indices=False):
+        """
+        Adiciona vários itens sem criar visões. O índice ordenado é
+        reconstruído uma vez no fim (O(n log n)) em vez de uma inserção por item.
+        Com `adiar_indices`, nem isso: a reconstrução fica para o primeiro uso.
+        """
+        antes = len(self._visoes)
+        for item in itens:
+            self._anexar(item, ordenar=False)
+        if len(self._visoes) > antes:
+            if adiar_indices:
+                self._indices_pendentes = True
+            else:
+                self._construir_indices()
+
+    def preencher_colunas(self, colunas, extras=None):
+        """
+        Preenche um estoque vazio direto com colunas prontas (como as lidas
+        de um snapshot), sem passar por dicts. `colunas` mapeia o nome de
+        cada coluna ('ids', 'nomes', ...) para seus valores em ordem de
+        linha; `extras` mapeia linha -> campos fora do esquema. Os índices
+        ficam pendentes até o primeiro uso. Complexidade: O(n)
+        """
+        if len(self):
+            raise ValueError("preencher_colunas exige um estoque vazio")
+        faltando = set(_COLUNAS.values()) - set(colunas)
+        if faltando:
+            raise ValueError(f"Colunas ausentes: {sorted(faltando)}")
+        tamanhos = {len(valores) for valores in colunas.values()}
+        if len(tamanhos) > 1:
+            raise ValueError("As colunas devem ter o mesmo tamanho")
+
+        for nome in ('ids', 'quantidades', 'ideais', 'precos', 'validades'):
+            coluna = getattr(self, nome)
+            setattr(self, nome, array(coluna.typecode, colunas[nome]))
+        for nome in ('nomes', 'categorias', 'locais'):
+            setattr(self, nome, list(map(_internar, colunas[nome])))
+
+        total = len(self.ids)
+        self._linha_do_slot = array('q', range(total))
+        self._slot_da_linha = array('q', range(total))
+        self._visoes = [None] * total
+        self._extras = dict(extras or {})
+        # Repetidos: vale o primeiro, como no setdefault de _anexar
+        self._slot_por_id = dict(zip(reversed(self.ids), range(total - 1, -1, -1)))
+        self._slot_por_nome = dict(zip(reversed(self.nomes), range(total - 1, -1, -1)))
+        if total:
+            self._indices_pendentes = True
+            self.mutacoes += 1
+
+    def extras_por_linha(self):
+        """Campos fora do esquema de cada linha que os tem (linha -> dict)."""
+        return {self._linha_do_slot[slot]: dict(extras) for slot, extras in self._extras.items()}
+
+    def _construir_indices(self):
+        self._reconstruir_indice_ordenado()
+        self._reconstruir_indices_estoque()
+        self._indices_pendentes = False
+
+    def _garantir_indices(self):
+        if self._indices_pendentes:
+            self._construir_indices()
+
+    def _anexar(self, item, ordenar=True):
+        if ordenar:
+            self._garantir_indices()
+        # Lê todos os campos antes de tocar nas colunas (campo ausente:
+        # KeyError sem alterar nada)
+        valores = (
+            item['id'], _internar(item['itemName']), _internar(item['category']),
+            item['quantity'], item['ideal_quantity'], item['unity_price'],
+            _internar(item['location']), _ordinal_validade(item['expiryDate'])
+        )
+        linha = len(self.ids)
+        slot = len(self._linha_do_slot)
+        colunas = (self.ids, self.nomes, self.categorias, self.quantidades,
+                   self.ideais, self.precos, self.locais, self.validades)
+        try:
+            for coluna, valor in zip(colunas, valores):
+                coluna.append(valor)
+        except BaseException:
+            # Tipo errado (ou fora da faixa) em uma coluna tipada: desfaz as
+            # colunas já estendidas para todas continuarem do mesmo tamanho
+            for coluna in colunas:
+                del coluna[linha:]
+            raise
+
+        # Com exatamente os campos do esquema (o caso comum) não há extras
+        if len(item) > len(_COLUNAS):
+            self._extras[slot] = {
+                chave: valor for chave, valor in item.items() if chave not in _COLUNAS
+            }
+
+        self._linha_do_slot.append(linha)
+        self._slot_da_linha.append(slot)
+        self._visoes.append(None)
+        self.mutacoes += 1
+
+        self._slot_por_id.setdefault(item['id'], slot)
+        self._slot_por_nome.setdefault(self.nomes[linha], slot)
+        if ordenar:
+            self._inserir_ordenado(self.nomes[linha], slot)
+            for indice in self._indices_heap():
+                indice.inserir(slot)
+            for grupos in self._grupos.values():
+                grupos.adicionar(slot)
+            if self.quantidades[linha] < self.ideais[linha]:
+                self._linhas_criticas.append(linha)
+
+    def _converter(self, coluna, valor):
+        """
+        Valor como é guardado em `coluna`: ordinal da validade, número no
+        tipo do array ou string internada. Levanta ValueError/TypeError/
+        OverflowError sem alterar nada.
+        """
+        if coluna == 'validades':
+            return _ordinal_validade(valor)
+        destino = getattr(self, coluna)
+        if isinstance(destino, array):
+            return array(destino.typecode, (valor,))[0]
+        return _internar(valor)
+
+    def visao(self, linha):
+        """Visão do item na linha `linha`."""
+        return self._visao_do_slot(self._slot_da_linha[linha])
+
+    def visoes(self, linhas):
+        """Visões dos itens nas `linhas` dadas."""
+        visoes = self._visoes
+        criar = self._visao_do_slot
+        return [
+            visao if (visao := visoes[slot]) is not None else criar(slot)
+            for slot in map(self._slot_da_linha.__getitem__, linhas)
+        ]
+
+    def _visao_do_slot(self, slot):
+        visao = self._visoes[slot]
+        if visao is None:
+            visao = self._visoes[slot] = ItemView(self, slot)
+        return visao
+
+    def linha(self, visao):
+        """Linha atual do item de uma visão."""
+        return self._linha_do_slot[visao._slot]
+
+    def reordenar(self, visoes):
+        """
+        Reordena as colunas para a ordem de `visoes` (uma permutação das
+        visões do estoque, como a devolvida por uma ordenação).
+        Complexidade: O(n) por coluna
+        """
+        self.reordenar_linhas([self._linha_do_slot[visao._slot] for visao in visoes])
+
+    def reordenar_linhas(self, nova_ordem):
+        """
+        Reordena as colunas para que a linha i passe a ser a linha
+        `nova_ordem[i]` atual (uma permutação de range(len(self)), como a
+        devolvida por inventory_sort). Complexidade: O(n) por coluna
+        """
+        if (len(nova_ordem) != len(self) or len(set(nova_ordem)) != len(self)
+                or (nova_ordem and (min(nova_ordem) < 0 or max(nova_ordem) >= len(self)))):
+            raise ValueError("A nova ordem deve conter cada item do estoque uma vez")
+        if len(self) < 2:
+            return
+
+        pegar = operator.itemgetter(*nova_ordem)
+        for nome in ('ids', 'quantidades', 'ideais', 'precos', 'validades'):
+            coluna = getattr(self, nome)
+            setattr(self, nome, array(coluna.typecode, pegar(coluna)))
+        for nome in ('nomes', 'categorias', 'locais'):
+            setattr(self, nome, list(pegar(getattr(self, nome))))
+
+        self._slot_da_linha = array('q', [self._slot_da_linha[linha] for linha in nova_ordem])
+        for linha, slot in enumerate(self._slot_da_linha):
+            self._linha_do_slot[slot] = linha
+        self._linhas_criticas = self._varrer_criticas()
+
+    # -------------------
+    # VARREDURAS POR COLUNA
+    # -------------------
+    def linhas_criticas(self, inicio=0, fim=None):
+        """
+        Linhas com quantidade abaixo do ideal, em ordem (fatia [inicio:fim]),
+        lidas do índice mantido. Complexidade: O(k)
+        """
+        self._garantir_indices()
+        return self._linhas_criticas[inicio:fim].tolist()
+
+    def _varrer_criticas(self):
+        """Recalcula as linhas abaixo do ideal varrendo as colunas. Complexidade: O(n) em C"""
+        return array('q', compress(range(len(self)), map(operator.lt, self.quantidades, self.ideais)))
+
+    def deficits(self, linhas=None):
+        """Déficit (ideal - quantidade) de cada linha (todas, ou as de `linhas`)."""
+        if linhas is None:
+            return list(map(operator.sub, self.ideais, self.quantidades))
+        return [self.ideais[linha] - self.quantidades[linha] for linha in linhas]
+
+    def coletar(self, coluna, linhas):
+        """Valores de `coluna` nas `linhas` dadas."""
+        return list(map(getattr(self, coluna).__getitem__, linhas))
+
+    # -------------------
+    # ÍNDICES POR ID E NOME
+    # -------------------
+    def visao_por_id(self, item_id):
+        """Item com o id dado (None se não existe). Complexidade: O(1)"""
+        self._garantir_indices()
+        slot = self._slot_por_id.get(item_id)
+        return None if slot is None else self._visao_do_slot(slot)
+
+    def visao_por_nome(self, nome):
+        """Item com o nome exato dado (None se não existe). Complexidade: O(1)"""
+        self._garantir_indices()
+        slot = self._slot_por_nome.get(nome)
+        return None if slot is None else self._visao_do_slot(slot)
+
+    def visoes_por_prefixo(self, prefixo):
+        """Itens cujo nome começa com `prefixo`, em ordem de nome. Complexidade: O(log n + k)"""
+        self._garantir_indices()
+        inicio = bisect.bisect_left(self._nomes_ordenados, prefixo)
+        fim = inicio
+        while fim < len(self._nomes_ordenados) and self._nomes_ordenados[fim].startswith(prefixo):
+            fim += 1
+        return [self._visao_do_slot(slot) for slot in self._slots_ordenados[inicio:fim]]
+
+    def visoes_por_intervalo(self, inicio, fim=None):
+        """
+        Itens com inicio <= nome < fim (sem `fim`: até o último), em ordem de
+        nome. Complexidade: O(log n + k)
+        """
+        self._garantir_indices()
+        esquerda = bisect.bisect_left(self._nomes_ordenados, inicio)
+        direita = (
+            len(self._nomes_ordenados) if fim is None
+            else bisect.bisect_left(self._nomes_ordenados, fim)
+        )
+        return [self._visao_do_slot(slot) for slot in self._slots_ordenados[esquerda:direita]]
+
+    def posicao_ordenada(self, nome):
+        """Posição de `nome` (ou onde entraria) entre os nomes em ordem. Complexidade: O(log n)"""
+        self._garantir_indices()
+        return bisect.bisect_left(self._nomes_ordenados, nome)
+
+    def _inserir_ordenado(self, nome, slot):
+        # bisect_right: repetidos ficam na ordem de inserção
+        posicao = bisect.bisect_right(self._nomes_ordenados, nome)
+        self._nomes_ordenados.insert(posicao, nome)
+        self._slots_ordenados.insert(posicao, slot)
+
+    def _remover_ordenado(self, nome, slot):
+        inicio = bisect.bisect_left(self._nomes_ordenados, nome)
+        fim = bisect.bisect_right(self._nomes_ordenados, nome, inicio)
+        posicao = self._slots_ordenados.index(slot, inicio, fim)
+        del self._nomes_ordenados[posicao]
+        del self._slots_ordenados[posicao]
+        # Restantes com o mesmo nome (para recompor o índice hash)
+        return self._slots_ordenados[inicio:fim - 1]
+
+    def _reconstruir_indice_ordenado(self):
+        nomes_por_slot = [self.nomes[linha] for linha in self._linha_do_slot]
+        # sort estável: repetidos na ordem dos slots, como no bisect_right
+        ordem = sorted(range(len(nomes_por_slot)), key=nomes_por_slot.__getitem__)
+        self._nomes_ordenados = [nomes_por_slot[slot] for slot in ordem]
+        self._slots_ordenados = array('q', ordem)
+
+    def _renomear(self, slot, antigo, novo):
+        restantes = self._remover_ordenado(antigo, slot)
+        if self._slot_por_nome.get(antigo) == slot:
+            if restantes:
+                self._slot_por_nome[antigo] = min(restantes)
+            else:
+                del self._slot_por_nome[antigo]
+        atual = self._slot_por_nome.get(novo)
+        if atual is None or slot < atual:
+            self._slot_por_nome[novo] = slot
+        self._inserir_ordenado(novo, slot)
+
+    def _trocar_id(self, slot, antigo, novo):
+        if self._slot_por_id.get(antigo) == slot:
+            del self._slot_por_id[antigo]
+            # Outro item com o mesmo id (raro): varre a coluna, já sem o
+            # valor antigo neste slot. Complexidade: O(n)
+            restantes = [
+                self._slot_da_linha[linha]
+                for linha, valor in enumerate(self.ids) if valor == antigo
+            ]
+            if restantes:
+                self._slot_por_id[antigo] = min(restantes)
+        atual = self._slot_por_id.get(novo)
+        if atual is None or slot < atual:
+            self._slot_por_id[novo] = slot
+
+    # -------------------
+    # ÍNDICES DE VALIDADE E DE CRITICIDADE
+    # -------------------
+    def validades_no_intervalo(self, inicio=None, fim=None):
+        """
+        (ordinal, visão) dos itens com inicio <= validade <= fim (limites
+        opcionais), em ordem de validade; empates na ordem das linhas.
+        Com `fim`, percorre só as entradas do heap com validade <= fim:
+        O(m log m), m = itens com validade <= fim. Sem `fim`: O(n log n)
+        """
+        self._garantir_indices()
+        if fim is None:
+            # Sem limite superior a ordem inteira é pedida: o sort estável das
+            # linhas por validade (em C) é mais barato que percorrer o heap todo
+            linhas = sorted(compress(range(len(self)), self.validades), key=self.validades.__getitem__)
+            pares = ((self.validades[linha], self._slot_da_linha[linha]) for linha in linhas)
+        else:
+            pares = self._indice_validade.percorrer(fim)
+
+        resultado = []
+        for ordinal, slot in pares:
+            if inicio is None or ordinal >= inicio:
+                resultado.append((ordinal, self._visao_do_slot(slot)))
+        return resultado
+
+    def proximas_validades(self, k, inicio=None):
+        """
+        Os `k` itens de menor validade >= inicio (sem `inicio`: os k menores).
+        Complexidade: O((k + v) log n), v = itens com validade < inicio
+        """
+        self._garantir_indices()
+        resultado = []
+        if k <= 0:
+            return resultado
+        for ordinal, slot in self._indice_validade.percorrer():
+            if inicio is not None and ordinal < inicio:
+                continue
+            resultado.append((ordinal, self._visao_do_slot(slot)))
+            if len(resultado) == k:
+                break
+        return resultado
+
+    def mais_criticos(self, k=None, por='deficit'):
+        """
+        Itens abaixo do ideal em ordem decrescente de déficit (por='deficit')
+        ou de criticidade 1 - quantidade/ideal (por='criticidade'); empates
+        na ordem das linhas. Com `k`, só os k primeiros.
+        Complexidade: O(k log k) (mais o tamanho do grupo de empate)
+        """
+        self._garantir_indices()
+        if por == 'deficit':
+            indice = self._indice_deficit
+        elif por == 'criticidade':
+            indice = self._indice_criticidade
+        else:
+            raise ValueError("por deve ser 'deficit' ou 'criticidade'")
+
+        resultado = []
+        if k is not None and k <= 0:
+            return resultado
+        for _, slot in indice.percorrer():
+            resultado.append(self._visao_do_slot(slot))
+            if len(resultado) == k:
+                break
+        return resultado
+
+    # -------------------
+    # ÍNDICES POR CATEGORIA E LOCALIZAÇÃO
+    # -------------------
+    def resumo_grupos(self, por='categoria'):
+        """
+        Totais de cada categoria (por='categoria') ou localização
+        (por='local'), lidos dos agregados mantidos. Complexidade: O(g)
+        """
+        return self._indice_grupo(por).resumos()
+
+    def resumo_grupo(self, valor, por='categoria'):
+        """Totais de uma categoria ou localização (None se não existe). Complexidade: O(1)"""
+        return self._indice_grupo(por).resumo(valor)
+
+    def visoes_do_grupo(self, valor, por='categoria'):
+        """Itens de uma categoria ou localização, em ordem. Complexidade: O(k log k)"""
+        slots = self._indice_grupo(por).slots(valor)
+        return self.visoes(sorted(map(self._linha_do_slot.__getitem__, slots)))
+
+    def linhas_criticas_do_grupo(self, categoria=None, local=None):
+        """
+        Linhas abaixo do ideal da `categoria` e/ou do `local` dados, em
+        ordem, a partir dos críticos de cada grupo (sem filtro: todas).
+        Complexidade: O(k log k), k = críticos do menor grupo
+        """
+        self._garantir_indices()
+        filtros = []
+        if categoria is not None:
+            filtros.append(self._grupos['categoria'].criticos(categoria))
+        if local is not None:
+            filtros.append(self._grupos['local'].criticos(local))
+        if not filtros:
+            return self.linhas_criticas()
+        filtros.sort(key=len)
+        slots = filtros[0].intersection(*filtros[1:]) if len(filtros) > 1 else filtros[0]
+        return sorted(map(self._linha_do_slot.__getitem__, slots))
+
+    def _indice_grupo(self, por):
+        self._garantir_indices()
+        indice = self._grupos.get(por)
+        if indice is None:
+            raise ValueError("por deve ser 'categoria' ou 'local'")
+        return indice
+
+    def linhas_sem_validade(self):
+        """Linhas de itens sem data de validade, em ordem. Complexidade: O(n) em C"""
+        return list(compress(range(len(self)), map(operator.not_, self.validades)))
+
+    def _indices_heap(self):
+        return (self._indice_validade, self._indice_deficit, self._indice_criticidade)
+
+    def _reconstruir_indices_estoque(self):
+        for indice in self._indices_heap():
+            indice.reconstruir()
+        for grupos in self._grupos.values():
+            grupos.reconstruir()
+        self._linhas_criticas = self._varrer_criticas()
+
+    def _prioridade_validade(self, slot):
+        validade = self.validades[self._linha_do_slot[slot]]
+        return None if validade == _SEM_VALIDADE else validade
+
+    def _prioridade_deficit(self, slot):
+        # Min-heap: maior déficit = menor prioridade
+        linha = self._linha_do_slot[slot]
+        atual, ideal = self.quantidades[linha], self.ideais[linha]
+        return atual - ideal if atual < ideal else None
+
+    def _prioridade_criticidade(self, slot):
+        # Razão déficit/ideal em ponto fixo (2^-30), negativa para o min-heap
+        linha = self._linha_do_slot[slot]
+        atual, ideal = self.quantidades[linha], self.ideais[linha]
+        return -(((ideal - atual) << _BITS_FRACAO) // ideal) if atual < ideal else None
+
+    def memoria_bytes(self):
+        """
+        Bytes ocupados pelas colunas, índices e visões já criadas (sem as
+        strings, compartilhadas por internação).
+        """
+        self._garantir_indices()
+        total = 0
+        for nome in ('ids', 'quantidades', 'ideais', 'precos', 'validades',
+                     '_linha_do_slot', '_slot_da_linha', '_slots_ordenados', '_linhas_criticas'):
+            coluna = getattr(self, nome)
+            total += coluna.buffer_info()[1] * coluna.itemsize
+        for nome in ('nomes', 'categorias', 'locais', '_visoes', '_nomes_ordenados',
+                     '_slot_por_id', '_slot_por_nome'):
+            total += sys.getsizeof(getattr(self, nome))
+        for indice in (*self._indices_heap(), *self._grupos.values()):
+            total += indice.memoria_bytes()
+        total += sum(sys.getsizeof(visao) for visao in self._visoes if visao is not None)
+        return total + sys.getsizeof(self._extras)
+
+    # -------------------
+    # ACESSO POR CAMPO (usado pelas visões)
+    # -------------------
+    def _ler(self, slot, chave):
+        linha = self._linha_do_slot[slot]
+        coluna = _COLUNAS.get(chave)
+        if coluna is None:
+            extras = self._extras.get(slot)
+            if extras is None or chave not in extras:
+                raise KeyError(chave)
+            return extras[chave]
+        valor = getattr(self, coluna)[linha]
+        if coluna == 'validades':
+            return date.fromordinal(valor).isoformat() if valor != _SEM_VALIDADE else None
+        return valor
+
+    def _escrever(self, slot, chave, valor):
+        self._garantir_indices()
+        linha = self._linha_do_slot[slot]
+        coluna = _COLUNAS.get(chave)
+        if coluna is not None:
+            # Converte antes de retirar o item dos índices
+            valor = self._converter(coluna, valor)
+        self.mutacoes += 1
+        if coluna is None:
+            self._extras.setdefault(slot, {})[chave] = valor
+        elif coluna == 'validades':
+            anterior = self._prioridade_validade(slot)
+            self.validades[linha] = valor
+            self._indice_validade.atualizar(slot, anterior)
+        elif coluna in ('quantidades', 'ideais'):
+            deficit = self._prioridade_deficit(slot)
+            criticidade = self._prioridade_criticidade(slot)
+            self._retirar_dos_grupos(slot)
+            getattr(self, coluna)[linha] = valor
+            self._adicionar_aos_grupos(slot)
+            self._indice_deficit.atualizar(slot, deficit)
+            self._indice_criticidade.atualizar(slot, criticidade)
+            self._atualizar_linha_critica(linha, deficit is not None)
+        elif coluna in ('precos', 'categorias', 'locais'):
+            self._retirar_dos_grupos(slot)
+            getattr(self, coluna)[linha] = valor
+            self._adicionar_aos_grupos(slot)
+        elif coluna == 'nomes':
+            antigo = self.nomes[linha]
+            self.nomes[linha] = valor
+            if valor != antigo:
+                self._renomear(slot, antigo, valor)
+        elif coluna == 'ids':
+            antigo = self.ids[linha]
+            self.ids[linha] = valor
+            if valor != antigo:
+                self._trocar_id(slot, antigo, valor)
+        else:
+            getattr(self, coluna)[linha] = valor
+
+    def _retirar_dos_grupos(self, slot):
+        for grupos in self._grupos.values():
+            grupos.retirar(slot)
+
+    def _adicionar_aos_grupos(self, slot):
+        for grupos in self._grupos.values():
+            grupos.adicionar(slot)
+
+    def _atualizar_linha_critica(self, linha, era_critica):
+        critica = self.quantidades[linha] < self.ideais[linha]
+        if critica == era_critica:
+            return
+        posicao = bisect.bisect_left(self._linhas_criticas, linha)
+        if critica:
+            self._linhas_criticas.insert(posicao, linha)
+        else:
+            del self._linhas_criticas[posicao]
+
+    def _chaves(self, slot):
+        extras = self._extras.get(slot)
+        return list(_COLUNAS) + (list(extras) if extras else [])
+
+
+class _IndiceHeap:
+    """
+    Min-heap de chaves prioridade << 32 | slot (um int por entrada) sobre
+    um ItemStore. `prioridade(slot)` dá a prioridade atual do item (None =
+    fora do índice). Quando ela muda, a chave antiga fica no heap (remoção
+    preguiçosa) e é descartada nas consultas; o heap é reconstruído quando
+    as chaves obsoletas passam da metade.
+    """
+
+    def __init__(self, loja, prioridade):
+        self._loja = loja
+        self._prioridade = prioridade
+        self._heap = []
+        self._obsoletas = 0
+
+    def inserir(self, slot):
+        """Indexa um slot novo. Complexidade: O(log n)"""
+        prioridade = self._prioridade(slot)
+        if prioridade is not None:
+            heapq.heappush(self._heap, prioridade << _BITS_SLOT | slot)
+
+    def atualizar(self, slot, anterior):
+        """Registra que a prioridade de `slot` era `anterior`. Complexidade: O(log n) amortizado"""
+        atual = self._prioridade(slot)
+        if atual == anterior:
+            return
+        if anterior is not None:
+            self._obsoletas += 1
+        if atual is not None:
+            heapq.heappush(self._heap, atual << _BITS_SLOT | slot)
+        if self._obsoletas * 2 > len(self._heap):
+            self.reconstruir()
+
+    def reconstruir(self):
+        """Heap só com as prioridades atuais. Complexidade: O(n)"""
+        prioridade = self._prioridade
+        self._heap = [
+            atual << _BITS_SLOT | slot
+            for slot in range(len(self._loja._linha_do_slot))
+            if (atual := prioridade(slot)) is not None
+        ]
+        heapq.heapify(self._heap)
+        self._obsoletas = 0
+
+    def percorrer(self, limite=None):
+        """
+        Gera (prioridade, slot) em ordem crescente visitando a árvore do
+        heap pelo menor: um nó só entra na fronteira quando o pai sai, e um
+        nó acima de `limite` corta toda a subárvore. Empates saem na ordem
+        atual das linhas, como numa ordenação estável do estoque.
+        """
+        heap = self._heap
+        if not heap:
+            return
+        prioridade_atual = self._prioridade
+        linha_do_slot = self._loja._linha_do_slot
+        chave_limite = None if limite is None else (limite + 1) << _BITS_SLOT
+
+        fronteira = [(heap[0], 0)] if chave_limite is None or heap[0] < chave_limite else []
+        vistos = set()
+        grupo = []
+        grupo_prioridade = None
+        while fronteira:
+            chave, indice = heapq.heappop(fronteira)
+            for filho in (2 * indice + 1, 2 * indice + 2):
+                if filho < len(heap) and (chave_limite is None or heap[filho] < chave_limite):
+                    heapq.heappush(fronteira, (heap[filho], filho))
+
+            prioridade, slot = chave >> _BITS_SLOT, chave & _MASCARA_SLOT
+            # Entradas obsoletas e repetidas são ignoradas
+            if prioridade_atual(slot) != prioridade or slot in vistos:
+                continue
+            vistos.add(slot)
+
+            if prioridade != grupo_prioridade:
+                grupo.sort(key=linha_do_slot.__getitem__)
+                for slot_grupo in grupo:
+                    yield grupo_prioridade, slot_grupo
+                grupo = []
+                grupo_prioridade = prioridade
+            grupo.append(slot)
+
+        grupo.sort(key=linha_do_slot.__getitem__)
+        for slot_grupo in grupo:
+            yield grupo_prioridade, slot_grupo
+
+    def memoria_bytes(self):
+        return sys.getsizeof(self._heap) + sum(map(sys.getsizeof, self._heap))
+
+
+class _Grupo:
+    """Slots e totais de uma categoria ou localização."""
+    __slots__ = ('slots', 'criticos', 'valor_estoque', 'custo_deficit')
+
+    def __init__(self):
+        self.slots = set()
+        self.criticos = set()
+        self.valor_estoque = 0.0
+        self.custo_deficit = 0.0
+
+
+class _IndiceGrupo:
+    """
+    Agrupa os slots de um ItemStore pelo valor de uma coluna de strings
+    (categoria ou localização) e mantém por grupo o número de itens, o
+    valor em estoque (soma de quantidade * preço), o custo do déficit
+    (soma de (ideal - quantidade) * preço dos itens abaixo do ideal) e os
+    itens críticos. Uma escrita retira a contribuição do item com os
+    valores antigos e soma a nova: O(1) por escrita.
+    """
+
+    def __init__(self, loja, coluna):
+        self._loja = loja
+        self._coluna = coluna
+        self._grupos = {}
+
+    def adicionar(self, slot):
+        loja = self._loja
+        linha = loja._linha_do_slot[slot]
+        chave = getattr(loja, self._coluna)[linha]
+        grupo = self._grupos.get(chave)
+        if grupo is None:
+            grupo = self._grupos[chave] = _Grupo()
+        atual, ideal, preco = loja.quantidades[linha], loja.ideais[linha], loja.precos[linha]
+        grupo.slots.add(slot)
+        grupo.valor_estoque += atual * preco
+        if atual < ideal:
+            grupo.criticos.add(slot)
+            grupo.custo_deficit += (ideal - atual) * preco
+
+    def retirar(self, slot):
+        loja = self._loja
+        linha = loja._linha_do_slot[slot]
+        chave = getattr(loja, self._coluna)[linha]
+        grupo = self._grupos[chave]
+        grupo.slots.discard(slot)
+        if not grupo.slots:
+            # Grupo vazio sai do índice (e leva junto o resíduo das somas em float)
+            del self._grupos[chave]
+            return
+        atual, ideal, preco = loja.quantidades[linha], loja.ideais[linha], loja.precos[linha]
+        grupo.valor_estoque -= atual * preco
+        if atual < ideal:
+            grupo.criticos.discard(slot)
+            grupo.custo_deficit -= (ideal - atual) * preco
+
+    def reconstruir(self):
+        """Recalcula todos os grupos varrendo as colunas. Complexidade: O(n)"""
+        self._grupos = {}
+        for slot in range(len(self._loja._linha_do_slot)):
+            self.adicionar(slot)
+
+    def resumo(self, chave):
+        grupo = self._grupos.get(chave)
+        if grupo is None:
+            return None
+        return {
+            'itens': len(grupo.slots),
+            'valor_estoque': grupo.valor_estoque,
+            'custo_deficit': grupo.custo_deficit,
+            'itens_criticos': len(grupo.criticos),
+        }
+
+    def resumos(self):
+        return {chave: self.resumo(chave) for chave in self._grupos}
+
+    def slots(self, chave):
+        grupo = self._grupos.get(chave)
+        return grupo.slots if grupo is not None else set()
+
+    def criticos(self, chave):
+        grupo = self._grupos.get(chave)
+        return grupo.criticos if grupo is not None else set()
+
+    def memoria_bytes(self):
+        total = sys.getsizeof(self._grupos)
+        for grupo in self._grupos.values():
+            total += sys.getsizeof(grupo) + sys.getsizeof(grupo.slots) + sys.getsizeof(grupo.criticos)
+        return total
+
+
+class ItemView(MutableMapping):
+    """
+    Visão de um item do ItemStore com a interface de dict
+    (item['quantity'], item.get(...), dict(item), ...). Leituras e escritas
+    vão direto para as colunas. Cada item tem uma única visão, então a
+    igualdade é por identidade, como entre os dicts do estoque antigo.
+    """
+    __slots__ = ('_loja', '_slot')
+
+    def __init__(self, loja, slot):
+        self._loja = loja
+        self._slot = slot
+
+    def __getitem__(self, chave):
+        return self._loja._ler(self._slot, chave)
+
+    def __setitem__(self, chave, valor):
+        self._loja._escrever(self._slot, chave, valor)
+
+    def __delitem__(self, chave):
+        extras = self._loja._extras.get(self._slot)
+        if chave in _COLUNAS or extras is None or chave not in extras:
+            raise KeyError(chave)
+        del extras[chave]
+
+    def __iter__(self):
+        return iter(self._loja._chaves(self._slot))
+
+    def __len__(self):
+        return len(self._loja._chaves(self._slot))
+
+    __eq__ = object.__eq__
+    __hash__ = object.__hash__
+
+    def __repr__(self):
+        return f"ItemView({dict(self)!r})"
@@ -0,0 +1,214 @@
+import bisect
+
+
+def reduzir_instancia(itens, capacidade):
+    """
+    Etapa de redução aplicada aos itens críticos antes dos solvers de PD.
+    Todas as regras preservam o benefício ótimo:
+
+    1. Descarta itens cujo custo excede o orçamento.
+    2. Fixa itens presentes em todo plano ótimo: se o limite de Dantzig do
+       problema sem o item i fica abaixo de uma solução viável (gulosa),
+       nenhum plano sem i pode ser ótimo. O orçamento cai pelo custo deles.
+    3. Remove itens dominados (custo >= e benefício <= de outro item) quando
+       há pelo menos K dominantes, K = maior nº de itens que cabe no
+       orçamento: qualquer plano com o item dominado deixa um dominante de
+       fora, e trocá-los não piora o plano.
+    4. Agrupa itens de mesmo custo e benefício em um grupo com multiplicidade,
+       resolvido como mochila limitada por divisão binária (lotes 1, 2, 4, ...).
+
+    Não se aplica com itens de custo 0, que o caso base dp[i][0] = 0 da PD
+    trata de forma diferente de uma mochila comum.
+
+    Returns:
+        dict com 'itens' (lotes para os solvers), 'capacidade' residual,
+        'fixos' (itens sempre reabastecidos) e 'estatisticas' por regra
+    """
+    estatisticas = {
+        'itens_originais': len(itens),
+        'removidos_custo': 0,
+        'fixados': 0,
+        'removidos_dominancia': 0,
+        'agrupados': 0,
+        'itens_resolvidos': len(itens),
+        'capacidade_original': capacidade,
+        'capacidade_residual': capacidade,
+    }
+
+    if not itens or min(item['custo'] for item in itens) == 0:
+        estatisticas['aplicada'] = False
+        return {
+            'itens': [_lote([item]) for item in itens],
+            'capacidade': capacidade,
+            'fixos': [],
+            'estatisticas': estatisticas
+        }
+
+    # Regra 1: custo acima do orçamento
+    cabem = [item for item in itens if item['custo'] <= capacidade]
+    estatisticas['removidos_custo'] = len(itens) - len(cabem)
+
+    # Regra 2: itens presentes em todo ótimo
+    fixos = _itens_sempre_escolhidos(cabem, capacidade)
+    if fixos:
+        capacidade -= sum(item['custo'] for item in fixos)
+        ids_fixos = {id(item) for item in fixos}
+        cabem = [
+            item for item in cabem
+            if id(item) not in ids_fixos and item['custo'] <= capacidade
+        ]
+    estatisticas['fixados'] = len(fixos)
+
+    # Regra 3: dominância com pelo menos K dominantes
+    restantes = _remover_dominados(cabem, capacidade)
+    estatisticas['removidos_dominancia'] = len(cabem) - len(restantes)
+
+    # Regra 4: itens equivalentes viram lotes de um grupo
+    grupos = {}
+    for item in restantes:
+        grupos.setdefault((item['custo'], item['beneficio']), []).append(item)
+
+    lotes = []
+    for membros in grupos.values():
+        lotes.extend(_dividir_em_lotes(membros))
+
+    estatisticas['agrupados'] = len(restantes) - len(grupos)
+    estatisticas['itens_resolvidos'] = len(lotes)
+    estatisticas['capacidade_residual'] = capacidade
+    estatisticas['aplicada'] = True
+
+    return {
+        'itens': lotes,
+        'capacidade': capacidade,
+        'fixos': fixos,
+        'estatisticas': estatisticas
+    }
+
+
+def expandir_selecao(reducao, lotes_selecionados, ordem_original):
+    """
+    Converte os lotes escolhidos pelo solver de volta nos itens críticos
+    (mais os itens fixados), na ordem de `ordem_original`.
+    """
+    selecionados = list(reducao['fixos'])
+    usados = {}
+    for lote in lotes_selecionados:
+        membros = lote['membros']
+        inicio = usados.get(id(membros), 0)
+        selecionados.extend(membros[inicio:inicio + lote['quantidade']])
+        usados[id(membros)] = inicio + lote['quantidade']
+
+    posicoes = {id(item): i for i, item in enumerate(ordem_original)}
+    selecionados.sort(key=lambda item: posicoes[id(item)])
+    return selecionados
+
+
+def _lote(membros, quantidade=1):
+    """Lote de `quantidade` cópias de um grupo de itens equivalentes."""
+    return {
+        'custo': membros[0]['custo'] * quantidade,
+        'beneficio': membros[0]['beneficio'] * quantidade,
+        'quantidade': quantidade,
+        'membros': membros
+    }
+
+
+def dividir_binario(total):
+    """
+    Divisão binária de `total` unidades em lotes 1, 2, 4, ..., resto: toda
+    quantidade de 0 a `total` é a soma de um subconjunto dos lotes, com
+    O(log total) lotes.
+    """
+    lotes = []
+    tamanho = 1
+    while total > 0:
+        quantidade = min(tamanho, total)
+        lotes.append(quantidade)
+        total -= quantidade
+        tamanho *= 2
+    return lotes
+
+
+def _dividir_em_lotes(membros):
+    """Lotes binários de um grupo de itens equivalentes."""
+    return [_lote(membros, quantidade) for quantidade in dividir_binario(len(membros))]
+
+
+def _itens_sempre_escolhidos(itens, capacidade):
+    """
+    Itens i com floor(UB sem i) < LB, onde UB é o limite de Dantzig e LB o
+    valor da solução gulosa. Complexidade: O(n log n)
+    """
+    ordem = sorted(itens, key=lambda item: item['beneficio'] / item['custo'], reverse=True)
+    custo_acumulado = [0]
+    beneficio_acumulado = [0]
+    for item in ordem:
+        custo_acumulado.append(custo_acumulado[-1] + item['custo'])
+        beneficio_acumulado.append(beneficio_acumulado[-1] + item['beneficio'])
+
+    # Solução viável gulosa (pulando os que não cabem) como limite inferior
+    limite_inferior = 0
+    restante = capacidade
+    for item in ordem:
+        if item['custo'] <= restante:
+            restante -= item['custo']
+            limite_inferior += item['beneficio']
+
+    # Itens fora do prefixo guloso não alteram o limite de Dantzig ao sair
+    critico = bisect.bisect_right(custo_acumulado, capacidade) - 1
+
+    fixos = []
+    for posicao in range(critico):
+        custo_item = ordem[posicao]['custo']
+        beneficio_item = ordem[posicao]['beneficio']
+
+        # Sem o item, o prefixo inteiro vai até j e o item j entra fracionado
+        j = bisect.bisect_right(custo_acumulado, capacidade + custo_item) - 1
+        limite = beneficio_acumulado[j] - beneficio_item
+        if j < len(ordem):
+            sobra = capacidade - (custo_acumulado[j] - custo_item)
+            limite += ordem[j]['beneficio'] * sobra / ordem[j]['custo']
+
+        if int(limite) < limite_inferior:
+            fixos.append(ordem[posicao])
+    return fixos
+
+
+def _remover_dominados(itens, capacidade):
+    """
+    Remove itens com pelo menos K dominantes (custo <= e benefício >=, sem
+    ser idêntico), K = maior cardinalidade de um plano viável.
+    """
+    # K: quantos itens cabem escolhendo sempre os mais baratos
+    maximo_itens = 0
+    gasto = 0
+    for custo in sorted(item['custo'] for item in itens):
+        if gasto + custo > capacidade:
+            break
+        gasto += custo
+        maximo_itens += 1
+
+    if maximo_itens == 0:
+        return list(itens)
+
+    # Percorre por custo crescente (benefício decrescente no empate): todo
+    # item já visitado com benefício >= domina os da chave atual
+    ordem = sorted(itens, key=lambda item: (item['custo'], -item['beneficio']))
+    beneficios_vistos = []
+    removidos = set()
+    inicio = 0
+    while inicio < len(ordem):
+        chave = (ordem[inicio]['custo'], ordem[inicio]['beneficio'])
+        fim = inicio
+        while fim < len(ordem) and (ordem[fim]['custo'], ordem[fim]['beneficio']) == chave:
+            fim += 1
+
+        dominantes = len(beneficios_vistos) - bisect.bisect_left(beneficios_vistos, chave[1])
+        if dominantes >= maximo_itens:
+            removidos.update(id(item) for item in ordem[inicio:fim])
+
+        for item in ordem[inicio:fim]:
+            bisect.insort(beneficios_vistos, item['beneficio'])
+        inicio = fim
+
+    return [item for item in itens if id(item) not in removidos]
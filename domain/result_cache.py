@@ -0,0 +1,52 @@
+from collections import OrderedDict
+
+
+class ResultCache:
+    """
+    Cache LRU de resultados de otimização com memória limitada.
+
+    As chaves incluem a versão do estoque, então um resultado calculado antes
+    de uma mutação nunca é servido depois dela.
+    """
+
+    def __init__(self, capacidade=128):
+        self.capacidade = capacidade
+        self._entradas = OrderedDict()
+        self.acertos = 0
+        self.falhas = 0
+        self.remocoes = 0
+
+    def __len__(self):
+        return len(self._entradas)
+
+    def obter(self, chave):
+        """Retorna o valor em cache (marcando-o como o mais recente) ou None."""
+        if chave in self._entradas:
+            self._entradas.move_to_end(chave)
+            self.acertos += 1
+            return self._entradas[chave]
+        self.falhas += 1
+        return None
+
+    def guardar(self, chave, valor):
+        """Guarda o valor e remove os menos usados recentemente acima da capacidade."""
+        self._entradas[chave] = valor
+        self._entradas.move_to_end(chave)
+        while len(self._entradas) > self.capacidade:
+            self._entradas.popitem(last=False)
+            self.remocoes += 1
+
+    def invalidar(self):
+        """Descarta todas as entradas (chamado a cada mutação do estoque)."""
+        self._entradas.clear()
+
+    def estatisticas(self):
+        consultas = self.acertos + self.falhas
+        return {
+            'entradas': len(self._entradas),
+            'capacidade': self.capacidade,
+            'acertos': self.acertos,
+            'falhas': self.falhas,
+            'remocoes': self.remocoes,
+            'taxa_acerto': self.acertos / consultas if consultas else 0.0
+        }
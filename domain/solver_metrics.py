@@ -0,0 +1,130 @@
+import contextlib
+import time
+import tracemalloc
+
+# Prefixo das métricas no formato de texto do Prometheus
+_PREFIXO = 'estoque_solver'
+
+_DESCRICOES = {
+    'segundos_total': "Tempo total da otimização instrumentada",
+    'fase_segundos': "Tempo de cada fase da otimização",
+    'fase_pico_memoria_bytes': "Pico de memória alocada (tracemalloc) em cada fase",
+}
+
+
+class MemoInstrumentado(dict):
+    """
+    Memo do solver top-down que conta consultas: cada `estado in memo`
+    encontrado é um acerto, cada um não encontrado uma falha. Só é usado
+    com a instrumentação ligada; sem ela o memo é um dict comum.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.acertos = 0
+        self.falhas = 0
+
+    def __contains__(self, chave):
+        if dict.__contains__(self, chave):
+            self.acertos += 1
+            return True
+        self.falhas += 1
+        return False
+
+
+class MetricasSolver:
+    """
+    Métricas de uma otimização instrumentada: contadores (chamadas
+    recursivas, células avaliadas, acertos e falhas do memo, estados
+    armazenados, ...) e tempo e pico de memória de cada fase (extração dos
+    itens críticos, resolução, reconstrução).
+
+    O pico de memória de uma fase vem do tracemalloc, ligado só durante a
+    fase; se outro código já está rastreando (um benchmark, por exemplo),
+    ele não é reiniciado e o pico da fase fica None.
+    """
+
+    def __init__(self, metodo, medir_memoria=True):
+        self.metodo = metodo
+        self.medir_memoria = medir_memoria
+        self.contadores = {}
+        self.fases = {}
+        self.segundos_total = 0.0
+
+    def contar(self, nome, valor=1):
+        """Soma `valor` ao contador `nome`."""
+        self.contadores[nome] = self.contadores.get(nome, 0) + valor
+
+    @contextlib.contextmanager
+    def fase(self, nome):
+        """Mede o bloco como a fase `nome` (fases repetidas acumulam o tempo)."""
+        rastrear = self.medir_memoria and not tracemalloc.is_tracing()
+        if rastrear:
+            tracemalloc.start()
+        inicio = time.perf_counter()
+        try:
+            yield
+        finally:
+            segundos = time.perf_counter() - inicio
+            pico = None
+            if rastrear:
+                pico = tracemalloc.get_traced_memory()[1]
+                tracemalloc.stop()
+
+            fase = self.fases.setdefault(nome, {'segundos': 0.0, 'pico_memoria_bytes': None})
+            fase['segundos'] += segundos
+            if pico is not None:
+                fase['pico_memoria_bytes'] = max(fase['pico_memoria_bytes'] or 0, pico)
+
+    def como_dict(self):
+        """Métricas como dict serializável em JSON (a chave 'metricas' do resultado)."""
+        return {
+            'metodo': self.metodo,
+            'segundos_total': self.segundos_total,
+            'contadores': dict(self.contadores),
+            'fases': {nome: dict(fase) for nome, fase in self.fases.items()}
+        }
+
+
+def _escapar(valor):
+    return str(valor).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _rotulos(rotulos):
+    return '{' + ','.join(f'{nome}="{_escapar(valor)}"' for nome, valor in rotulos.items()) + '}'
+
+
+def exportar_prometheus(metricas, rotulos=None):
+    """
+    Texto no formato de exposição do Prometheus para `metricas` (o dict de
+    MetricasSolver.como_dict, como em resultado['metricas']). Cada série
+    leva o rótulo metodo, mais os `rotulos` extras dados; as fases viram o
+    rótulo fase. Todas são gauges: valores de uma única otimização.
+    """
+    base = {'metodo': metricas['metodo']}
+    base.update(rotulos or {})
+    linhas = []
+
+    def serie(nome, descricao, amostras):
+        completo = f'{_PREFIXO}_{nome}'
+        linhas.append(f'# HELP {completo} {descricao}')
+        linhas.append(f'# TYPE {completo} gauge')
+        for rotulos_amostra, valor in amostras:
+            linhas.append(f'{completo}{_rotulos(rotulos_amostra)} {valor}')
+
+    serie('segundos_total', _DESCRICOES['segundos_total'], [(base, metricas['segundos_total'])])
+    for contador, valor in sorted(metricas['contadores'].items()):
+        serie(contador, f"Contador '{contador}' do solver", [(base, valor)])
+
+    fases = sorted(metricas['fases'].items())
+    serie('fase_segundos', _DESCRICOES['fase_segundos'], [
+        (dict(base, fase=nome), fase['segundos']) for nome, fase in fases
+    ])
+    picos = [
+        (dict(base, fase=nome), fase['pico_memoria_bytes'])
+        for nome, fase in fases if fase['pico_memoria_bytes'] is not None
+    ]
+    if picos:
+        serie('fase_pico_memoria_bytes', _DESCRICOES['fase_pico_memoria_bytes'], picos)
+
+    return '\n'.join(linhas) + '\n'
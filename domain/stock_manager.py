@@ -1,17 +1,225 @@
+import bisect
+import contextlib
+import copy
+import itertools
+import math
+import operator
+import os
+import sys
+import time
+from array import array
+from datetime import date
+
+from domain.inventory_loader import carregar_estoque
+from domain.inventory_sort import CHAVE_COMPOSTA, chaves_do_estoque, ordenar_chaves, ordenar_externo
+from domain.item_store import ItemStore
+from domain.restock_reduction import dividir_binario, expandir_selecao, reduzir_instancia
+from domain.result_cache import ResultCache
+from domain.solver_metrics import MemoInstrumentado, MetricasSolver
+
+# Solvers sem o caso base dp[i][0] = 0 da PD por custo: com itens de custo 0,
+# o ótimo deles pode diferir do _pd_iterativo
+_METODOS_SEM_CASO_BASE = ('dual', 'branch_and_bound')
+
+# Métodos aceitos por otimizar_reabastecimento
+_METODOS = (
+    'recursivo', 'memoization', 'memoization_pilha', 'iterativo', 'vetorizado', 'esparso',
+    'dual', 'branch_and_bound', 'aproximado', 'auto', 'incremental'
+)
+
+# Acima deste número de estados (n+1) * (W+1) o memo da versão com pilha é esparso
+_LIMITE_MEMO_DENSO = 5_000_000
+
+# Tempo médio medido por operação elementar de cada solver (chamada, estado ou célula)
+SEGUNDOS_POR_OPERACAO = {
+    'recursivo': 5e-7,
+    'memoization': 1.6e-6,
+    'memoization_pilha': 1.5e-6,
+    'iterativo': 4.2e-7,
+    'vetorizado': 1e-7,
+    'esparso': 9e-7,
+    'dual': 1.4e-7,
+    'branch_and_bound': 1.3e-6,
+}
+
+# Folga de quadros na pilha de chamadas exigida pelos solvers recursivos
+MARGEM_RECURSAO = 100
+
+# Limites padrão do branch and bound: nós explorados e tempo (segundos)
+LIMITE_NOS_BB = 1_000_000
+_LIMITE_TEMPO_BB = 10.0
+
+# Erro relativo padrão do método aproximado (FPTAS)
+EPSILON_PADRAO = 0.01
+
+# Tempo estimado máximo (segundos) para um método rodar em comparar_metodos_pd
+_LIMITE_TEMPO_COMPARACAO = 10.0
+
+# Fase sem instrumentação: não mede nada
+_SEM_METRICAS = contextlib.nullcontext()
+
+# Converte bytes 0/1 em dígitos '0'/'1' para empacotar decisões em um inteiro
+_TABELA_BITS = bytes.maketrans(b'\x00\x01', b'01')
+# Conversão inversa: dígitos '0'/'1' de bin() para bytes 0/1
+_TABELA_DIGITOS = bytes.maketrans(b'01', b'\x00\x01')
+
+
+def _atualizar_linha(linha, custo_item, beneficio_item, capacidade):
+    """
+    Aplica um item à linha dp[i-1][0..capacidade], transformando-a (no lugar)
+    em dp[i][0..capacidade] com operações sobre a linha inteira.
+    Retorna o mapa de decisões do item (bit w = incluir é estritamente melhor).
+    Complexidade: O(capacidade)
+    """
+    tamanho = (capacidade >> 3) + 1
+
+    # dp[i][0] = 0 sempre (caso base), então a atualização começa em w = 1
+    inicio = max(custo_item, 1)
+
+    # Item não cabe em nenhuma capacidade: linha inalterada, nenhum bit ligado
+    if inicio > capacidade:
+        return bytes(tamanho)
+
+    # Para w >= inicio: incluir = dp[i-1][w - custo] + beneficio
+    nao_incluir = linha[inicio:]
+    incluir = [valor + beneficio_item for valor in linha[inicio - custo_item:capacidade + 1 - custo_item]]
+
+    # Bit w ligado quando incluir o item é estritamente melhor
+    bits = bytes(map(operator.gt, incluir, nao_incluir)).translate(_TABELA_BITS)
+    linha[inicio:] = [a if a > b else b for a, b in zip(incluir, nao_incluir)]
+
+    return (int(bits[::-1], 2) << inicio).to_bytes(tamanho, 'little')
+
+
+def _atualizar_linha_dual(linha, custo_item, lucro_item, maximo):
+    """
+    Aplica um item à linha dual custo_min[0..maximo] (menor custo para
+    atingir cada benefício), no lugar. Retorna o mapa de decisões do item
+    (bit q = incluir atinge q com custo estritamente menor).
+    Complexidade: O(maximo)
+    """
+    tamanho = (maximo >> 3) + 1
+    if lucro_item == 0 or lucro_item > maximo:
+        return bytes(tamanho)
+
+    nao_incluir = linha[lucro_item:]
+    incluir = [valor + custo_item for valor in linha[:maximo + 1 - lucro_item]]
+
+    bits = bytes(map(operator.lt, incluir, nao_incluir)).translate(_TABELA_BITS)
+    linha[lucro_item:] = [a if a < b else b for a, b in zip(incluir, nao_incluir)]
+
+    return (int(bits[::-1], 2) << lucro_item).to_bytes(tamanho, 'little')
+
+
+def _bitset_alcancaveis(custos, capacidade):
+    """
+    Passo de soma de subconjuntos em um inteiro usado como conjunto de bits:
+    o bit s está ligado se algum subconjunto dos custos soma exatamente s <= capacidade.
+    Complexidade: O(n * capacidade / 64)
+    """
+    mascara = (1 << (capacidade + 1)) - 1
+    bits = 1
+    for custo in custos:
+        if custo <= capacidade:
+            bits |= (bits << custo) & mascara
+    return bits
+
+
+def _somas_alcancaveis(custos, capacidade):
+    """Lista ordenada dos gastos exatos alcançáveis até `capacidade`."""
+    digitos = bin(_bitset_alcancaveis(custos, capacidade))[:1:-1].encode().translate(_TABELA_DIGITOS)
+    return list(itertools.compress(range(len(digitos)), digitos))
+
+
+def _reduzir_capacidade(custos, capacidade):
+    """
+    Reduz a dimensão de orçamento sem mudar o ótimo: divide custos e
+    orçamento pelo MDC dos custos e limita a capacidade ao maior gasto
+    alcançável (dp[n][w] só muda em somas de subconjuntos). Só é exato sem
+    itens de custo 0, que o caso base dp[i][0] = 0 trata de forma diferente.
+
+    Returns:
+        (mdc dos custos, passo aplicado, capacidade reduzida, nº de gastos alcançáveis)
+    """
+    mdc = math.gcd(*custos)
+    if min(custos) == 0:
+        return mdc, 1, capacidade, capacidade + 1
+
+    passo = mdc if mdc > 1 else 1
+    bits = _bitset_alcancaveis([custo // passo for custo in custos], capacidade // passo)
+    return mdc, passo, bits.bit_length() - 1, bits.bit_count()
+
+
+def _ordinal_data(dia):
+    """Ordinal de uma data (date, 'YYYY-MM-DD' ou None = hoje)."""
+    if dia is None:
+        dia = date.today()
+    elif isinstance(dia, str):
+        dia = date.fromisoformat(dia)
+    return dia.toordinal()
+
+
 class StockManager: 
-    def __init__(self, lista_de_itens):
+    def __init__(self, lista_de_itens, usar_cache=True, tamanho_cache=128, ao_carregar_lote=None,
+                 persistencia=None):
+        """
+        `lista_de_itens` é um iterável de dicts ou o caminho de um arquivo
+        (array JSON, NDJSON ou arrays em partes), lido em fluxo por
+        inventory_loader.carregar_estoque; nesse caso `estatisticas_carga`
+        guarda a vazão e o pico de memória da carga e `ao_carregar_lote`
+        recebe o total carregado após cada lote.
+
+        Com `persistencia` (inventory_snapshot.EstoquePersistente), o
+        estoque vem do snapshot mais o journal, e `lista_de_itens` só é
+        lida na primeira vez; adições e mudanças de quantidade passam a ser
+        gravadas no journal.
+        """
         print("Inicializando o Gerenciador de Estoque...")
         
-        self.estoque = []
-        self.nomes_itens = []
-        # Carrega os itens do estoque sem ordenar
-        for item in lista_de_itens:
-            self.estoque.append(item)
-            self.nomes_itens.append(item['itemName'])
+        # Estoque em colunas; iterar ou indexar devolve visões com interface de dict
+        self.estoque = ItemStore()
+        # Mutações feitas pelo gerenciador (somadas às do ItemStore em `versao`)
+        self._mutacoes = 0
+        self._cache = ResultCache(tamanho_cache) if usar_cache else None
+        # Contador de chamadas dos solvers top-down (recursivo e memoization)
+        self._chamadas_pd = 0
+        # Métricas da otimização instrumentada em andamento (None: instrumentação desligada)
+        self._metricas = None
+        # Estado de PD mantido a cada mutação (ver manter_estado_incremental)
+        self._estado_incremental = None
+        # Carrega os itens do estoque sem ordenar; os índices são montados no primeiro uso
+        self.estatisticas_carga = None
+        self._persistencia = persistencia
+        if persistencia is not None:
+            self.estatisticas_carga = persistencia.abrir(self.estoque, lista_de_itens)
+        elif isinstance(lista_de_itens, (str, os.PathLike)):
+            self.estatisticas_carga = carregar_estoque(
+                lista_de_itens, self.estoque, ao_carregar_lote=ao_carregar_lote
+            )
+        else:
+            self.estoque.extend(lista_de_itens, adiar_indices=True)
 
         print("Estoque carregado com sucesso.")
 
-    def otimizar_reabastecimento(self, orcamento, metodo='recursivo'):
+    @property
+    def versao(self):
+        """
+        Versão do estoque, parte da chave do cache: muda a cada mutação pelo
+        gerenciador (inclusive ordenações) e a cada escrita direta nas
+        visões do estoque (ItemStore.mutacoes).
+        """
+        return self._mutacoes + self.estoque.mutacoes
+
+    @property
+    def nomes_itens(self):
+        """Coluna de nomes do estoque, na ordem atual (somente leitura)."""
+        return self.estoque.nomes
+
+    def otimizar_reabastecimento(self, orcamento, metodo='recursivo',
+                                 limite_nos=LIMITE_NOS_BB, limite_tempo=_LIMITE_TEMPO_BB,
+                                 epsilon=EPSILON_PADRAO, precisao='reais',
+                                 preprocessar=True, modo='inteiro',
+                                 categoria=None, local=None, instrumentar=False):
         """
         Otimiza o reabastecimento do estoque usando métodos de  Programação Dinâmica.
         
@@ -33,104 +241,760 @@ class StockManager:
         
         Args:
             orcamento: Orçamento disponível para reabastecimento (em reais)
-            metodo: 'recursivo', 'memoization' ou 'iterativo'
+            metodo: 'recursivo', 'memoization', 'memoization_pilha', 'iterativo',
+                'vetorizado', 'auto' (o planejador escolhe o solver mais barato)
+                'incremental' (estado persistente, ver manter_estado_incremental)
+                'branch_and_bound' (independente do orçamento), 'dual' (PD
+                indexada por benefício, para orçamentos grandes) ou 'aproximado'
+                (FPTAS: benefício >= (1 - epsilon) * ótimo)
+            limite_nos: máximo de nós explorados pelo branch and bound
+            limite_tempo: tempo máximo (segundos) do branch and bound
+            epsilon: erro relativo máximo aceito pelo método aproximado
+            precisao: 'reais' (custos e orçamento truncados para reais inteiros)
+                ou 'centavos' (exato, com a capacidade reduzida pelo MDC dos
+                custos e pelos gastos alcançáveis)
+            preprocessar: aplica a redução por dominância e equivalência
+                (ver restock_reduction.reduzir_instancia) antes do solver;
+                o benefício ótimo é o mesmo da instância completa
+            modo: 'inteiro' (cada item reabastece todo o déficit ou nada) ou
+                'parcial' (qualquer quantidade de 0 ao déficit; cada déficit
+                vira lotes binários 1, 2, 4, ... resolvidos como itens 0/1,
+                em O(n * W * log(déficit))). Em reais o custo de cada lote
+                é arredondado para cima, então o plano nunca passa do
+                orçamento ('custo_total' soma os lotes arredondados; em
+                centavos é exato)
+            categoria, local: restringem a otimização aos itens críticos da
+                categoria e/ou localização dadas, lidos do índice de grupos
+                do estoque (sem montar a lista completa)
+            instrumentar: resolve sem consultar o cache e anexa ao resultado,
+                em 'metricas', os contadores do solver e o tempo e o pico de
+                memória de cada fase (ver _otimizar_instrumentado); desligado,
+                os solvers não contam nada além do que já contam
         
         Returns:
-            dict com benefício máximo, itens selecionados e custos
+            dict com benefício máximo, itens selecionados e custos; cada item
+            selecionado traz a 'quantidade' a comprar
+
+        Resultados ficam em cache por (versão do estoque, orçamento, método,
+        parâmetros);
+        qualquer mutação via `adicionar_item`, `atualizar_quantidade`,
+        ordenação ou escrita direta em um item muda a versão, e o cache não
+        serve mais os resultados anteriores. Cada chamada recebe uma cópia
+        do resultado guardado.
         """
-        # Identifica itens que precisam de reabastecimento
-        itens_criticos = []
-        for item in self.estoque:
-            if item['quantity'] < item['ideal_quantity']:
-                deficit = item['ideal_quantity'] - item['quantity']
-                custo = deficit * item['unity_price']
-                
-                # Benefício considera o deficit e a criticidade (% abaixo do ideal)
-                criticidade = 1 - (item['quantity'] / item['ideal_quantity'])
-                beneficio = int(deficit * item['unity_price'] * (1 + criticidade) * 10)
-                
-                itens_criticos.append({
-                    'item': item,
-                    'deficit': deficit,
-                    'custo': int(custo),
-                    'beneficio': beneficio
-                })
-        
+        parametros = self.parametros_otimizacao(
+            limite_nos, limite_tempo, epsilon, precisao, preprocessar, modo, categoria, local
+        )
+        if instrumentar:
+            return self._otimizar_instrumentado(orcamento, metodo, parametros)
+        if self._cache is None:
+            return self._otimizar_reabastecimento(orcamento, metodo, parametros)
+
+        chave = (self.versao, orcamento, metodo, tuple(sorted(parametros.items())))
+        resultado = self._cache.obter(chave)
+        if resultado is None:
+            resultado = self._otimizar_reabastecimento(orcamento, metodo, parametros)
+            self._cache.guardar(chave, resultado)
+        return self._copiar_resultado(resultado)
+
+    @staticmethod
+    def _copiar_resultado(resultado):
+        """
+        Cópia profunda de um resultado, para que o chamador não altere a
+        entrada do cache; os itens do estoque ('item' de cada selecionado)
+        não são copiados, continuam sendo as visões do estoque.
+        """
+        memo = {id(item['item']): item['item'] for item in resultado['itens_selecionados']}
+        return copy.deepcopy(resultado, memo)
+
+    @staticmethod
+    def parametros_otimizacao(limite_nos=LIMITE_NOS_BB, limite_tempo=_LIMITE_TEMPO_BB,
+                              epsilon=EPSILON_PADRAO, precisao='reais', preprocessar=True,
+                              modo='inteiro', categoria=None, local=None):
+        """Parâmetros de otimizar_reabastecimento, com os padrões, como um dict."""
+        return {
+            'limite_nos': limite_nos,
+            'limite_tempo': limite_tempo,
+            'epsilon': epsilon,
+            'precisao': precisao,
+            'preprocessar': preprocessar,
+            'modo': modo,
+            'categoria': categoria,
+            'local': local
+        }
+
+    def _otimizar_instrumentado(self, orcamento, metodo, parametros):
+        """
+        Executa a otimização com as métricas ligadas: as fases 'extracao'
+        (itens críticos), 'preprocessamento', 'planejamento' (método
+        'auto'), 'resolucao' e 'reconstrucao' são medidas com perf_counter
+        e tracemalloc, e os solvers de PD registram chamadas
+        recursivas, células avaliadas, acertos e falhas do memo e estados
+        armazenados. O resultado traz as métricas em 'metricas' (ver
+        solver_metrics.exportar_prometheus) e não entra no cache.
+        """
+        metricas = MetricasSolver(metodo)
+        self._metricas = metricas
+        inicio = time.perf_counter()
+        try:
+            resultado = self._otimizar_reabastecimento(orcamento, metodo, parametros)
+        finally:
+            self._metricas = None
+        metricas.segundos_total = time.perf_counter() - inicio
+        resultado['metricas'] = metricas.como_dict()
+        return resultado
+
+    def _fase(self, nome):
+        """Contexto que mede a fase `nome` quando a otimização é instrumentada."""
+        return _SEM_METRICAS if self._metricas is None else self._metricas.fase(nome)
+
+    def _otimizar_reabastecimento(self, orcamento, metodo, parametros):
+        """Executa a otimização sem consultar o cache."""
+        with self._fase('extracao'):
+            itens_criticos, total_criticos, estatisticas = self._preparar_instancia(metodo, parametros)
+        if self._metricas is not None:
+            self._metricas.contar('itens_criticos', total_criticos)
         if not itens_criticos:
             return {
                 'beneficio_maximo': 0,
                 'itens_selecionados': [],
                 'custo_total': 0,
                 'orcamento': orcamento,
-                'metodo': metodo
+                'metodo': metodo,
+                'estatisticas': {}
             }
+
+        beneficio_max, itens_selecionados = self._resolver_instancia(
+            itens_criticos, orcamento, metodo, parametros, estatisticas
+        )
+        return self._finalizar_otimizacao(
+            beneficio_max, itens_selecionados, orcamento, metodo, parametros,
+            total_criticos, estatisticas
+        )
+
+    def _preparar_instancia(self, metodo, parametros):
+        """
+        Valida os parâmetros e monta os itens a resolver (lotes, no modo
+        parcial). Returns: (itens, total de itens críticos, estatísticas)
+        """
+        if metodo not in _METODOS:
+            raise ValueError(f"Método de otimização desconhecido: {metodo!r}")
+        centavos = parametros['precisao'] == 'centavos'
+        if centavos and metodo == 'incremental':
+            raise ValueError("O método incremental não suporta precisão em centavos")
+        parcial = parametros['modo'] == 'parcial'
+        if parcial and metodo == 'incremental':
+            raise ValueError("O método incremental não suporta o modo parcial")
+        filtrado = parametros['categoria'] is not None or parametros['local'] is not None
+        if filtrado and metodo == 'incremental':
+            raise ValueError("O método incremental não suporta filtro por categoria ou localização")
+
+        # Identifica itens que precisam de reabastecimento
+        itens_criticos = self._montar_itens_criticos(
+            parametros['precisao'], parametros['categoria'], parametros['local']
+        )
+
+        estatisticas = {}
+        total_criticos = len(itens_criticos)
+        if parcial and itens_criticos:
+            itens_criticos = self._dividir_em_lotes(itens_criticos, parametros['precisao'])
+            estatisticas['lotes'] = len(itens_criticos)
+        return itens_criticos, total_criticos, estatisticas
+
+    def _resolver_instancia(self, itens_criticos, orcamento, metodo, parametros, estatisticas):
+        """
+        Redução de capacidade (centavos), pré-processamento e solver sobre
+        itens que só precisam de 'custo', 'beneficio' e, em centavos,
+        'custo_centavos' (por isso também roda em um processo separado, ver
+        stock_service). Returns: (benefício máximo, itens selecionados)
+        """
+        itens_solver = itens_criticos
+        if parametros['precisao'] == 'centavos':
+            # Arredonda o orçamento para baixo: o plano nunca excede o valor real
+            orcamento_int = math.floor(round(orcamento * 100, 6))
+            custos = [item['custo_centavos'] for item in itens_criticos]
+            mdc, passo, capacidade, alcancaveis = _reduzir_capacidade(custos, orcamento_int)
+            itens_solver = [
+                dict(item, custo=custo // passo) for item, custo in zip(itens_criticos, custos)
+            ]
+            estatisticas['precisao'] = 'centavos'
+            estatisticas['capacidade_bruta'] = orcamento_int
+            estatisticas['mdc_custos'] = mdc
+            estatisticas['capacidade_comprimida'] = capacidade
+            estatisticas['gastos_alcancaveis_comprimidos'] = alcancaveis
+            orcamento_int = capacidade
+        else:
+            orcamento_int = int(orcamento)
+
+        reducao = None
+        itens_resolvidos = itens_solver
+        if parametros['preprocessar'] and metodo != 'incremental':
+            with self._fase('preprocessamento'):
+                reducao = reduzir_instancia(itens_solver, orcamento_int)
+            estatisticas['reducao'] = reducao['estatisticas']
+            itens_resolvidos = reducao['itens']
+            orcamento_int = reducao['capacidade']
         
-        orcamento_int = int(orcamento)
-        
-        # Escolhe o método de solução
-        if metodo == 'recursivo':
-            beneficio_max = self._pd_recursivo(itens_criticos, len(itens_criticos), orcamento_int)
-            itens_selecionados = self._reconstruir_solucao_recursiva(
-                itens_criticos, len(itens_criticos), orcamento_int
+        if reducao is not None and not itens_resolvidos:
+            # Tudo foi fixado ou descartado: não sobra instância para o solver
+            beneficio_max, itens_selecionados = 0, []
+        elif metodo == 'auto':
+            beneficio_max, itens_selecionados = self._resolver_automatico(
+                itens_resolvidos, orcamento_int, parametros, estatisticas
             )
-        elif metodo == 'memoization':
-            memo = {}
-            beneficio_max = self._pd_memoization(itens_criticos, len(itens_criticos), orcamento_int, memo)
-            itens_selecionados = self._reconstruir_solucao_memo(
-                itens_criticos, len(itens_criticos), orcamento_int, memo
+        elif metodo == 'incremental' and any(item['custo'] == 0 for item in itens_solver):
+            # Com itens de custo 0 o ótimo depende da ordem dos itens (caso base
+            # dp[i][0] = 0), e o estado reordena os itens alterados: resolve do zero
+            estatisticas['resolucao_completa'] = True
+            beneficio_max, itens_selecionados = self._resolver(
+                itens_solver, orcamento_int, 'iterativo', parametros, estatisticas
             )
-        else:  # iterativo (bottom-up)
-            beneficio_max, dp_table = self._pd_iterativo(itens_criticos, orcamento_int)
-            itens_selecionados = self._reconstruir_solucao_iterativa(
-                itens_criticos, dp_table, orcamento_int
+        elif metodo == 'incremental':
+            estado = self._estado_incremental
+            with self._fase('resolucao'):
+                if estado is None or estado.capacidade < orcamento_int:
+                    estado = self.manter_estado_incremental(orcamento_int)
+                elif estado.mutacoes_estoque != self.estoque.mutacoes:
+                    # Escritas diretas nas visões que o estado não acompanhou
+                    estado = self.manter_estado_incremental(estado.capacidade)
+                beneficio_max, itens_selecionados = estado.consultar(orcamento_int)
+            estatisticas['linhas_atualizadas'] = estado.linhas_atualizadas
+            estatisticas['capacidade_estado'] = estado.capacidade
+        else:
+            beneficio_max, itens_selecionados = self._resolver(
+                itens_resolvidos, orcamento_int, metodo, parametros, estatisticas
             )
+
+        if reducao is not None:
+            itens_selecionados = expandir_selecao(reducao, itens_selecionados, itens_solver)
+            beneficio_fixos = sum(item['beneficio'] for item in reducao['fixos'])
+            beneficio_max += beneficio_fixos
+            # Os limites do solver valem para a instância reduzida: somam os fixos
+            # para continuar limitando o benefício devolvido
+            for chave in ('limite_superior', 'limite_superior_otimo'):
+                if chave in estatisticas:
+                    estatisticas[chave] += beneficio_fixos
+            if 'gap' in estatisticas:
+                limite = estatisticas['limite_superior']
+                estatisticas['gap'] = (limite - beneficio_max) / limite if limite else 0.0
+
+        if itens_solver is not itens_criticos:
+            itens_selecionados = self._traduzir_selecao(itens_selecionados, itens_solver, itens_criticos)
+        return beneficio_max, itens_selecionados
+
+    def _finalizar_otimizacao(self, beneficio_max, itens_selecionados, orcamento, metodo,
+                              parametros, total_criticos, estatisticas):
+        """Junta os lotes (modo parcial) e monta o dict de resultado."""
+        if parametros['modo'] == 'parcial':
+            itens_selecionados = self._agrupar_lotes(itens_selecionados)
         
         # Calcula custo total dos itens selecionados
-        custo_total = sum(item['custo'] for item in itens_selecionados)
+        if parametros['precisao'] == 'centavos':
+            custo_total = sum(item['custo_centavos'] for item in itens_selecionados) / 100
+        else:
+            custo_total = sum(item['custo'] for item in itens_selecionados)
         
-        return {
+        resultado = {
             'beneficio_maximo': beneficio_max,
             'itens_selecionados': itens_selecionados,
             'custo_total': custo_total,
             'orcamento': orcamento,
             'orcamento_restante': orcamento - custo_total,
             'metodo': metodo,
-            'total_itens_criticos': len(itens_criticos),
-            'itens_reabastecidos': len(itens_selecionados)
+            'total_itens_criticos': total_criticos,
+            'itens_reabastecidos': len(itens_selecionados),
+            'estatisticas': estatisticas
         }
-    
+        if metodo == 'auto':
+            plano = estatisticas.get('plano')
+            resultado['metodo_escolhido'] = plano['metodo_escolhido'] if plano else None
+        return resultado
+
+    def _montar_itens_criticos(self, precisao='reais', categoria=None, local=None):
+        """
+        Monta a lista de itens abaixo do ideal com custo e benefício inteiros,
+        entrada de todos os solvers de PD. As linhas vêm do índice de itens
+        críticos mantido pelo estoque, sem varrer os demais; com `categoria`
+        ou `local`, só as do grupo.
+        """
+        estoque = self.estoque
+        linhas = estoque.linhas_criticas_do_grupo(categoria, local)
+        return self._criticos_de_colunas(
+            estoque.visoes(linhas),
+            estoque.coletar('quantidades', linhas),
+            estoque.coletar('ideais', linhas),
+            estoque.coletar('precos', linhas),
+            precisao
+        )
+
+    def _item_critico(self, item, precisao='reais', quantidade=None):
+        """
+        Custo e benefício inteiros de um item abaixo do ideal (None se não é
+        crítico). Com precisao='centavos', 'custo' fica em reais com duas casas
+        e 'custo_centavos' guarda o valor inteiro usado pela PD.
+
+        `quantidade` (padrão: o déficit inteiro) é o número de unidades
+        compradas; o benefício por unidade usa a criticidade atual do item.
+        """
+        if item['quantity'] >= item['ideal_quantity']:
+            return None
+        return self._criticos_de_colunas(
+            [item], [item['quantity']], [item['ideal_quantity']], [item['unity_price']],
+            precisao, None if quantidade is None else [quantidade]
+        )[0]
+
+    @staticmethod
+    def _criticos_de_colunas(itens, atuais, ideais, precos, precisao='reais', quantidades=None):
+        """
+        Itens críticos a partir de colunas já filtradas (atual < ideal em
+        todas as posições): custos e benefícios são calculados coluna a
+        coluna com map, e só os dicts de saída são montados por item.
+        """
+        deficits = list(map(operator.sub, ideais, atuais))
+        if quantidades is None:
+            quantidades = deficits
+        custos = list(map(operator.mul, quantidades, precos))
+
+        # Benefício considera o deficit e a criticidade (% abaixo do ideal):
+        # int(quantidade * preco * (1 + criticidade) * 10)
+        fatores = [1 + (1 - razao) for razao in map(operator.truediv, atuais, ideais)]
+        beneficios = [int(custo * fator * 10) for custo, fator in zip(custos, fatores)]
+
+        if precisao == 'centavos':
+            return [
+                {
+                    'item': item,
+                    'deficit': deficit,
+                    'quantidade': quantidade,
+                    'custo': centavos / 100,
+                    'custo_centavos': centavos,
+                    'beneficio': beneficio
+                }
+                for item, deficit, quantidade, centavos, beneficio in zip(
+                    itens, deficits, quantidades,
+                    [round(custo * 100) for custo in custos], beneficios
+                )
+            ]
+
+        return [
+            {
+                'item': item,
+                'deficit': deficit,
+                'quantidade': quantidade,
+                'custo': int(custo),
+                'beneficio': beneficio
+            }
+            for item, deficit, quantidade, custo, beneficio in zip(
+                itens, deficits, quantidades, custos, beneficios
+            )
+        ]
+
+    def _dividir_em_lotes(self, itens_criticos, precisao='reais'):
+        """
+        Modo parcial: troca cada item crítico por lotes de 1, 2, 4, ...
+        unidades do seu déficit (ver dividir_binario). Escolher um
+        subconjunto dos lotes de um item equivale a escolher qualquer
+        quantidade de 0 ao déficit, então os solvers 0/1 resolvem a mochila
+        limitada sem mudanças.
+
+        Em reais o custo de cada lote é arredondado para cima: truncado, um
+        lote abaixo de R$ 1 sairia de graça e a soma dos lotes escolhidos
+        passaria do orçamento.
+        """
+        lotes = []
+        for critico in itens_criticos:
+            for quantidade in dividir_binario(critico['deficit']):
+                lote = self._item_critico(critico['item'], precisao, quantidade)
+                if precisao != 'centavos':
+                    lote['custo'] = math.ceil(round(quantidade * critico['item']['unity_price'], 6))
+                lotes.append(lote)
+        return lotes
+
+    @staticmethod
+    def _agrupar_lotes(lotes_selecionados):
+        """Soma os lotes escolhidos de cada item em uma única entrada com a 'quantidade' total."""
+        agrupados = {}
+        for lote in lotes_selecionados:
+            chave = id(lote['item'])
+            if chave not in agrupados:
+                agrupados[chave] = dict(lote)
+                continue
+            total = agrupados[chave]
+            total['quantidade'] += lote['quantidade']
+            total['custo'] += lote['custo']
+            total['beneficio'] += lote['beneficio']
+            if 'custo_centavos' in lote:
+                total['custo_centavos'] += lote['custo_centavos']
+                total['custo'] = total['custo_centavos'] / 100
+        return list(agrupados.values())
+
+    def _resolver(self, itens_criticos, orcamento_int, metodo, parametros, estatisticas):
+        """
+        Executa o solver `metodo` sobre os itens críticos com os `parametros`
+        da chamada. Estatísticas específicas de cada solver são gravadas em
+        `estatisticas`.
+
+        Returns:
+            (benefício máximo, itens selecionados)
+        """
+        # Escolhe o método de solução
+        metricas = self._metricas
+        n = len(itens_criticos)
+        if metodo == 'recursivo':
+            decisoes = self._novo_mapa_decisoes(n, orcamento_int)
+            self._chamadas_pd = 0
+            with self._fase('resolucao'):
+                beneficio_max = self._pd_recursivo(itens_criticos, n, orcamento_int, decisoes)
+            estatisticas['chamadas_resolucao'] = self._chamadas_pd
+            with self._fase('reconstrucao'):
+                itens_selecionados = self._reconstruir_solucao_por_decisoes(
+                    itens_criticos, decisoes, orcamento_int
+                )
+            estatisticas['chamadas_reconstrucao'] = self._chamadas_pd - estatisticas['chamadas_resolucao']
+            if metricas is not None:
+                # Sem memo, cada chamada avalia um estado, repetido ou não
+                metricas.contar('chamadas_recursivas', estatisticas['chamadas_resolucao'])
+                metricas.contar('celulas_avaliadas', estatisticas['chamadas_resolucao'])
+                metricas.contar('estados_armazenados', 0)
+                metricas.contar('bits_decisao', n * (orcamento_int + 1))
+        elif metodo == 'memoization':
+            memo = {} if metricas is None else MemoInstrumentado()
+            decisoes = self._novo_mapa_decisoes(n, orcamento_int)
+            self._chamadas_pd = 0
+            with self._fase('resolucao'):
+                beneficio_max = self._pd_memoization(itens_criticos, n, orcamento_int, memo, decisoes)
+            estatisticas['chamadas_resolucao'] = self._chamadas_pd
+            with self._fase('reconstrucao'):
+                itens_selecionados = self._reconstruir_solucao_por_decisoes(
+                    itens_criticos, decisoes, orcamento_int
+                )
+            estatisticas['chamadas_reconstrucao'] = self._chamadas_pd - estatisticas['chamadas_resolucao']
+            if metricas is not None:
+                metricas.contar('chamadas_recursivas', estatisticas['chamadas_resolucao'])
+                metricas.contar('memo_acertos', memo.acertos)
+                metricas.contar('memo_falhas', memo.falhas)
+                # Cada estado fora dos casos base é avaliado uma vez e guardado
+                metricas.contar('celulas_avaliadas', len(memo))
+                metricas.contar('estados_armazenados', len(memo))
+                metricas.contar('bits_decisao', n * (orcamento_int + 1))
+        elif metodo == 'memoization_pilha':
+            decisoes = self._novo_mapa_decisoes(n, orcamento_int)
+            with self._fase('resolucao'):
+                beneficio_max, visitados, denso = self._pd_memoization_pilha(
+                    itens_criticos, orcamento_int, decisoes
+                )
+            with self._fase('reconstrucao'):
+                itens_selecionados = self._reconstruir_solucao_por_decisoes(
+                    itens_criticos, decisoes, orcamento_int
+                )
+            estatisticas['estados_visitados'] = visitados
+            estatisticas['estados_tabela'] = (n + 1) * (orcamento_int + 1)
+            estatisticas['memo_denso'] = denso
+            if metricas is not None:
+                metricas.contar('celulas_avaliadas', visitados)
+                metricas.contar('estados_armazenados', estatisticas['estados_tabela'] if denso else visitados)
+                metricas.contar('bits_decisao', n * (orcamento_int + 1))
+        elif metodo in ('branch_and_bound', 'aproximado', 'dual', 'esparso'):
+            # Estes solvers reconstroem o plano junto com a resolução
+            with self._fase('resolucao'):
+                if metodo == 'branch_and_bound':
+                    beneficio_max, itens_selecionados = self._branch_and_bound(
+                        itens_criticos, orcamento_int,
+                        parametros['limite_nos'], parametros['limite_tempo'], estatisticas
+                    )
+                elif metodo == 'aproximado':
+                    beneficio_max, itens_selecionados = self._fptas(
+                        itens_criticos, orcamento_int, parametros['epsilon'], estatisticas
+                    )
+                elif metodo == 'dual':
+                    beneficio_max, itens_selecionados = self._pd_dual(
+                        itens_criticos, orcamento_int, estatisticas
+                    )
+                else:
+                    beneficio_max, itens_selecionados = self._pd_esparso(
+                        itens_criticos, orcamento_int, estatisticas
+                    )
+        elif metodo == 'vetorizado':
+            with self._fase('resolucao'):
+                beneficio_max, decisoes = self._pd_vetorizado(itens_criticos, orcamento_int)
+            with self._fase('reconstrucao'):
+                itens_selecionados = self._reconstruir_solucao_por_decisoes(
+                    itens_criticos, decisoes, orcamento_int
+                )
+            if metricas is not None:
+                metricas.contar('celulas_avaliadas', n * (orcamento_int + 1))
+                metricas.contar('estados_armazenados', orcamento_int + 1)
+                metricas.contar('bits_decisao', n * (orcamento_int + 1))
+        elif metodo == 'iterativo':  # bottom-up
+            with self._fase('resolucao'):
+                beneficio_max, dp_table = self._pd_iterativo(itens_criticos, orcamento_int)
+            with self._fase('reconstrucao'):
+                itens_selecionados = self._reconstruir_solucao_iterativa(
+                    itens_criticos, dp_table, orcamento_int
+                )
+            if metricas is not None:
+                metricas.contar('celulas_avaliadas', n * orcamento_int)
+                metricas.contar('estados_armazenados', (n + 1) * (orcamento_int + 1))
+        else:
+            raise ValueError(f"Método de otimização desconhecido: {metodo!r}")
+
+        if metricas is not None:
+            metricas.contar('itens_resolvidos', n)
+            metricas.contar('capacidade_resolvida', orcamento_int)
+            metricas.contar('itens_selecionados', len(itens_selecionados))
+            if 'reconstrucao' in metricas.fases:
+                # A reconstrução percorre cada item uma vez, do último ao primeiro
+                metricas.contar('passos_reconstrucao', n)
+
+        return beneficio_max, itens_selecionados
+
+    # -------------------
+    # PLANEJADOR DE SOLVERS (metodo='auto')
+    # -------------------
+    def planejar_reabastecimento(self, orcamento, reduzir_capacidade=True):
+        """
+        Estima o custo de cada solver para o estoque atual e o orçamento dado,
+        sem executar nenhum deles. Retorna None se não há itens críticos.
+        """
+        itens_criticos = self._montar_itens_criticos()
+        if not itens_criticos:
+            return None
+        return self._planejar_solver(itens_criticos, int(orcamento), reduzir_capacidade)
+
+    def _planejar_solver(self, itens, orcamento_int, reduzir_capacidade=True, limite_nos=LIMITE_NOS_BB):
+        """
+        Estima o trabalho de cada solver a partir do número de itens, do
+        orçamento inteiro, do MDC dos custos e da faixa de benefícios, e
+        escolhe o de menor tempo estimado.
+
+        Com `reduzir_capacidade`, custos e orçamento são divididos pelo MDC dos
+        custos e a capacidade é limitada ao maior gasto alcançável (ver
+        _reduzir_capacidade), dando o mesmo ótimo com uma tabela menor.
+
+        O branch and bound não depende de W; sua estimativa é o pior caso
+        limitado por `limite_nos`.
+        """
+        n = len(itens)
+        custos = [item['custo'] for item in itens]
+        beneficios = [item['beneficio'] for item in itens]
+
+        if reduzir_capacidade:
+            mdc, passo, capacidade, alcancaveis = _reduzir_capacidade(custos, orcamento_int)
+        else:
+            mdc, passo, capacidade = math.gcd(*custos), 1, orcamento_int
+            alcancaveis = (
+                _bitset_alcancaveis(custos, capacidade).bit_count()
+                if min(custos) > 0 else capacidade + 1
+            )
+        estados = n * (capacidade + 1)
+
+        operacoes = {
+            'recursivo': 2.0 ** (n + 1) if n < 1000 else math.inf,
+            'memoization': estados,
+            'memoization_pilha': estados,
+            'iterativo': estados,
+            'vetorizado': estados,
+            'esparso': n * alcancaveis,
+            'dual': n * (sum(beneficios) + 1),
+            'branch_and_bound': min(2.0 ** (n + 1) if n < 1000 else math.inf, limite_nos),
+        }
+
+        # Itens de custo 0 sempre entram no branch and bound e na PD dual, mas
+        # não no caso base dp[i][0] = 0 da PD: só são equivalentes sem eles
+        if min(custos) == 0:
+            for metodo in _METODOS_SEM_CASO_BASE:
+                operacoes[metodo] = math.inf
+
+        # Solvers recursivos estouram a pilha de chamadas com muitos itens
+        if n + MARGEM_RECURSAO > sys.getrecursionlimit():
+            operacoes['recursivo'] = math.inf
+            operacoes['memoization'] = math.inf
+
+        # O memo plano usa inteiros de 64 bits: a soma dos benefícios precisa caber
+        if sum(beneficios) >= 2 ** 63:
+            operacoes['memoization_pilha'] = math.inf
+
+        tempos = {
+            metodo: qtd * SEGUNDOS_POR_OPERACAO[metodo]
+            for metodo, qtd in operacoes.items()
+        }
+
+        return {
+            'metodo_escolhido': min(tempos, key=tempos.get),
+            'tempo_estimado_s': tempos,
+            'operacoes_estimadas': operacoes,
+            'itens': n,
+            'mdc_custos': mdc,
+            'passo_custo': passo,
+            'capacidade_original': orcamento_int,
+            'capacidade_efetiva': capacidade,
+            'gastos_alcancaveis': alcancaveis,
+            'faixa_beneficio': (min(beneficios), max(beneficios)),
+            'itens_custo_zero': custos.count(0),
+        }
+
+    def _resolver_automatico(self, itens_criticos, orcamento_int, parametros, estatisticas):
+        """
+        Planeja, reduz custos e orçamento pelo MDC quando possível e executa
+        o solver escolhido, registrando o trabalho estimado e o real.
+        """
+        with self._fase('planejamento'):
+            plano = self._planejar_solver(
+                itens_criticos, orcamento_int, limite_nos=parametros['limite_nos']
+            )
+        metodo = plano['metodo_escolhido']
+        passo = plano['passo_custo']
+
+        itens_solver = itens_criticos
+        if passo > 1:
+            itens_solver = [dict(item, custo=item['custo'] // passo) for item in itens_criticos]
+
+        inicio = time.perf_counter()
+        beneficio_max, selecionados = self._resolver(
+            itens_solver, plano['capacidade_efetiva'], metodo, parametros, estatisticas
+        )
+        plano['tempo_real_s'] = time.perf_counter() - inicio
+
+        if passo > 1:
+            selecionados = self._traduzir_selecao(selecionados, itens_solver, itens_criticos)
+
+        if metodo in ('recursivo', 'memoization'):
+            plano['operacoes_reais'] = estatisticas['chamadas_resolucao']
+        elif metodo == 'memoization_pilha':
+            plano['operacoes_reais'] = estatisticas['estados_visitados']
+        elif metodo == 'branch_and_bound':
+            plano['operacoes_reais'] = estatisticas['nos_explorados']
+        elif metodo == 'esparso':
+            plano['operacoes_reais'] = len(itens_criticos) * estatisticas['gastos_alcancaveis']
+        elif metodo == 'dual':
+            plano['operacoes_reais'] = len(itens_criticos) * (estatisticas['beneficio_max_tabela'] + 1)
+        else:
+            plano['operacoes_reais'] = len(itens_criticos) * (plano['capacidade_efetiva'] + 1)
+
+        estatisticas['plano'] = plano
+        return beneficio_max, selecionados
+
+    @staticmethod
+    def _traduzir_selecao(selecionados, itens_reduzidos, itens_originais):
+        """Troca os itens de uma instância reduzida pelos itens originais correspondentes."""
+        originais = {id(reduzido): item for reduzido, item in zip(itens_reduzidos, itens_originais)}
+        return [originais[id(item)] for item in selecionados]
+
+    # -------------------
+    # FRONTEIRA CUSTO x BENEFÍCIO (varredura de orçamentos)
+    # -------------------
+    def fronteira_reabastecimento(self, orcamento_max):
+        """
+        Resolve a PD uma única vez para `orcamento_max` e devolve a fronteira
+        de Pareto custo x benefício. A última linha dp[n][w] já responde todo
+        orçamento w <= W: cada ponto de quebra (dp[n][w] > dp[n][w-1]) é um
+        plano ótimo que custa exatamente w.
+        Complexidade: O(n * W) uma vez; cada consulta posterior O(log k)
+
+        Returns:
+            RestockFrontier com os pontos de quebra e consultas por orçamento
+        """
+        itens_criticos = self._montar_itens_criticos()
+        capacidade = max(int(orcamento_max), 0)
+
+        if not itens_criticos:
+            return RestockFrontier([], [0], [0], [], capacidade)
+
+        linha, decisoes = self._pd_vetorizado_linha(itens_criticos, capacidade)
+
+        # A linha é não decrescente; os pontos de quebra são onde ela sobe
+        custos = [0]
+        beneficios = [0]
+        for w in range(1, capacidade + 1):
+            if linha[w] > linha[w - 1]:
+                custos.append(w)
+                beneficios.append(linha[w])
+
+        return RestockFrontier(itens_criticos, custos, beneficios, decisoes, capacidade)
+
+    # -------------------
+    # ESTADO INCREMENTAL DA PD
+    # -------------------
+    def manter_estado_incremental(self, orcamento_max):
+        """
+        Constrói o estado persistente da PD para orçamentos até `orcamento_max`
+        e passa a atualizá-lo a cada mutação: um item que se torna crítico custa
+        uma atualização de linha O(W); um item que sai do conjunto crítico ou
+        muda de déficit é tirado da sequência e a próxima consulta refaz as
+        linhas a partir do checkpoint anterior a ele (ver
+        IncrementalRestockState: no pior caso, quase uma PD inteira).
+        """
+        estado = IncrementalRestockState(max(int(orcamento_max), 0))
+        for item_critico in self._montar_itens_criticos():
+            estado.adicionar(item_critico)
+        estado.mutacoes_estoque = self.estoque.mutacoes
+        self._estado_incremental = estado
+        return estado
+
+    def _atualizar_estado_incremental(self, item, mutacoes_antes):
+        """
+        Reflete no estado incremental a entrada, saída ou mudança de um item.
+        `mutacoes_antes` é o ItemStore.mutacoes de antes da mutação: se o
+        estado não estava em dia com ele (houve escritas diretas nas visões),
+        é descartado e reconstruído na próxima consulta.
+        """
+        estado = self._estado_incremental
+        if estado is None:
+            return
+        if estado.mutacoes_estoque != mutacoes_antes:
+            self._estado_incremental = None
+            return
+        estado.remover(item)
+        item_critico = self._item_critico(item)
+        if item_critico is not None:
+            estado.adicionar(item_critico)
+        estado.mutacoes_estoque = self.estoque.mutacoes
+
     # -------------------
     # VERSÃO RECURSIVA (sem otimização)
     # -------------------
-    def _pd_recursivo(self, itens, n, capacidade):
+    def _pd_recursivo(self, itens, n, capacidade, decisoes=None):
         """
         Versão recursiva pura - Problema da Mochila 0/1
         Complexidade: O(2^n)
+
+        Se `decisoes` for informado, registra em cada estado (n, capacidade)
+        se incluir o item n-1 foi estritamente melhor, para a reconstrução.
         """
+        self._chamadas_pd += 1
+
         # Caso base: sem itens ou sem capacidade
         if n == 0 or capacidade == 0:
             return 0
         
         # Se o custo do item atual excede a capacidade, não pode ser incluído
         if itens[n-1]['custo'] > capacidade:
-            return self._pd_recursivo(itens, n-1, capacidade)
+            return self._pd_recursivo(itens, n-1, capacidade, decisoes)
         
         # Retorna o máximo entre incluir ou não incluir o item atual
         incluir = itens[n-1]['beneficio'] + self._pd_recursivo(
-            itens, n-1, capacidade - itens[n-1]['custo']
+            itens, n-1, capacidade - itens[n-1]['custo'], decisoes
         )
-        nao_incluir = self._pd_recursivo(itens, n-1, capacidade)
+        nao_incluir = self._pd_recursivo(itens, n-1, capacidade, decisoes)
+
+        if decisoes is not None and incluir > nao_incluir:
+            decisoes[n-1][capacidade >> 3] |= 1 << (capacidade & 7)
         
         return max(incluir, nao_incluir)
     
     # -------------------
     # VERSÃO COM MEMOIZATION (top-down)
     # -------------------
-    def _pd_memoization(self, itens, n, capacidade, memo):
+    def _pd_memoization(self, itens, n, capacidade, memo, decisoes=None):
         """
         Versão recursiva com memoization (top-down)
         Complexidade: O(n * capacidade)
+
+        Se `decisoes` for informado, registra a decisão de cada estado
+        resolvido, como em `_pd_recursivo`.
         """
+        self._chamadas_pd += 1
+
         # Verifica se já foi calculado
         if (n, capacidade) in memo:
             return memo[(n, capacidade)]
@@ -141,19 +1005,391 @@ class StockManager:
         
         # Se o custo do item atual excede a capacidade
         if itens[n-1]['custo'] > capacidade:
-            resultado = self._pd_memoization(itens, n-1, capacidade, memo)
+            resultado = self._pd_memoization(itens, n-1, capacidade, memo, decisoes)
         else:
             # Calcula o máximo entre incluir ou não incluir
             incluir = itens[n-1]['beneficio'] + self._pd_memoization(
-                itens, n-1, capacidade - itens[n-1]['custo'], memo
+                itens, n-1, capacidade - itens[n-1]['custo'], memo, decisoes
             )
-            nao_incluir = self._pd_memoization(itens, n-1, capacidade, memo)
+            nao_incluir = self._pd_memoization(itens, n-1, capacidade, memo, decisoes)
             resultado = max(incluir, nao_incluir)
+
+            if decisoes is not None and incluir > nao_incluir:
+                decisoes[n-1][capacidade >> 3] |= 1 << (capacidade & 7)
         
         # Armazena no memo
         memo[(n, capacidade)] = resultado
         return resultado
-    
+
+    # -------------------
+    # VERSÃO COM MEMOIZATION (top-down com pilha explícita)
+    # -------------------
+    def _pd_memoization_pilha(self, itens, capacidade, decisoes):
+        """
+        Versão top-down sem recursão: uma pilha de trabalho substitui a pilha
+        de chamadas e o memo é um vetor plano indexado por n * (W+1) + w
+        (pré-alocado quando cabe em _LIMITE_MEMO_DENSO, esparso caso contrário).
+        Só os estados alcançáveis a partir de (n, W) são avaliados.
+        Complexidade: O(n * capacidade) no pior caso
+
+        Returns:
+            (benefício máximo, número de estados visitados, memo denso?)
+        """
+        n_itens = len(itens)
+        if n_itens == 0 or capacidade == 0:
+            return 0, 0, True
+
+        custos = [item['custo'] for item in itens]
+        beneficios = [item['beneficio'] for item in itens]
+        largura = capacidade + 1
+        total_estados = (n_itens + 1) * largura
+
+        # -1 marca estado ainda não resolvido (benefícios são sempre >= 0)
+        denso = total_estados <= _LIMITE_MEMO_DENSO
+        if denso:
+            memo = array('q', [-1]) * total_estados
+            obter = memo.__getitem__
+        else:
+            memo = {}
+            obter = lambda indice: memo.get(indice, -1)
+
+        visitados = 0
+        pilha = [n_itens * largura + capacidade]
+
+        while pilha:
+            indice = pilha[-1]
+            if obter(indice) >= 0:
+                pilha.pop()
+                continue
+
+            n, w = divmod(indice, largura)
+            custo_item = custos[n-1]
+            # Casos base (n == 0 ou w == 0) não são armazenados no memo
+            anterior = indice - largura
+            nao_incluir = obter(anterior) if n > 1 else 0
+
+            # Item não cabe: depende apenas de (n-1, w)
+            if custo_item > w:
+                if nao_incluir < 0:
+                    pilha.append(anterior)
+                    continue
+                resultado = nao_incluir
+            else:
+                restante = w - custo_item
+                incluir = obter(anterior - custo_item) if n > 1 and restante > 0 else 0
+                if nao_incluir < 0 or incluir < 0:
+                    # Empilha os subproblemas pendentes e volta a este estado depois
+                    if nao_incluir < 0:
+                        pilha.append(anterior)
+                    if incluir < 0:
+                        pilha.append(anterior - custo_item)
+                    continue
+
+                incluir += beneficios[n-1]
+                if incluir > nao_incluir:
+                    decisoes[n-1][w >> 3] |= 1 << (w & 7)
+                    resultado = incluir
+                else:
+                    resultado = nao_incluir
+
+            memo[indice] = resultado
+            visitados += 1
+            pilha.pop()
+
+        return obter(n_itens * largura + capacidade), visitados, denso
+
+    # -------------------
+    # BRANCH AND BOUND (limite pela relaxação linear)
+    # -------------------
+    def _branch_and_bound(self, itens, capacidade, limite_nos, limite_tempo, estatisticas):
+        """
+        Busca em profundidade sobre os itens ordenados por benefício/custo,
+        podando cada nó com o limite fracionário de Dantzig (preenche o
+        orçamento restante em ordem de razão e toma a fração do item que não
+        cabe). O tempo não depende do orçamento W, só de n e dos nós visitados.
+
+        Para ao atingir `limite_nos` ou `limite_tempo` (None = sem limite) e,
+        nesse caso, informa o gap entre a melhor solução e o maior limite
+        superior ainda em aberto.
+        Complexidade: O(2^n) no pior caso, O(log n) por nó
+
+        Returns:
+            (benefício máximo, itens selecionados)
+        """
+        # Itens sem benefício nunca entram (o desempate da PD é estrito);
+        # itens que custam mais que o orçamento não cabem em nenhum ramo
+        candidatos = [
+            i for i, item in enumerate(itens)
+            if item['beneficio'] > 0 and item['custo'] <= capacidade
+        ]
+        fixos = [i for i in candidatos if itens[i]['custo'] == 0]
+        ordem = sorted(
+            (i for i in candidatos if itens[i]['custo'] > 0),
+            key=lambda i: itens[i]['beneficio'] / itens[i]['custo'],
+            reverse=True
+        )
+        custos = [itens[i]['custo'] for i in ordem]
+        beneficios = [itens[i]['beneficio'] for i in ordem]
+        n = len(ordem)
+
+        # Somas prefixadas na ordem de razão: o limite de cada nó sai por busca binária
+        custo_acumulado = [0]
+        beneficio_acumulado = [0]
+        for custo_item, beneficio_item in zip(custos, beneficios):
+            custo_acumulado.append(custo_acumulado[-1] + custo_item)
+            beneficio_acumulado.append(beneficio_acumulado[-1] + beneficio_item)
+
+        def limite_superior(indice, restante, valor):
+            # Maior k tal que os itens indice..k-1 cabem inteiros em `restante`
+            k = bisect.bisect_right(custo_acumulado, custo_acumulado[indice] + restante) - 1
+            limite = valor + beneficio_acumulado[k] - beneficio_acumulado[indice]
+            if k < n:
+                sobra = restante - (custo_acumulado[k] - custo_acumulado[indice])
+                limite += beneficios[k] * sobra / custos[k]
+            return limite
+
+        base = sum(itens[i]['beneficio'] for i in fixos)
+
+        # Solução gulosa como incumbente inicial
+        melhor_valor = base
+        melhor_escolha = None
+        restante = capacidade
+        for posicao in range(n):
+            if custos[posicao] <= restante:
+                restante -= custos[posicao]
+                melhor_valor += beneficios[posicao]
+                melhor_escolha = (posicao, melhor_escolha)
+
+        # Nó: (índice na ordem, orçamento restante, valor, escolhas como lista encadeada)
+        pilha = [(0, capacidade, base, None)]
+        nos = 0
+        interrompido = False
+        inicio = time.perf_counter()
+
+        while pilha:
+            if nos >= limite_nos or (
+                limite_tempo is not None and nos % 1024 == 0
+                and time.perf_counter() - inicio > limite_tempo
+            ):
+                interrompido = True
+                break
+
+            indice, restante, valor, escolha = pilha.pop()
+            nos += 1
+
+            # Benefícios são inteiros: basta o piso do limite superar a incumbente
+            if int(limite_superior(indice, restante, valor)) <= melhor_valor:
+                continue
+
+            # Pula itens que não cabem mais (só o ramo "não reabastecer" existe)
+            while indice < n and custos[indice] > restante:
+                indice += 1
+            if indice == n:
+                if valor > melhor_valor:
+                    melhor_valor, melhor_escolha = valor, escolha
+                continue
+
+            # Empilha "não reabastecer" antes para explorar "reabastecer" primeiro
+            pilha.append((indice + 1, restante, valor, escolha))
+            pilha.append((
+                indice + 1,
+                restante - custos[indice],
+                valor + beneficios[indice],
+                (indice, escolha)
+            ))
+
+        limite_global = melhor_valor
+        if interrompido:
+            for indice, restante, valor, _ in pilha:
+                limite_global = max(limite_global, int(limite_superior(indice, restante, valor)))
+
+        selecionados = set(fixos)
+        while melhor_escolha is not None:
+            posicao, melhor_escolha = melhor_escolha
+            selecionados.add(ordem[posicao])
+
+        estatisticas['nos_explorados'] = nos
+        estatisticas['otimo_provado'] = not interrompido
+        estatisticas['limite_superior'] = limite_global
+        estatisticas['gap'] = (limite_global - melhor_valor) / limite_global if limite_global else 0.0
+        estatisticas['tempo_s'] = time.perf_counter() - inicio
+
+        return melhor_valor, [itens[i] for i in sorted(selecionados)]
+
+    # -------------------
+    # VERSÃO APROXIMADA (FPTAS)
+    # -------------------
+    def _fptas(self, itens, capacidade, epsilon, estatisticas):
+        """
+        Esquema de aproximação totalmente polinomial: divide os benefícios por
+        K = epsilon * LB / n (LB = melhor entre a solução gulosa e o melhor
+        item isolado, com OPT <= 2 * LB) e resolve a PD dual
+        custo_min[q] = menor custo para atingir benefício escalado q.
+        Cada item perde menos de K no arredondamento, logo o plano devolvido
+        tem benefício >= OPT - n * K >= (1 - epsilon) * OPT.
+        Complexidade: O(n^2 / epsilon), independente do orçamento
+
+        Returns:
+            (benefício real do plano, itens selecionados)
+        """
+        if not 0 < epsilon < 1:
+            raise ValueError("epsilon deve estar entre 0 e 1")
+
+        inicio = time.perf_counter()
+        cabem = [
+            item for item in itens
+            if item['custo'] <= capacidade and item['beneficio'] > 0
+        ]
+        n = len(cabem)
+
+        # Limite inferior LB: guloso por razão benefício/custo ou o melhor item sozinho
+        guloso = 0
+        restante = capacidade
+        for item in sorted(cabem, key=lambda x: x['beneficio'] / max(x['custo'], 1), reverse=True):
+            if item['custo'] <= restante:
+                restante -= item['custo']
+                guloso += item['beneficio']
+        limite_inferior = max([guloso] + [item['beneficio'] for item in cabem])
+
+        # K < 1 não reduz nada (benefícios já são inteiros): resolve exato
+        escala = max(epsilon * limite_inferior / n, 1.0) if n else 1.0
+        lucros = [int(item['beneficio'] // escala) for item in cabem]
+        # OPT <= 2 * LB, então nenhum plano passa de 2 * LB / K em benefício escalado
+        maximo = min(int(2 * limite_inferior // escala), sum(lucros))
+
+        infinito = capacidade + 1
+        linha = [0] + [infinito] * maximo
+        decisoes = [
+            _atualizar_linha_dual(linha, item['custo'], lucro, maximo)
+            for item, lucro in zip(cabem, lucros)
+        ]
+
+        # Maior benefício escalado alcançável dentro do orçamento
+        alvo = max(q for q in range(maximo + 1) if linha[q] <= capacidade)
+        selecionados = self._reconstruir_solucao_por_decisoes(cabem, decisoes, alvo, lucros)
+        beneficio = sum(item['beneficio'] for item in selecionados)
+
+        # Reordena na ordem original dos itens críticos
+        posicoes = {id(item): i for i, item in enumerate(itens)}
+        selecionados.sort(key=lambda item: posicoes[id(item)])
+
+        estatisticas['epsilon'] = epsilon
+        estatisticas['fator_escala'] = escala
+        estatisticas['beneficio_escalado_max'] = maximo
+        estatisticas['garantia'] = '>= (1 - epsilon) * OPT'
+        # OPT <= benefício + n * K (perda máxima do arredondamento)
+        estatisticas['limite_superior_otimo'] = int(beneficio + n * escala) if escala > 1 else beneficio
+        estatisticas['tempo_s'] = time.perf_counter() - inicio
+
+        return beneficio, selecionados
+
+    # -------------------
+    # VERSÃO DUAL (indexada por benefício)
+    # -------------------
+    def _pd_dual(self, itens, capacidade, estatisticas):
+        """
+        PD dual: custo_min[i][b] = menor custo para atingir benefício exato b
+        com os primeiros i itens. A resposta é o maior b com
+        custo_min[n][b] <= capacidade. A tabela tem sum(beneficios) + 1
+        colunas em vez de capacidade + 1, o que compensa com orçamentos
+        grandes e benefícios pequenos.
+        Complexidade: O(n * sum(beneficios)), independente do orçamento
+
+        Mesmo ótimo de _pd_iterativo quando não há itens de custo 0 (o caso
+        base dp[i][0] = 0 da PD por custo não tem equivalente aqui).
+
+        Returns:
+            (benefício máximo, itens selecionados)
+        """
+        # Orçamento 0: o caso base dp[i][0] = 0 não escolhe nada
+        if capacidade <= 0:
+            estatisticas['beneficio_max_tabela'] = 0
+            return 0, []
+
+        cabem = [item for item in itens if item['custo'] <= capacidade]
+        beneficios = [item['beneficio'] for item in cabem]
+        maximo = sum(beneficios)
+
+        linha = [0] + [capacidade + 1] * maximo
+        decisoes = [
+            _atualizar_linha_dual(linha, item['custo'], item['beneficio'], maximo)
+            for item in cabem
+        ]
+
+        alvo = max(b for b in range(maximo + 1) if linha[b] <= capacidade)
+        selecionados = self._reconstruir_solucao_por_decisoes(cabem, decisoes, alvo, beneficios)
+
+        posicoes = {id(item): i for i, item in enumerate(itens)}
+        selecionados.sort(key=lambda item: posicoes[id(item)])
+
+        estatisticas['beneficio_max_tabela'] = maximo
+        estatisticas['custo_minimo'] = linha[alvo]
+        return alvo, selecionados
+
+    # -------------------
+    # VERSÃO ESPARSA (só gastos alcançáveis)
+    # -------------------
+    def _pd_esparso(self, itens, capacidade, estatisticas):
+        """
+        PD vetorizada restrita aos gastos exatos alcançáveis por algum
+        subconjunto de itens (calculados por soma de subconjuntos em bits).
+        Como dp[i][w] só muda nesses pontos, a coluna de w é a do maior gasto
+        alcançável <= w, e as decisões coincidem com as da versão vetorizada.
+        Com itens de custo 0 o caso base dp[i][0] = 0 quebra essa propriedade,
+        então todas as capacidades são usadas.
+        Complexidade: O(n * m log m), m = nº de gastos alcançáveis <= W
+
+        Returns:
+            (benefício máximo, itens selecionados)
+        """
+        custos = [item['custo'] for item in itens]
+        if min(custos) > 0:
+            somas = _somas_alcancaveis(custos, capacidade)
+        else:
+            somas = list(range(capacidade + 1))
+        m = len(somas)
+        tamanho = (m >> 3) + 1
+
+        linha = [0] * m
+        decisoes = []
+
+        for item in itens:
+            custo_item = item['custo']
+
+            # dp[i][0] = 0 sempre: a atualização começa no primeiro gasto >= max(custo, 1)
+            inicio = bisect.bisect_left(somas, max(custo_item, 1))
+            if inicio >= m:
+                decisoes.append(bytes(tamanho))
+                continue
+
+            # Coluna de (w - custo) = maior gasto alcançável <= w - custo
+            colunas = map(
+                bisect.bisect_right,
+                itertools.repeat(somas),
+                map(operator.sub, somas[inicio:], itertools.repeat(custo_item))
+            )
+            # bisect_right - 1 é a coluna; o 0 à frente da linha absorve o deslocamento
+            anterior = [0] + linha
+            incluir = [anterior[coluna] + item['beneficio'] for coluna in colunas]
+            nao_incluir = linha[inicio:]
+
+            bits = bytes(map(operator.gt, incluir, nao_incluir)).translate(_TABELA_BITS)
+            decisoes.append((int(bits[::-1], 2) << inicio).to_bytes(tamanho, 'little'))
+            linha[inicio:] = [a if a > b else b for a, b in zip(incluir, nao_incluir)]
+
+        # Reconstrução: a partir do maior gasto alcançável, de trás para frente
+        coluna = m - 1
+        selecionados = []
+        for i in range(len(itens) - 1, -1, -1):
+            if (decisoes[i][coluna >> 3] >> (coluna & 7)) & 1:
+                selecionados.append(itens[i])
+                coluna = bisect.bisect_right(somas, somas[coluna] - custos[i]) - 1
+
+        estatisticas['gastos_alcancaveis'] = m
+        estatisticas['capacidade'] = capacidade
+
+        return linha[m - 1], list(reversed(selecionados))
+
     # -------------------
     # VERSÃO ITERATIVA (bottom-up)
     # -------------------
@@ -182,53 +1418,50 @@ class StockManager:
                     dp[i][w] = max(incluir, nao_incluir)
         
         return dp[n][capacidade], dp
-    
+
     # -------------------
-    # RECONSTRUÇÃO DA SOLUÇÃO - Recursiva
+    # VERSÃO VETORIZADA (bottom-up com linha única)
     # -------------------
-    def _reconstruir_solucao_recursiva(self, itens, n, capacidade):
-        """Reconstrói quais itens foram selecionados na versão recursiva"""
-        if n == 0 or capacidade == 0:
-            return []
-        
-        if itens[n-1]['custo'] > capacidade:
-            return self._reconstruir_solucao_recursiva(itens, n-1, capacidade)
-        
-        incluir_valor = itens[n-1]['beneficio'] + self._pd_recursivo(
-            itens, n-1, capacidade - itens[n-1]['custo']
-        )
-        nao_incluir_valor = self._pd_recursivo(itens, n-1, capacidade)
-        
-        if incluir_valor > nao_incluir_valor:
-            return self._reconstruir_solucao_recursiva(
-                itens, n-1, capacidade - itens[n-1]['custo']
-            ) + [itens[n-1]]
-        else:
-            return self._reconstruir_solucao_recursiva(itens, n-1, capacidade)
-    
+    def _pd_vetorizado(self, itens, capacidade):
+        """
+        Versão vetorizada: retorna (benefício máximo, mapa de decisões).
+        Ver `_pd_vetorizado_linha`.
+        """
+        linha, decisoes = self._pd_vetorizado_linha(itens, capacidade)
+        return linha[capacidade], decisoes
+
+    def _pd_vetorizado_linha(self, itens, capacidade):
+        """
+        Versão bottom-up com uma única linha rolante de tamanho W+1.
+        Cada item atualiza a linha inteira de uma vez (deslocamento + máximo
+        elemento a elemento), e a decisão incluir/não incluir de cada célula
+        é guardada como um bit no mapa de decisões do item.
+        Complexidade: O(n * capacidade) tempo, O(capacidade) para a linha
+        e n * capacidade bits para as decisões
+
+        Returns:
+            (linha final dp[n][0..capacidade], mapa de decisões)
+        """
+        linha = [0] * (capacidade + 1)
+        decisoes = [
+            _atualizar_linha(linha, item['custo'], item['beneficio'], capacidade)
+            for item in itens
+        ]
+
+        return linha, decisoes
+
     # -------------------
-    # RECONSTRUÇÃO DA SOLUÇÃO - Memoization
+    # MAPA DE DECISÕES (1 bit por estado)
     # -------------------
-    def _reconstruir_solucao_memo(self, itens, n, capacidade, memo):
-        """Reconstrói quais itens foram selecionados na versão memoization"""
-        if n == 0 or capacidade == 0:
-            return []
-        
-        if itens[n-1]['custo'] > capacidade:
-            return self._reconstruir_solucao_memo(itens, n-1, capacidade, memo)
-        
-        incluir_valor = itens[n-1]['beneficio'] + self._pd_memoization(
-            itens, n-1, capacidade - itens[n-1]['custo'], memo
-        )
-        nao_incluir_valor = self._pd_memoization(itens, n-1, capacidade, memo)
-        
-        if incluir_valor > nao_incluir_valor:
-            return self._reconstruir_solucao_memo(
-                itens, n-1, capacidade - itens[n-1]['custo'], memo
-            ) + [itens[n-1]]
-        else:
-            return self._reconstruir_solucao_memo(itens, n-1, capacidade, memo)
-    
+    def _novo_mapa_decisoes(self, n, capacidade):
+        """
+        Cria um mapa de bits por item: o bit w do item i indica que, no estado
+        (i+1, w), reabastecer o item i é estritamente melhor que não reabastecer.
+        Ocupa n * (capacidade + 1) bits.
+        """
+        tamanho = (capacidade >> 3) + 1
+        return [bytearray(tamanho) for _ in range(n)]
+
     # -------------------
     # RECONSTRUÇÃO DA SOLUÇÃO - Iterativa
     # -------------------
@@ -246,21 +1479,59 @@ class StockManager:
                 w -= itens[i-1]['custo']
         
         return list(reversed(selecionados))
+
+    # -------------------
+    # RECONSTRUÇÃO DA SOLUÇÃO - Mapa de decisões
+    # -------------------
+    @staticmethod
+    def _reconstruir_solucao_por_decisoes(itens, decisoes, capacidade, pesos=None):
+        """
+        Reconstrói quais itens foram selecionados a partir dos bits de decisão
+        gravados durante a resolução. Complexidade: O(n), sem chamar o solver.
+
+        `pesos` é a dimensão indexada pela PD (padrão: o custo de cada item).
+        """
+        if pesos is None:
+            pesos = [item['custo'] for item in itens]
+        w = capacidade
+        selecionados = []
+
+        # Percorre os itens de trás para frente consultando o bit de cada capacidade
+        for i in range(len(itens) - 1, -1, -1):
+            if (decisoes[i][w >> 3] >> (w & 7)) & 1:
+                selecionados.append(itens[i])
+                w -= pesos[i]
+
+        return list(reversed(selecionados))
     
     # -------------------
     # MÉTODO PARA COMPARAR AS TRÊS VERSÕES
     # -------------------
-    def comparar_metodos_pd(self, orcamento):
+    def comparar_metodos_pd(self, orcamento, limite_segundos=_LIMITE_TEMPO_COMPARACAO):
         """
-        Executa os três métodos e compara os resultados para validação.
+        Executa todos os métodos e compara os resultados para validação.
+        Métodos cujo tempo estimado pelo planejador excede `limite_segundos`
+        são pulados em vez de executados, assim como a PD dual quando há
+        itens de custo 0 (ela não tem o caso base dp[i][0] = 0 das demais,
+        ver _pd_dual).
         """
         print("\n" + "="*70)
         print("COMPARAÇÃO DE MÉTODOS")
         print("="*70)
         
         resultados = {}
+        plano = self.planejar_reabastecimento(orcamento, reduzir_capacidade=False)
         
-        for metodo in ['recursivo', 'memoization', 'iterativo']:
+        for metodo in ['recursivo', 'memoization', 'memoization_pilha', 'iterativo', 'vetorizado', 'esparso', 'dual']:
+            if metodo in _METODOS_SEM_CASO_BASE and plano and plano['itens_custo_zero']:
+                print(f"\nPulando método: {metodo.upper()}")
+                print(f"  {plano['itens_custo_zero']} item(ns) de custo 0: o ótimo difere do caso base da PD por custo")
+                continue
+            if plano and plano['tempo_estimado_s'][metodo] > limite_segundos:
+                print(f"\nPulando método: {metodo.upper()}")
+                print(f"  Tempo estimado ({plano['tempo_estimado_s'][metodo]:.3g} s) excede o limite de {limite_segundos} s")
+                continue
+
             print(f"\nExecutando método: {metodo.upper()}")
             resultado = self.otimizar_reabastecimento(orcamento, metodo)
             resultados[metodo] = resultado
@@ -298,6 +1569,11 @@ class StockManager:
         print("\n" + "="*70)
         print(f"RESULTADO DA OTIMIZAÇÃO - Método: {resultado['metodo'].upper()}")
         print("="*70)
+        if resultado.get('metodo_escolhido'):
+            plano = resultado['estatisticas']['plano']
+            print(f"Solver Escolhido: {resultado['metodo_escolhido'].upper()}")
+            print(f"Tempo Estimado: {plano['tempo_estimado_s'][resultado['metodo_escolhido']]:.3f} s")
+            print(f"Tempo Real: {plano['tempo_real_s']:.3f} s")
         print(f"Orçamento Disponível: R$ {resultado['orcamento']:.2f}")
         print(f"Benefício Máximo: {resultado['beneficio_maximo']}")
         print(f"Custo Total: R$ {resultado['custo_total']:.2f}")
@@ -316,47 +1592,109 @@ class StockManager:
                 print(f"   Quantidade Atual: {item['quantity']}")
                 print(f"   Quantidade Ideal: {item['ideal_quantity']}")
                 print(f"   Déficit: {item_data['deficit']} unidades")
+                if item_data['quantidade'] != item_data['deficit']:
+                    print(f"   Quantidade a Comprar: {item_data['quantidade']} unidades")
                 print(f"   Custo: R$ {item_data['custo']:.2f}")
                 print(f"   Benefício: {item_data['beneficio']}")
                 print(f"   Localização: {item['location']}")
 
-    def fila_de_reposicao(self):
+    def fila_de_reposicao(self, pagina=1, itens_por_pagina=None):
         """
         Retorna uma lista (fila) dos itens que estão abaixo do ideal, em ordem de chegada.
+        Lida do índice de itens críticos do estoque; com `itens_por_pagina`,
+        devolve só a página pedida (a partir de 1). Complexidade: O(k)
         """
-        fila = []
-        for item in self.estoque:
-            if item['quantity'] < item['ideal_quantity']:
-                fila.append(item)
-        return fila
+        if itens_por_pagina is None:
+            linhas = self.estoque.linhas_criticas()
+        else:
+            inicio = (pagina - 1) * itens_por_pagina
+            linhas = self.estoque.linhas_criticas(inicio, inicio + itens_por_pagina)
+        return self.estoque.visoes(linhas)
+
+    def mais_criticos(self, k=None, por='deficit'):
+        """
+        Os `k` itens mais críticos (todos, sem `k`), por maior déficit
+        (por='deficit') ou maior criticidade 1 - quantidade/ideal
+        (por='criticidade'), lidos do índice de prioridade do estoque.
+        Complexidade: O(k log k)
+        """
+        return self.estoque.mais_criticos(k, por)
+
+    def resumo_por_grupo(self, por='categoria'):
+        """
+        Por categoria (por='categoria') ou localização (por='local'):
+        'itens', 'valor_estoque' (soma de quantidade * preço),
+        'custo_deficit' (custo de repor os itens abaixo do ideal) e
+        'itens_criticos', lidos dos agregados mantidos pelo estoque.
+        Complexidade: O(grupos)
+        """
+        return self.estoque.resumo_grupos(por)
+
+    def itens_do_grupo(self, valor, por='categoria'):
+        """Itens de uma categoria ou localização, na ordem do estoque."""
+        return self.estoque.visoes_do_grupo(valor, por)
+
+    def exibir_resumo_por_grupo(self, por='categoria'):
+        resumo = self.resumo_por_grupo(por)
+        titulo = 'CATEGORIA' if por == 'categoria' else 'LOCALIZAÇÃO'
+        print(f"\nResumo por {titulo.lower()}:")
+        print(f"{titulo:<25} {'Itens':>6} {'Valor em estoque':>18} {'Custo do déficit':>18} {'Críticos':>9}")
+        print("-" * 80)
+        for grupo in sorted(resumo):
+            dados = resumo[grupo]
+            print(f"{grupo:<25} {dados['itens']:>6} {dados['valor_estoque']:>18.2f} "
+                  f"{dados['custo_deficit']:>18.2f} {dados['itens_criticos']:>9}")
 
     def pilha_de_validade(self):
         """
         Retorna uma lista (pilha) dos itens ordenados por data de validade (topo = vence primeiro).
+        Itens sem validade ficam no início; os demais saem do índice de
+        validade já em ordem (empates na ordem atual do estoque).
+        Complexidade: O(n log n), sem comparar datas como strings
         """
-        pilha = self.estoque[:]
-        # Ordenação simples (Insertion Sort) por data de validade
-        for i in range(1, len(pilha)):
-            chave = pilha[i]
-            j = i - 1
-            while j >= 0 and (
-                (pilha[j]['expiryDate'] is not None and chave['expiryDate'] is not None and pilha[j]['expiryDate'] > chave['expiryDate']) or
-                (pilha[j]['expiryDate'] is not None and chave['expiryDate'] is None)
-            ):
-                pilha[j + 1] = pilha[j]
-                j -= 1
-            pilha[j + 1] = chave
-        return pilha
+        estoque = self.estoque
+        sem_validade = estoque.visoes(estoque.linhas_sem_validade())
+        return sem_validade + [item for _, item in estoque.validades_no_intervalo()]
+
+    def itens_vencidos(self, hoje=None):
+        """
+        Itens com validade anterior a `hoje` (date ou 'YYYY-MM-DD'; padrão:
+        data atual), do mais antigo ao mais recente.
+        Complexidade: O(k log k), k = itens vencidos
+        """
+        return [
+            item for _, item in self.estoque.validades_no_intervalo(fim=_ordinal_data(hoje) - 1)
+        ]
+
+    def itens_vencendo(self, dias, hoje=None):
+        """
+        Itens que vencem de `hoje` até `hoje + dias` (inclusive), em ordem
+        de validade. O percurso do índice também passa pelos já vencidos.
+        Complexidade: O(m log m), m = itens com validade <= hoje + dias
+        """
+        inicio = _ordinal_data(hoje)
+        return [
+            item for _, item in self.estoque.validades_no_intervalo(inicio, inicio + dias)
+        ]
+
+    def proximos_a_vencer(self, k, hoje=None, incluir_vencidos=False):
+        """
+        Os `k` próximos itens a vencer a partir de `hoje` (ou os k de menor
+        validade, com `incluir_vencidos`). Complexidade: O((k + v) log n),
+        v = itens vencidos pulados
+        """
+        inicio = None if incluir_vencidos else _ordinal_data(hoje)
+        return [item for _, item in self.estoque.proximas_validades(k, inicio)]
 
     def busca_sequencial_nome(self, nome_item):
         """
         Busca sequencialmente um item pelo nome.
         Retorna o item ou None.
         """
-        for item in self.estoque:
-            if item['itemName'] == nome_item:
-                return item
-        return None
+        try:
+            return self.estoque.visao(self.estoque.nomes.index(nome_item))
+        except ValueError:
+            return None
 
     def ordenar_estoque_merge(self):
         """
@@ -384,8 +1722,9 @@ class StockManager:
             resultado.extend(dir[j:])
             return resultado
 
-        self.estoque = merge_sort(self.estoque)
-        self.nomes_itens = [item['itemName'] for item in self.estoque]
+        self.estoque.reordenar(merge_sort(list(self.estoque)))
+        self._persistir_ordem()
+        self._registrar_mutacao()
 
     def ordenar_estoque_quick(self):
         """
@@ -399,8 +1738,34 @@ class StockManager:
             maiores = [x for x in lista[1:] if x['itemName'] > pivo['itemName']]
             return quick_sort(menores) + [pivo] + quick_sort(maiores)
 
-        self.estoque = quick_sort(self.estoque)
-        self.nomes_itens = [item['itemName'] for item in self.estoque]
+        self.estoque.reordenar(quick_sort(list(self.estoque)))
+        self._persistir_ordem()
+        self._registrar_mutacao()
+
+    def ordenar_estoque(self, campos=('itemName',), algoritmo='merge'):
+        """
+        Ordena o estoque por `campos` (um campo ou vários, como
+        inventory_sort.CHAVE_COMPOSTA: categoria, validade e nome) com
+        `algoritmo`: 'merge' (merge sort bottom-up, estável), 'intro'
+        (introsort, O(n log n) mesmo com a entrada já ordenada) ou 'nativo'
+        (Timsort). A chave de cada item é lida das colunas uma única vez e
+        só a permutação final mexe no estoque; nenhum dos três é recursivo.
+        Itens sem validade ficam depois dos demais.
+        """
+        ordem = ordenar_chaves(chaves_do_estoque(self.estoque, campos), algoritmo)
+        self.estoque.reordenar_linhas(ordem)
+        self._persistir_ordem()
+        self._registrar_mutacao()
+
+    def exportar_ordenado(self, destino, campos=CHAVE_COMPOSTA, tamanho_bloco=100_000):
+        """
+        Grava o estoque em `destino` (NDJSON) ordenado por `campos` sem
+        mudar a ordem do estoque, pela ordenação externa em blocos de
+        `tamanho_bloco` (ver inventory_sort.ordenar_externo).
+        """
+        return ordenar_externo(
+            (dict(item) for item in self.estoque), destino, campos, tamanho_bloco
+        )
 
     def busca_binaria(self, nome_item):
         esquerda = 0
@@ -415,25 +1780,74 @@ class StockManager:
         return esquerda
 
     def buscar_por_nome(self, nome_item):
-        esquerda = 0
-        direita = len(self.estoque) - 1
+        """
+        Busca exata pelo índice hash de nomes, correta em qualquer ordem do
+        estoque. Complexidade: O(1)
+        """
+        return self.estoque.visao_por_nome(nome_item)
 
-        while esquerda <= direita:
-            meio = (esquerda + direita) // 2
-            nome_meio = self.estoque[meio]['itemName']
-            if nome_meio == nome_item:
-                return self.estoque[meio]
-            elif nome_meio < nome_item:
-                esquerda = meio + 1
-            else:
-                direita = meio - 1
+    def buscar_por_id(self, item_id):
+        """Busca pelo índice hash de ids. Complexidade: O(1)"""
+        return self.estoque.visao_por_id(item_id)
 
-        return None
+    def buscar_por_prefixo(self, prefixo):
+        """
+        Itens cujo nome começa com `prefixo`, em ordem alfabética, pelo
+        índice ordenado de nomes. Complexidade: O(log n + k)
+        """
+        return self.estoque.visoes_por_prefixo(prefixo)
+
+    def buscar_por_intervalo(self, nome_inicio, nome_fim=None):
+        """
+        Itens com nome_inicio <= nome < nome_fim (sem `nome_fim`: até o
+        último), em ordem alfabética. Complexidade: O(log n + k)
+        """
+        return self.estoque.visoes_por_intervalo(nome_inicio, nome_fim)
 
     def adicionar_item(self, novo_item):
         print(f"\nAdicionando '{novo_item['itemName']}' ao estoque...")
-        self.estoque.append(novo_item)
-        self.nomes_itens.append(novo_item['itemName'])
+        mutacoes_antes = self.estoque.mutacoes
+        item = self.estoque.append(novo_item)
+        if self._persistencia is not None:
+            self._persistencia.registrar_adicao(item)
+        self._atualizar_estado_incremental(item, mutacoes_antes)
+        self._registrar_mutacao()
+
+    def atualizar_quantidade(self, item_id, quantidade, quantidade_ideal=None):
+        """
+        Atualiza a quantidade (e opcionalmente a quantidade ideal) de um item.
+        Retorna o item atualizado ou None se o id não existe.
+        """
+        item = self.estoque.visao_por_id(item_id)
+        if item is None:
+            return None
+
+        mutacoes_antes = self.estoque.mutacoes
+        item['quantity'] = quantidade
+        if quantidade_ideal is not None:
+            item['ideal_quantity'] = quantidade_ideal
+        if self._persistencia is not None:
+            self._persistencia.registrar_quantidade(item_id, quantidade, quantidade_ideal)
+        self._atualizar_estado_incremental(item, mutacoes_antes)
+        self._registrar_mutacao()
+        return item
+
+    def _persistir_ordem(self):
+        # A ordem das linhas não vai para o journal: um novo snapshot a guarda
+        if self._persistencia is not None:
+            self._persistencia.compactar()
+
+    def _registrar_mutacao(self):
+        """Incrementa a versão do estoque e descarta resultados em cache."""
+        self._mutacoes += 1
+        if self._cache is not None:
+            self._cache.invalidar()
+
+    def estatisticas_cache(self):
+        """Acertos, falhas e ocupação do cache de otimização (None se desativado)."""
+        if self._cache is None:
+            return None
+        return self._cache.estatisticas()
     
     def mostrar_estoque(self):
         print("\nEstoque atual:")
@@ -449,21 +1863,16 @@ class StockManager:
             print(f"Quantidade Ideal: {item['ideal_quantity']}")
             
     def itens_criticos(self):
-        criticos = []
-
-        for item in self.estoque:
-            atual = item['quantity']
-            ideal = item['ideal_quantity']
-
-            if atual < ideal:
-                desvio = ideal - atual
-                criticos.append({
-                    'item': item,
-                    'desvio': desvio,
-                    'relacao': f"{atual}/{ideal}"
-                })
+        # O índice de déficit já entrega os itens em ordem decrescente de desvio
+        criticos = [
+            {
+                'item': item,
+                'desvio': item['ideal_quantity'] - item['quantity'],
+                'relacao': f"{item['quantity']}/{item['ideal_quantity']}"
+            }
+            for item in self.estoque.mais_criticos()
+        ]
         
-        criticos.sort(key=lambda x: x['desvio'], reverse=True)
         print("\nItens críticos:")
         for critico in criticos:
             item = critico['item']
@@ -475,4 +1884,172 @@ class StockManager:
             print(f"Quantidade Ideal: {item['ideal_quantity']}")
             print(f"Desvio: {critico['desvio']}")
             print(f"Relação: {critico['relacao']}")
-            print(f"Localização: {item['location']}")
\ No newline at end of file
+            print(f"Localização: {item['location']}")
+
+
+
+class IncrementalRestockState:
+    """
+    Estado persistente da PD vetorizada para um orçamento máximo fixo.
+
+    Mantém a última linha dp[n][0..W], o mapa de decisões de cada item e
+    cópias da linha a cada `intervalo_checkpoint` itens. Adicionar um item
+    ao fim aplica uma única atualização de linha, O(W).
+
+    Remover o item na posição k não tem atalho: a PD 0/1 não desfaz um
+    item, então as linhas a partir do checkpoint anterior a k precisam ser
+    refeitas, O((intervalo + n - k) * W), e mudar um dos primeiros itens
+    ainda custa quase uma PD inteira. Para diluir esse custo, a remoção só
+    marca a posição (O(n), sem tocar na PD) e a linha é refeita na próxima
+    consulta, uma vez a partir da menor posição alterada: várias mudanças
+    entre duas consultas custam uma única reaplicação. Um item alterado
+    volta para o fim da sequência, então itens que mudam com frequência
+    ficam perto do fim e as mudanças seguintes neles saem baratas.
+
+    A ordem dos itens só não altera o ótimo quando nenhum custa 0; com
+    itens de custo 0, otimizar_reabastecimento(metodo='incremental') não
+    consulta o estado e resolve a instância atual do zero.
+    """
+
+    def __init__(self, capacidade, intervalo_checkpoint=32):
+        self.capacidade = capacidade
+        self.itens = []
+        self.linhas_atualizadas = 0
+        self._intervalo = intervalo_checkpoint
+        self._linha = [0] * (capacidade + 1)
+        self._decisoes = []
+        # _checkpoints[j] = linha após os primeiros j * intervalo itens
+        self._checkpoints = [list(self._linha)]
+        # Menor posição cuja linha está desatualizada (None: PD em dia)
+        self._pendente = None
+        # ItemStore.mutacoes com que o estado está em dia (ver StockManager)
+        self.mutacoes_estoque = None
+
+    def __len__(self):
+        return len(self.itens)
+
+    def adicionar(self, item_critico):
+        """
+        Acrescenta um item crítico ao fim da sequência. Complexidade: O(W),
+        ou O(1) com uma reaplicação pendente (o item entra nela)
+        """
+        self.itens.append(item_critico)
+        if self._pendente is None:
+            self._aplicar(item_critico)
+
+    def remover(self, item):
+        """
+        Remove o item crítico cujo registro de estoque é `item` e marca a
+        PD para ser refeita a partir da posição dele na próxima consulta.
+        Retorna False se ele não estava no estado. Complexidade: O(n)
+        """
+        for posicao, item_critico in enumerate(self.itens):
+            if item_critico['item'] is item:
+                break
+        else:
+            return False
+
+        del self.itens[posicao]
+        if self._pendente is None or posicao < self._pendente:
+            self._pendente = posicao
+        return True
+
+    def consultar(self, orcamento):
+        """
+        Benefício máximo e itens selecionados para `orcamento` <= capacidade.
+        Complexidade: O(n) (apenas a reconstrução), mais a reaplicação
+        pendente depois de remoções
+        """
+        self._reaplicar_pendentes()
+        w = min(max(int(orcamento), 0), self.capacidade)
+        selecionados = StockManager._reconstruir_solucao_por_decisoes(
+            self.itens, self._decisoes, w
+        )
+        return self._linha[w], selecionados
+
+    def _reaplicar_pendentes(self):
+        """Volta ao último checkpoint antes da menor posição alterada e reaplica os itens seguintes."""
+        if self._pendente is None:
+            return
+        bloco = self._pendente // self._intervalo
+        inicio = bloco * self._intervalo
+        self._pendente = None
+        del self._checkpoints[bloco + 1:]
+        del self._decisoes[inicio:]
+        self._linha = list(self._checkpoints[bloco])
+
+        for item_critico in self.itens[inicio:]:
+            self._aplicar(item_critico)
+
+    def _aplicar(self, item_critico):
+        self._decisoes.append(_atualizar_linha(
+            self._linha, item_critico['custo'], item_critico['beneficio'], self.capacidade
+        ))
+        self.linhas_atualizadas += 1
+        if len(self._decisoes) % self._intervalo == 0:
+            self._checkpoints.append(list(self._linha))
+
+
+class RestockFrontier:
+    """
+    Fronteira de Pareto custo x benefício do reabastecimento, calculada uma
+    vez por `StockManager.fronteira_reabastecimento`. Responde qualquer
+    orçamento até `orcamento_max` sem resolver a PD de novo.
+    """
+
+    def __init__(self, itens_criticos, custos, beneficios, decisoes, orcamento_max):
+        self.itens_criticos = itens_criticos
+        self.custos = custos
+        self.beneficios = beneficios
+        self.orcamento_max = orcamento_max
+        self._decisoes = decisoes
+        self._selecoes = {}
+
+    def __len__(self):
+        return len(self.custos)
+
+    def itens_do_ponto(self, indice):
+        """Itens do plano no ponto de quebra `indice` (reconstrução O(n), em cache)."""
+        if indice not in self._selecoes:
+            self._selecoes[indice] = StockManager._reconstruir_solucao_por_decisoes(
+                self.itens_criticos, self._decisoes, self.custos[indice]
+            )
+        return self._selecoes[indice]
+
+    def pontos(self):
+        """Lista de pontos (custo, benefício, itens selecionados) em ordem de custo."""
+        return [
+            {
+                'custo': self.custos[i],
+                'beneficio': self.beneficios[i],
+                'itens_selecionados': self.itens_do_ponto(i)
+            }
+            for i in range(len(self.custos))
+        ]
+
+    def consultar(self, orcamento):
+        """
+        Melhor plano para `orcamento` <= orcamento_max por busca binária nos
+        pontos de quebra. Entre planos de mesmo benefício, devolve o mais barato.
+        Complexidade: O(log k) para o benefício, O(n) para listar os itens
+        """
+        orcamento_int = int(orcamento)
+        if orcamento_int > self.orcamento_max:
+            raise ValueError(
+                f"Orçamento {orcamento} acima do máximo da fronteira ({self.orcamento_max})"
+            )
+
+        indice = bisect.bisect_right(self.custos, orcamento_int) - 1
+        itens_selecionados = self.itens_do_ponto(indice) if indice >= 0 else []
+        custo_total = self.custos[indice] if indice >= 0 else 0
+
+        return {
+            'beneficio_maximo': self.beneficios[indice] if indice >= 0 else 0,
+            'itens_selecionados': itens_selecionados,
+            'custo_total': custo_total,
+            'orcamento': orcamento,
+            'orcamento_restante': orcamento - custo_total,
+            'metodo': 'fronteira',
+            'total_itens_criticos': len(self.itens_criticos),
+            'itens_reabastecidos': len(itens_selecionados)
+        }
@@ -0,0 +1,421 @@
+import asyncio
+import contextlib
+import io
+import json
+import time
+from array import array
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date
+from multiprocessing import shared_memory
+
+from domain.batch_pipeline import PipelineLote, ler_orcamento, resultado_para_json
+from domain.result_cache import ResultCache
+from domain.stock_manager import StockManager
+
+# Solves (distintos, sem contar os coalescidos) em andamento antes de recusar pedidos
+_LIMITE_PENDENTES = 32
+# Conexões simultâneas aceitas
+_LIMITE_CONEXOES = 64
+# Maior linha (pedido) aceita, em bytes
+_LIMITE_LINHA = 1 << 20
+# Latências guardadas por endpoint para os percentis
+_AMOSTRAS_LATENCIA = 1024
+
+# Leituras, respondidas pelo retrato (cópia somente leitura) da versão atual do estoque
+_LEITURAS = {'buscar', 'criticos', 'validade', 'resumo'}
+# Mutações baratas, feitas no laço de eventos quando nenhum solve em thread lê o estoque
+_MUTACOES = {'atualizar', 'adicionar'}
+
+
+# -------------------
+# PROCESSO TRABALHADOR
+# -------------------
+_gerenciador_trabalhador = None
+
+
+def _iniciar_trabalhador():
+    """Cria, uma vez por processo, um StockManager vazio só para usar os solvers."""
+    global _gerenciador_trabalhador
+    with contextlib.redirect_stdout(io.StringIO()):
+        _gerenciador_trabalhador = StockManager([], usar_cache=False)
+
+
+def _resolver_no_trabalhador(nome_memoria, total, orcamento, metodo, parametros):
+    """
+    Lê custos e benefícios da memória compartilhada `nome_memoria` (três
+    colunas int64 de `total` posições: custo, custo em centavos,
+    benefício) e resolve a instância. Devolve as posições escolhidas em vez
+    dos itens, que só existem no processo do serviço.
+    """
+    memoria = shared_memory.SharedMemory(name=nome_memoria)
+    try:
+        colunas = memoria.buf.cast('q')
+        custos = colunas[:total].tolist()
+        centavos = colunas[total:2 * total].tolist()
+        beneficios = colunas[2 * total:3 * total].tolist()
+        colunas.release()
+    finally:
+        memoria.close()
+
+    itens = [
+        {'custo': custo, 'custo_centavos': custo_centavos, 'beneficio': beneficio, 'posicao': posicao}
+        for posicao, (custo, custo_centavos, beneficio) in enumerate(zip(custos, centavos, beneficios))
+    ]
+    estatisticas = {}
+    beneficio_max, selecionados = _gerenciador_trabalhador._resolver_instancia(
+        itens, orcamento, metodo, parametros, estatisticas
+    )
+    return beneficio_max, [item['posicao'] for item in selecionados], estatisticas
+
+
+# -------------------
+# SERVIÇO
+# -------------------
+class _Instancia:
+    """Itens a resolver de uma versão do estoque e a cópia deles em memória compartilhada."""
+
+    def __init__(self, itens, total_criticos, estatisticas):
+        self.itens = itens
+        self.total_criticos = total_criticos
+        self.estatisticas = estatisticas
+        self.em_uso = 0
+        self.memoria = None
+        if itens:
+            colunas = array('q', [int(item['custo']) for item in itens])
+            colunas.extend(item.get('custo_centavos', 0) for item in itens)
+            colunas.extend(item['beneficio'] for item in itens)
+            self.memoria = shared_memory.SharedMemory(create=True, size=colunas.itemsize * len(colunas))
+            self.memoria.buf[:len(colunas) * colunas.itemsize] = colunas.tobytes()
+
+    def liberar(self):
+        if self.memoria is not None:
+            self.memoria.close()
+            self.memoria.unlink()
+            self.memoria = None
+
+
+class _MetricasEndpoint:
+    def __init__(self):
+        self.pedidos = 0
+        self.erros = 0
+        self.total_s = 0.0
+        self.maximo_s = 0.0
+        self._recentes = deque(maxlen=_AMOSTRAS_LATENCIA)
+
+    def registrar(self, segundos, ok):
+        self.pedidos += 1
+        self.erros += not ok
+        self.total_s += segundos
+        self.maximo_s = max(self.maximo_s, segundos)
+        self._recentes.append(segundos)
+
+    def resumo(self):
+        ordenadas = sorted(self._recentes)
+
+        def percentil(p):
+            return ordenadas[min(len(ordenadas) - 1, int(p * len(ordenadas)))] * 1000 if ordenadas else 0.0
+
+        return {
+            'pedidos': self.pedidos,
+            'erros': self.erros,
+            'media_ms': self.total_s / self.pedidos * 1000 if self.pedidos else 0.0,
+            'p50_ms': percentil(0.50),
+            'p95_ms': percentil(0.95),
+            'p99_ms': percentil(0.99),
+            'maximo_ms': self.maximo_s * 1000,
+        }
+
+
+class ServicoEstoque:
+    """
+    Serviço local assíncrono sobre um StockManager: pedidos e respostas em
+    JSON, um por linha (o formato de batch_pipeline.PipelineLote, mais as
+    operações 'metricas' e 'encerrar'), por um socket TCP local.
+
+    - Leituras (buscar, criticos, validade, resumo) vêm de um retrato por
+      versão do estoque: cada resposta é calculada uma vez por versão,
+      guardada serializada e devolvida como cópia, então nenhum pedido
+      recebe (nem altera) objetos vivos do gerenciador.
+    - Mutações baratas (atualizar, adicionar) rodam no laço de eventos,
+      depois de esperar os solves que leem o estoque em uma thread.
+    - Nenhum solve roda no laço de eventos. 'otimizar' vai para um
+      ProcessPoolExecutor: os itens críticos de cada versão do estoque são
+      copiados uma vez para memória compartilhada (custos e benefícios em
+      int64); o trabalhador lê dali e devolve só as posições escolhidas.
+      Mutações seguintes criam outra instância e não afetam os solves em
+      andamento. O método 'incremental' (que usa o estado mantido pelo
+      gerenciador) e instâncias sem itens críticos rodam em
+      asyncio.to_thread, com as mutações bloqueadas enquanto isso.
+    - Pedidos 'otimizar' idênticos (mesma versão, orçamento, método e
+      parâmetros) em andamento são coalescidos em um único solve, e
+      resultados prontos ficam em um cache LRU por versão.
+    - Contrapressão: cada conexão é atendida um pedido por vez e a resposta
+      espera o escoamento do socket (drain); com `limite_pendentes` solves
+      em andamento, novos pedidos 'otimizar' são recusados com
+      'ocupado': true, e conexões acima de `limite_conexoes` são fechadas.
+    - Latência por endpoint (média, p50, p95, p99, máximo) em metricas().
+    """
+
+    def __init__(self, gerenciador, trabalhadores=None, limite_pendentes=_LIMITE_PENDENTES,
+                 limite_conexoes=_LIMITE_CONEXOES, tamanho_cache=128):
+        self.gerenciador = gerenciador
+        self.limite_pendentes = limite_pendentes
+        self.limite_conexoes = limite_conexoes
+        self._pipeline = PipelineLote(gerenciador, agrupar=False)
+        self._executor = ProcessPoolExecutor(max_workers=trabalhadores, initializer=_iniciar_trabalhador)
+        self._cache = ResultCache(tamanho_cache)
+        self._leituras = ResultCache(tamanho_cache)
+        self._trava_estoque = asyncio.Lock()
+        self._instancias = {}
+        self._versao_instancias = None
+        self._descartadas = []
+        self._em_andamento = {}
+        self._metricas = {}
+        self._contadores = {'coalescidos': 0, 'recusados': 0, 'conexoes_recusadas': 0, 'solves': 0}
+        self._conexoes = 0
+        self._servidor = None
+        self._encerrado = None
+
+    # -------------------
+    # CICLO DE VIDA
+    # -------------------
+    async def iniciar(self, host='127.0.0.1', porta=0):
+        """Abre o socket (porta 0: o sistema escolhe) e retorna (host, porta)."""
+        self._encerrado = asyncio.Event()
+        self._servidor = await asyncio.start_server(self._atender_conexao, host, porta, limit=_LIMITE_LINHA)
+        return self._servidor.sockets[0].getsockname()[:2]
+
+    async def aguardar_encerramento(self):
+        await self._encerrado.wait()
+
+    async def encerrar(self):
+        """Fecha o socket, o pool de processos e a memória compartilhada."""
+        if self._servidor is not None:
+            self._servidor.close()
+            await self._servidor.wait_closed()
+            self._servidor = None
+        if self._em_andamento:
+            await asyncio.gather(*self._em_andamento.values(), return_exceptions=True)
+        self._executor.shutdown()
+        for instancia in [*self._instancias.values(), *self._descartadas]:
+            instancia.liberar()
+        self._instancias.clear()
+        self._descartadas.clear()
+        if self._encerrado is not None:
+            self._encerrado.set()
+
+    # -------------------
+    # PEDIDOS
+    # -------------------
+    async def atender(self, operacao):
+        """Resposta (dict) de um pedido; usado pelo socket e utilizável direto."""
+        inicio = time.perf_counter()
+        tipo = operacao.get('op') if isinstance(operacao, dict) else None
+        if tipo == 'otimizar':
+            resposta = await self._otimizar(operacao)
+        elif tipo == 'metricas':
+            resposta = {'op': tipo, 'ok': True, 'resultado': self.metricas()}
+        elif tipo == 'encerrar':
+            asyncio.get_running_loop().create_task(self.encerrar())
+            resposta = {'op': tipo, 'ok': True, 'resultado': None}
+        elif tipo in _LEITURAS:
+            resposta = self._ler(operacao)
+        elif tipo in _MUTACOES:
+            async with self._trava_estoque:
+                resposta = self._pipeline.executar_uma(operacao)
+        else:
+            resposta = self._pipeline.executar_uma(operacao)
+            tipo = 'desconhecida'
+
+        if isinstance(operacao, dict) and 'request_id' in operacao:
+            resposta['request_id'] = operacao['request_id']
+        metricas = self._metricas.setdefault(tipo, _MetricasEndpoint())
+        metricas.registrar(time.perf_counter() - inicio, resposta['ok'])
+        return resposta
+
+    def _ler(self, operacao):
+        """
+        Resposta de uma leitura a partir do retrato da versão atual: o
+        resultado é guardado como JSON (chave: versão, data do dia e pedido
+        sem o request_id) e cada resposta recebe a própria cópia.
+        """
+        pedido = {nome: valor for nome, valor in operacao.items() if nome != 'request_id'}
+        chave = (
+            self.gerenciador.versao, date.today().toordinal(),
+            json.dumps(pedido, sort_keys=True, default=str)
+        )
+        retrato = self._leituras.obter(chave)
+        if retrato is None:
+            resposta = self._pipeline.executar_uma(operacao)
+            if not resposta['ok']:
+                return resposta
+            retrato = json.dumps(resposta['resultado'], ensure_ascii=False)
+            self._leituras.guardar(chave, retrato)
+        return PipelineLote.montar_resposta(operacao, json.loads(retrato))
+
+    async def _otimizar(self, operacao):
+        try:
+            orcamento = ler_orcamento(operacao['orcamento'])
+            metodo = operacao.get('metodo', 'auto')
+            opcoes = {
+                nome: valor for nome, valor in operacao.items()
+                if nome not in ('op', 'request_id', 'orcamento', 'metodo')
+            }
+            parametros = StockManager.parametros_otimizacao(**opcoes)
+        except (KeyError, TypeError, ValueError) as erro:
+            return PipelineLote.montar_erro(operacao, erro)
+
+        chave = (self.gerenciador.versao, orcamento, metodo, tuple(sorted(parametros.items())))
+        resultado = self._cache.obter(chave)
+        if resultado is None:
+            tarefa = self._em_andamento.get(chave)
+            if tarefa is not None:
+                self._contadores['coalescidos'] += 1
+            elif len(self._em_andamento) >= self.limite_pendentes:
+                self._contadores['recusados'] += 1
+                resposta = PipelineLote.montar_erro(operacao, "Serviço ocupado: tente de novo em instantes")
+                resposta['ocupado'] = True
+                return resposta
+            else:
+                tarefa = asyncio.ensure_future(self._resolver(orcamento, metodo, parametros))
+                self._em_andamento[chave] = tarefa
+                tarefa.add_done_callback(lambda _: self._em_andamento.pop(chave, None))
+            try:
+                resultado = await asyncio.shield(tarefa)
+            except Exception as erro:
+                # Falha do solver (ou do processo trabalhador) vira resposta de erro,
+                # sem derrubar a conexão nem os pedidos coalescidos
+                return PipelineLote.montar_erro(operacao, erro)
+            self._cache.guardar(chave, resultado)
+        return PipelineLote.montar_resposta(operacao, resultado)
+
+    async def _resolver(self, orcamento, metodo, parametros):
+        """Monta (ou reaproveita) a instância da versão atual e resolve no pool."""
+        if metodo == 'incremental':
+            # Usa o estado incremental mantido pelo gerenciador (que pode ter de ser refeito)
+            return await self._resolver_em_thread(orcamento, metodo, parametros)
+
+        instancia = self._instancia(metodo, parametros)
+        if not instancia.itens:
+            return await self._resolver_em_thread(orcamento, metodo, parametros)
+
+        instancia.em_uso += 1
+        try:
+            beneficio_max, posicoes, estatisticas = await asyncio.get_running_loop().run_in_executor(
+                self._executor, _resolver_no_trabalhador,
+                instancia.memoria.name, len(instancia.itens), orcamento, metodo, parametros
+            )
+        finally:
+            instancia.em_uso -= 1
+            self._liberar_descartadas()
+        self._contadores['solves'] += 1
+
+        estatisticas = {**instancia.estatisticas, **estatisticas}
+        resultado = self.gerenciador._finalizar_otimizacao(
+            beneficio_max, [instancia.itens[posicao] for posicao in posicoes], orcamento, metodo,
+            parametros, instancia.total_criticos, estatisticas
+        )
+        return resultado_para_json(resultado)
+
+    async def _resolver_em_thread(self, orcamento, metodo, parametros):
+        """Resolve com o próprio gerenciador em uma thread, sem mutações no meio."""
+        async with self._trava_estoque:
+            # Índices pendentes são montados aqui, no laço: na thread o solve só
+            # lê o estoque, e as leituras do laço não disputam a construção
+            self.gerenciador.estoque._garantir_indices()
+            resultado = await asyncio.to_thread(
+                self.gerenciador.otimizar_reabastecimento, orcamento, metodo, **parametros
+            )
+        self._contadores['solves'] += 1
+        return resultado_para_json(resultado)
+
+    def _instancia(self, metodo, parametros):
+        versao = self.gerenciador.versao
+        if versao != self._versao_instancias:
+            # Estoque mudou: instâncias antigas saem quando nenhum solve as usa
+            self._descartadas.extend(self._instancias.values())
+            self._instancias = {}
+            self._versao_instancias = versao
+            self._liberar_descartadas()
+
+        chave = (parametros['precisao'], parametros['modo'], parametros['categoria'], parametros['local'])
+        instancia = self._instancias.get(chave)
+        if instancia is None:
+            itens, total_criticos, estatisticas = self.gerenciador._preparar_instancia(metodo, parametros)
+            instancia = self._instancias[chave] = _Instancia(itens, total_criticos, estatisticas)
+        return instancia
+
+    def _liberar_descartadas(self):
+        restantes = []
+        for instancia in self._descartadas:
+            if instancia.em_uso:
+                restantes.append(instancia)
+            else:
+                instancia.liberar()
+        self._descartadas = restantes
+
+    def metricas(self):
+        """Latência por endpoint, contadores de coalescência/recusa, cache e conexões."""
+        return {
+            'endpoints': {nome: metricas.resumo() for nome, metricas in sorted(self._metricas.items())},
+            **self._contadores,
+            'solves_em_andamento': len(self._em_andamento),
+            'conexoes': self._conexoes,
+            'cache': self._cache.estatisticas(),
+            'cache_leituras': self._leituras.estatisticas(),
+            'versao_estoque': self.gerenciador.versao,
+        }
+
+    # -------------------
+    # SOCKET
+    # -------------------
+    async def _atender_conexao(self, leitor, escritor):
+        if self._conexoes >= self.limite_conexoes:
+            self._contadores['conexoes_recusadas'] += 1
+            escritor.write(b'{"ok": false, "erro": "Limite de conexoes atingido", "ocupado": true}\n')
+            await escritor.drain()
+            escritor.close()
+            return
+
+        self._conexoes += 1
+        try:
+            while True:
+                try:
+                    linha = await leitor.readline()
+                except ValueError:
+                    # Linha acima do limite do leitor: não há como ressincronizar
+                    escritor.write(b'{"ok": false, "erro": "Pedido grande demais"}\n')
+                    break
+                if not linha:
+                    break
+                if not linha.strip():
+                    continue
+                try:
+                    operacao = json.loads(linha)
+                except json.JSONDecodeError as erro:
+                    resposta = {'op': None, 'ok': False, 'erro': f"JSON inválido: {erro}"}
+                else:
+                    resposta = await self.atender(operacao)
+                escritor.write(json.dumps(resposta, ensure_ascii=False).encode('utf-8') + b'\n')
+                await escritor.drain()
+        except ConnectionError:
+            pass
+        finally:
+            self._conexoes -= 1
+            escritor.close()
+
+
+async def enviar_pedidos(host, porta, operacoes):
+    """Cliente simples: envia `operacoes` por uma conexão e devolve as respostas em ordem."""
+    leitor, escritor = await asyncio.open_connection(host, porta, limit=_LIMITE_LINHA)
+    try:
+        respostas = []
+        for operacao in operacoes:
+            escritor.write(json.dumps(operacao).encode('utf-8') + b'\n')
+            await escritor.drain()
+            respostas.append(json.loads(await leitor.readline()))
+        return respostas
+    finally:
+        escritor.close()
+        await escritor.wait_closed()
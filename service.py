@@ -0,0 +1,49 @@
+"""
+Serviço local de consultas ao estoque (ver domain/stock_service.py): um
+pedido JSON por linha por TCP, com as otimizações em processos separados.
+
+    python service.py --porta 8765
+    echo '{"op": "buscar", "id": 1}' | nc 127.0.0.1 8765
+    echo '{"op": "metricas"}' | nc 127.0.0.1 8765
+"""
+import argparse
+import asyncio
+
+from domain.inventory_snapshot import EstoquePersistente
+from domain.stock_manager import StockManager
+from domain.stock_service import ServicoEstoque
+
+
+async def servir(opcoes):
+    persistencia = EstoquePersistente(opcoes.dados) if opcoes.dados else None
+    gerenciador = StockManager(opcoes.estoque, persistencia=persistencia)
+    servico = ServicoEstoque(
+        gerenciador, trabalhadores=opcoes.trabalhadores, limite_pendentes=opcoes.limite_pendentes
+    )
+    host, porta = await servico.iniciar(opcoes.host, opcoes.porta)
+    print(f"Serviço ouvindo em {host}:{porta} (envie {{\"op\": \"encerrar\"}} para parar)")
+    try:
+        await servico.aguardar_encerramento()
+    finally:
+        await servico.encerrar()
+        if persistencia is not None:
+            persistencia.fechar()
+
+
+def main(argumentos=None):
+    parser = argparse.ArgumentParser(description="Serviço local de consultas ao estoque.")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--porta', type=int, default=8765)
+    parser.add_argument('--estoque', default='data.json', help="arquivo de itens (JSON ou NDJSON)")
+    parser.add_argument('--dados', help="diretório de snapshot + journal (como o do app.py)")
+    parser.add_argument('--trabalhadores', type=int, help="processos para as otimizações")
+    parser.add_argument('--limite-pendentes', type=int, default=32,
+                        help="otimizações em andamento antes de recusar novos pedidos")
+    try:
+        asyncio.run(servir(parser.parse_args(argumentos)))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == '__main__':
+    main()
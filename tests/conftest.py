@@ -0,0 +1,83 @@
+import contextlib
+import io
+import random
+
+import pytest
+
+from domain.item_store import ItemStore
+from domain.stock_manager import StockManager
+
+
+@pytest.fixture
+def criar_gerenciador():
+    """Fábrica de StockManager sem as mensagens de inicialização."""
+    def criar(itens, **opcoes):
+        with contextlib.redirect_stdout(io.StringIO()):
+            return StockManager(itens, **opcoes)
+    return criar
+
+
+def item_estoque(item_id, quantidade, ideal, preco, validade=None, nome=None,
+                 categoria='Analgésicos', local='Prateleira A1 - Farmácia'):
+    """Item no formato do data.json."""
+    return {
+        'id': item_id,
+        'itemName': nome if nome is not None else f'Item {item_id:03d}',
+        'category': categoria,
+        'quantity': quantidade,
+        'ideal_quantity': ideal,
+        'unity_price': preco,
+        'location': local,
+        'expiryDate': validade
+    }
+
+
+def loja_exemplo():
+    """ItemStore de quatro itens: dois críticos em Analgésicos, um sem validade."""
+    return ItemStore([
+        item_estoque(1, 5, 10, 2.0, '2026-03-01', 'Dipirona 500mg', 'Analgésicos', 'A1'),
+        item_estoque(2, 20, 10, 1.5, None, 'Amoxicilina 500mg', 'Antibióticos', 'B1'),
+        item_estoque(3, 0, 4, 10.0, '2026-01-15', 'Diclofenaco 50mg', 'Anti-inflamatórios', 'A1'),
+        item_estoque(4, 9, 10, 3.0, '2026-02-01', 'Dipirona 1g', 'Analgésicos', 'B1'),
+    ])
+
+
+def estoque_aleatorio(semente, n, preco_maximo=20.0, repetidos=0, custo_zero=0, preco_minimo=0.1):
+    """
+    Estoque pequeno e sorteado, com preços entre `preco_minimo` e
+    `preco_maximo` (abaixo de R$ 1, um déficit de 1 unidade custa 0 em
+    reais): `repetidos` itens copiam preço e
+    quantidades de outro (empates de custo e benefício) e `custo_zero`
+    itens têm déficit de 1 unidade a menos de R$ 1 (custo 0 em reais).
+    """
+    aleatorio = random.Random(semente)
+    itens = []
+    for item_id in range(1, n + 1):
+        ideal = aleatorio.randint(2, 40)
+        itens.append(item_estoque(
+            item_id, aleatorio.randint(0, ideal), ideal,
+            round(aleatorio.uniform(preco_minimo, preco_maximo), 2)
+        ))
+    for item in aleatorio.sample(itens, min(repetidos, n)):
+        modelo = aleatorio.choice(itens)
+        item.update(quantity=modelo['quantity'], ideal_quantity=modelo['ideal_quantity'],
+                    unity_price=modelo['unity_price'])
+    for item in aleatorio.sample(itens, min(custo_zero, n)):
+        item.update(quantity=item['ideal_quantity'] - 1, unity_price=round(aleatorio.uniform(0.1, 0.9), 2))
+    return itens
+
+
+def plano_viavel(resultado, orcamento):
+    """O plano cabe no orçamento e o benefício informado é a soma dos itens escolhidos."""
+    return (resultado['custo_total'] <= orcamento
+            and sum(item['beneficio'] for item in resultado['itens_selecionados'])
+            == resultado['beneficio_maximo'])
+
+
+def mochila_referencia(custos, beneficios, capacidade):
+    """Valor ótimo de uma mochila 0/1 pequena por PD simples (referência dos testes)."""
+    melhor = [0] * (capacidade + 1)
+    for custo, beneficio in zip(custos, beneficios):
+        for w in range(capacidade, custo - 1, -1):
+            melhor[w] = max(melhor[w], melhor[w - custo] + beneficio)
+    return melhor[capacidade]
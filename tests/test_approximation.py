@@ -0,0 +1,30 @@
+import pytest
+
+from conftest import estoque_aleatorio, plano_viavel
+
+
+@pytest.mark.parametrize('epsilon', [0.5, 0.1, 0.01])
+@pytest.mark.parametrize('semente', range(5))
+def test_aproximado_respeita_a_garantia(criar_gerenciador, epsilon, semente):
+    gerenciador = criar_gerenciador(estoque_aleatorio(semente, 20, preco_maximo=80.0), usar_cache=False)
+    otimo = gerenciador.otimizar_reabastecimento(1500, 'vetorizado', preprocessar=False)['beneficio_maximo']
+    resultado = gerenciador.otimizar_reabastecimento(1500, 'aproximado', epsilon=epsilon, preprocessar=False)
+    assert plano_viavel(resultado, 1500)
+    assert (1 - epsilon) * otimo <= resultado['beneficio_maximo'] <= otimo
+
+
+@pytest.mark.parametrize('epsilon', [0, 1, -0.1])
+def test_aproximado_rejeita_epsilon_fora_do_intervalo(criar_gerenciador, epsilon):
+    gerenciador = criar_gerenciador(estoque_aleatorio(0, 5), usar_cache=False)
+    with pytest.raises(ValueError):
+        gerenciador.otimizar_reabastecimento(100, 'aproximado', epsilon=epsilon, preprocessar=False)
+
+
+def test_aproximado_com_epsilon_pequeno_e_exato(criar_gerenciador):
+    # Fator de escala abaixo de 1: os benefícios não são reduzidos
+    gerenciador = criar_gerenciador(estoque_aleatorio(2, 8, preco_minimo=1.0), usar_cache=False)
+    resultado = gerenciador.otimizar_reabastecimento(200, 'aproximado', epsilon=1e-6, preprocessar=False)
+    otimo = gerenciador.otimizar_reabastecimento(200, 'iterativo', preprocessar=False)
+    assert resultado['estatisticas']['fator_escala'] == 1.0
+    assert resultado['beneficio_maximo'] == otimo['beneficio_maximo']
+    assert resultado['estatisticas']['limite_superior_otimo'] == resultado['beneficio_maximo']
@@ -0,0 +1,87 @@
+import io
+import json
+
+import pytest
+
+from conftest import estoque_aleatorio
+from domain.batch_pipeline import PipelineLote, ler_orcamento
+
+
+@pytest.fixture
+def pipeline(criar_gerenciador):
+    return PipelineLote(criar_gerenciador(estoque_aleatorio(1, 10)))
+
+
+def _processar(pipeline, operacoes):
+    entrada = io.StringIO(''.join(json.dumps(operacao) + '\n' for operacao in operacoes))
+    saida = io.StringIO()
+    pipeline.processar(entrada, saida)
+    return [json.loads(linha) for linha in saida.getvalue().splitlines()]
+
+
+@pytest.mark.parametrize('valor', ['inf', '-inf', 'nan', -1, '1e400', 'mil'])
+def test_ler_orcamento_rejeita_valores_invalidos(valor):
+    with pytest.raises(ValueError):
+        ler_orcamento(valor)
+
+
+@pytest.mark.parametrize('agrupar', [True, False])
+def test_orcamento_invalido_nao_interrompe_o_lote(criar_gerenciador, agrupar):
+    pipeline = PipelineLote(criar_gerenciador(estoque_aleatorio(1, 10)), agrupar=agrupar)
+    respostas = _processar(pipeline, [
+        {'op': 'otimizar', 'orcamento': 100, 'metodo': 'iterativo', 'request_id': 1},
+        {'op': 'otimizar', 'orcamento': 'inf', 'metodo': 'iterativo', 'request_id': 2},
+        {'op': 'otimizar', 'orcamento': 'nan', 'request_id': 3},
+        {'op': 'otimizar', 'orcamento': -5, 'metodo': 'dual', 'request_id': 4},
+        {'op': 'otimizar', 'orcamento': 200, 'metodo': 'iterativo', 'request_id': 5},
+        {'op': 'buscar', 'id': 1, 'request_id': 6},
+    ])
+    assert [resposta['request_id'] for resposta in respostas] == [1, 2, 3, 4, 5, 6]
+    assert [resposta['ok'] for resposta in respostas] == [True, False, False, False, True, True]
+    assert 'Orçamento inválido' in respostas[1]['erro']
+
+
+def test_erro_de_memoria_vira_resposta_de_erro(pipeline, monkeypatch):
+    def sem_memoria(*argumentos, **opcoes):
+        raise MemoryError
+
+    monkeypatch.setattr(pipeline.gerenciador, 'otimizar_reabastecimento', sem_memoria)
+    respostas = _processar(pipeline, [
+        {'op': 'otimizar', 'orcamento': 100, 'metodo': 'dual'},
+        {'op': 'buscar', 'id': 2},
+    ])
+    assert respostas[0]['ok'] is False and 'Memória' in respostas[0]['erro']
+    assert respostas[1]['ok'] is True
+
+
+def test_pedidos_agrupados_tem_o_otimo_de_cada_orcamento(criar_gerenciador):
+    gerenciador = criar_gerenciador(estoque_aleatorio(4, 12, preco_minimo=1.0), usar_cache=False)
+    pipeline = PipelineLote(gerenciador)
+    orcamentos = [30, 150, 90]
+    respostas = _processar(pipeline, [
+        {'op': 'otimizar', 'orcamento': orcamento, 'metodo': 'iterativo'} for orcamento in orcamentos
+    ])
+    assert pipeline.resolucoes == 1 and pipeline.agrupadas == 3
+    for orcamento, resposta in zip(orcamentos, respostas):
+        esperado = gerenciador.otimizar_reabastecimento(orcamento, 'iterativo')
+        assert resposta['resultado']['beneficio_maximo'] == esperado['beneficio_maximo']
+
+
+@pytest.mark.parametrize('agrupar', [True, False])
+def test_linha_malformada_no_meio_do_lote(criar_gerenciador, agrupar):
+    pipeline = PipelineLote(criar_gerenciador(estoque_aleatorio(1, 10)), agrupar=agrupar)
+    entrada = io.StringIO(
+        '{"op": "buscar", "id": 1}\n'
+        '\n'
+        '{"op": "otimizar", "orcamento": 50, "metodo": "iterativo"}\n'
+        '{"op": "otimizar", "orcamento": \n'
+        '[1, 2]\n'
+        '{"op": "otimizar", "orcamento": 80, "metodo": "iterativo"}\n'
+        '{"op": "buscar", "id": 2}\n'
+    )
+    saida = io.StringIO()
+    estatisticas = pipeline.processar(entrada, saida)
+    respostas = [json.loads(linha) for linha in saida.getvalue().splitlines()]
+    assert [resposta['ok'] for resposta in respostas] == [True, True, False, False, True, True]
+    assert respostas[2]['linha'] == 4 and 'linha 4' in respostas[2]['erro']
+    assert estatisticas['operacoes'] == 6
@@ -0,0 +1,92 @@
+import copy
+
+import pytest
+
+from domain.benchmark_suite import (
+    VERSAO_BASELINE, carregar_baseline, comparar_baselines, executar_suite, salvar_baseline
+)
+
+
+def _baseline(**resultados):
+    return {'versao': VERSAO_BASELINE, 'resultados': resultados}
+
+
+def _medicao(segundos, memoria=0, beneficio=None):
+    registro = {'segundos': segundos, 'pico_memoria_bytes': memoria}
+    if beneficio is not None:
+        registro['beneficio_maximo'] = beneficio
+    return registro
+
+
+def test_sinaliza_regressao_e_melhoria_acima_do_limiar():
+    base = _baseline(lento=_medicao(1.0), rapido=_medicao(1.0), estavel=_medicao(1.0))
+    atual = _baseline(lento=_medicao(1.5), rapido=_medicao(0.5), estavel=_medicao(1.1))
+
+    comparacao = comparar_baselines(base, atual, limiar=0.2)
+    assert [(e['chave'], e['metrica']) for e in comparacao['regressoes']] == [('lento', 'segundos')]
+    assert comparacao['regressoes'][0]['razao'] == pytest.approx(1.5)
+    assert [e['chave'] for e in comparacao['melhorias']] == ['rapido']
+    assert comparacao['divergencias'] == []
+
+
+def test_diferencas_abaixo_do_piso_sao_ruido():
+    base = _baseline(op=_medicao(1e-4, memoria=1_000))
+    atual = _baseline(op=_medicao(5e-4, memoria=50_000))
+    comparacao = comparar_baselines(base, atual)
+    assert comparacao['regressoes'] == [] and comparacao['melhorias'] == []
+
+    comparacao = comparar_baselines(base, atual, piso_segundos=0, piso_memoria=0)
+    assert {e['metrica'] for e in comparacao['regressoes']} == {'segundos', 'pico_memoria_bytes'}
+
+
+def test_beneficio_diferente_e_divergencia():
+    base = _baseline(otimizar=_medicao(1.0, beneficio=100))
+    atual = _baseline(otimizar=_medicao(1.0, beneficio=99))
+    comparacao = comparar_baselines(base, atual)
+    assert comparacao['divergencias'] == [
+        {'chave': 'otimizar', 'metrica': 'beneficio_maximo', 'base': 100, 'atual': 99}
+    ]
+    assert comparacao['regressoes'] == []
+
+
+def test_chaves_puladas_e_novas():
+    base = _baseline(sumiu=_medicao(1.0), pulada=_medicao(1.0), antes_pulada={'pulado': 'lento'})
+    atual = _baseline(pulada={'erro': 'RecursionError'}, antes_pulada=_medicao(1.0), nova=_medicao(1.0))
+    comparacao = comparar_baselines(base, atual)
+    assert comparacao['nao_medidas'] == ['pulada', 'sumiu']
+    assert comparacao['novas'] == ['antes_pulada', 'nova']
+
+
+def test_limiar_negativo_e_rejeitado():
+    with pytest.raises(ValueError):
+        comparar_baselines(_baseline(), _baseline(), limiar=-0.1)
+
+
+def test_suite_pequena_ida_e_volta(tmp_path):
+    baseline = executar_suite(
+        escalas=(10,), orcamentos=(1_000,), metodos=('iterativo', 'branch_and_bound'),
+        repeticoes=1, medir_memoria=False
+    )
+    otimizacoes = [
+        registro for registro in baseline['resultados'].values()
+        if registro['grupo'] == 'otimizar' and 'segundos' in registro
+    ]
+    assert {registro['operacao'] for registro in otimizacoes} == {'iterativo', 'branch_and_bound'}
+    assert len({registro['beneficio_maximo'] for registro in otimizacoes}) == 1
+
+    caminho = tmp_path / 'baseline.json'
+    salvar_baseline(baseline, caminho)
+    assert carregar_baseline(caminho) == baseline
+
+    piorada = copy.deepcopy(baseline)
+    for registro in piorada['resultados'].values():
+        if 'segundos' in registro:
+            registro['segundos'] = registro['segundos'] * 10 + 1
+    comparacao = comparar_baselines(baseline, piorada)
+    assert len(comparacao['regressoes']) == sum(
+        1 for registro in baseline['resultados'].values() if 'segundos' in registro
+    )
+
+    (tmp_path / 'outra.json').write_text('{"versao": 0}', encoding='utf-8')
+    with pytest.raises(ValueError):
+        carregar_baseline(tmp_path / 'outra.json')
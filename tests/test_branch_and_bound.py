@@ -0,0 +1,19 @@
+from conftest import estoque_aleatorio, plano_viavel
+
+
+def test_branch_and_bound_prova_o_otimo(criar_gerenciador):
+    gerenciador = criar_gerenciador(estoque_aleatorio(3, 30), usar_cache=False)
+    resultado = gerenciador.otimizar_reabastecimento(500, 'branch_and_bound', preprocessar=False)
+    referencia = gerenciador.otimizar_reabastecimento(500, 'vetorizado', preprocessar=False)
+    assert resultado['estatisticas']['otimo_provado'] is True
+    assert resultado['beneficio_maximo'] == referencia['beneficio_maximo']
+
+
+def test_branch_and_bound_interrompido_devolve_plano_viavel(criar_gerenciador):
+    gerenciador = criar_gerenciador(estoque_aleatorio(5, 40), usar_cache=False)
+    resultado = gerenciador.otimizar_reabastecimento(
+        800, 'branch_and_bound', limite_nos=5, preprocessar=False
+    )
+    estatisticas = resultado['estatisticas']
+    assert plano_viavel(resultado, 800)
+    assert estatisticas['limite_superior'] >= resultado['beneficio_maximo']
@@ -0,0 +1,49 @@
+import itertools
+import math
+
+import pytest
+
+from conftest import estoque_aleatorio, item_estoque
+
+
+@pytest.mark.parametrize('semente', range(6))
+def test_centavos_e_exato(criar_gerenciador, semente):
+    itens = estoque_aleatorio(semente, 9, preco_maximo=3.0)
+    gerenciador = criar_gerenciador(itens, usar_cache=False)
+    orcamento = 23.57
+    criticos = gerenciador._montar_itens_criticos('centavos')
+
+    # Força bruta sobre os subconjuntos, em centavos
+    melhor = 0
+    for escolha in itertools.product((0, 1), repeat=len(criticos)):
+        custo = sum(item['custo_centavos'] for item, usar in zip(criticos, escolha) if usar)
+        if custo <= 2357:
+            melhor = max(melhor, sum(item['beneficio'] for item, usar in zip(criticos, escolha) if usar))
+
+    for metodo in ('iterativo', 'vetorizado', 'esparso', 'auto'):
+        resultado = gerenciador.otimizar_reabastecimento(orcamento, metodo, precisao='centavos')
+        assert resultado['beneficio_maximo'] == melhor, metodo
+        assert math.isclose(
+            resultado['custo_total'],
+            sum(item['custo_centavos'] for item in resultado['itens_selecionados']) / 100
+        )
+        assert resultado['custo_total'] <= orcamento
+
+
+def test_centavos_reduz_a_capacidade_pelo_mdc(criar_gerenciador):
+    itens = [item_estoque(1, 0, 2, 0.50), item_estoque(2, 0, 4, 0.25), item_estoque(3, 0, 3, 1.50)]
+    gerenciador = criar_gerenciador(itens, usar_cache=False)
+    resultado = gerenciador.otimizar_reabastecimento(3.00, 'iterativo', precisao='centavos')
+    estatisticas = resultado['estatisticas']
+    # Custos de 100, 100 e 450 centavos: MDC 50, capacidade 300 / 50 = 6
+    assert estatisticas['mdc_custos'] == 50
+    assert estatisticas['capacidade_comprimida'] <= 6
+    assert resultado['custo_total'] == 2.0
+
+
+def test_centavos_nunca_passa_do_orcamento_arredondado_para_baixo(criar_gerenciador):
+    # R$ 3,999: a capacidade é 399 centavos, então o item de R$ 4,00 não cabe
+    gerenciador = criar_gerenciador([item_estoque(1, 0, 1, 4.00)], usar_cache=False)
+    resultado = gerenciador.otimizar_reabastecimento(3.999, 'iterativo', precisao='centavos')
+    assert resultado['itens_selecionados'] == []
+    assert resultado['estatisticas']['capacidade_bruta'] == 399
@@ -0,0 +1,31 @@
+import pytest
+
+from conftest import estoque_aleatorio
+
+
+def test_dual_independe_do_orcamento(criar_gerenciador):
+    gerenciador = criar_gerenciador(estoque_aleatorio(11, 12, preco_maximo=2.0), usar_cache=False)
+    grande = gerenciador.otimizar_reabastecimento(10_000_000, 'dual', preprocessar=False)
+    assert len(grande['itens_selecionados']) == len(gerenciador.estoque.linhas_criticas())
+
+
+@pytest.mark.parametrize('semente', range(4))
+def test_comparacao_pula_a_dual_com_itens_de_custo_zero(criar_gerenciador, capsys, semente):
+    gerenciador = criar_gerenciador(estoque_aleatorio(semente, 10, custo_zero=3), usar_cache=False)
+    resultados = gerenciador.comparar_metodos_pd(60)
+    assert 'dual' not in resultados
+    assert len({resultado['beneficio_maximo'] for resultado in resultados.values()}) == 1
+    assert 'TODOS OS MÉTODOS PRODUZEM RESULTADOS IDÊNTICOS' in capsys.readouterr().out
+
+
+@pytest.mark.parametrize('semente', range(6))
+def test_planejador_nao_escolhe_dual_nem_bnb_com_itens_de_custo_zero(criar_gerenciador, semente):
+    gerenciador = criar_gerenciador(
+        estoque_aleatorio(semente, 12, preco_maximo=2.0, custo_zero=2), usar_cache=False
+    )
+    plano = gerenciador.planejar_reabastecimento(2_000)
+    assert plano['itens_custo_zero'] >= 1
+    assert plano['metodo_escolhido'] not in ('dual', 'branch_and_bound')
+    resultado = gerenciador.otimizar_reabastecimento(2_000, 'auto', preprocessar=False)
+    referencia = gerenciador.otimizar_reabastecimento(2_000, 'iterativo', preprocessar=False)
+    assert resultado['beneficio_maximo'] == referencia['beneficio_maximo']
@@ -0,0 +1,49 @@
+import random
+
+import pytest
+
+from conftest import estoque_aleatorio, item_estoque
+
+
+def _mutar(gerenciador, aleatorio, proximo_id):
+    if aleatorio.random() < 0.3:
+        gerenciador.adicionar_item(item_estoque(
+            proximo_id, aleatorio.randint(0, 10), 12, round(aleatorio.uniform(0.1, 15.0), 2)
+        ))
+        return proximo_id + 1
+    item = aleatorio.choice(list(gerenciador.estoque))
+    gerenciador.atualizar_quantidade(item['id'], aleatorio.randint(0, item['ideal_quantity']))
+    return proximo_id
+
+
+@pytest.mark.parametrize('semente', range(6))
+@pytest.mark.parametrize('custo_zero', [0, 3])
+def test_incremental_acompanha_as_mutacoes(criar_gerenciador, semente, custo_zero):
+    itens = estoque_aleatorio(semente, 15, custo_zero=custo_zero)
+    gerenciador = criar_gerenciador(itens, usar_cache=False)
+    gerenciador.manter_estado_incremental(400)
+    aleatorio = random.Random(semente)
+    proximo_id = len(itens) + 1
+    for _ in range(12):
+        for _ in range(aleatorio.randint(1, 3)):
+            proximo_id = _mutar(gerenciador, aleatorio, proximo_id)
+        orcamento = aleatorio.randint(0, 400)
+        incremental = gerenciador.otimizar_reabastecimento(orcamento, 'incremental')
+        referencia = gerenciador.otimizar_reabastecimento(orcamento, 'iterativo')
+        assert incremental['beneficio_maximo'] == referencia['beneficio_maximo']
+        assert incremental['custo_total'] <= orcamento
+
+
+def test_custo_zero_resolve_do_zero(criar_gerenciador):
+    itens = [item_estoque(1, 9, 10, 0.50), item_estoque(2, 0, 2, 3.00), item_estoque(3, 0, 1, 6.00)]
+    gerenciador = criar_gerenciador(itens, usar_cache=False)
+    gerenciador.manter_estado_incremental(6)
+    # O item 1 volta ao fim da sequência do estado
+    gerenciador.atualizar_quantidade(1, 8)
+    gerenciador.atualizar_quantidade(1, 9)
+    resultado = gerenciador.otimizar_reabastecimento(6, 'incremental')
+    assert resultado['estatisticas']['resolucao_completa'] is True
+    referencia = gerenciador.otimizar_reabastecimento(6, 'iterativo')
+    assert resultado['beneficio_maximo'] == referencia['beneficio_maximo']
+    assert ([item['item']['id'] for item in resultado['itens_selecionados']]
+            == [item['item']['id'] for item in referencia['itens_selecionados']])
@@ -0,0 +1,68 @@
+import io
+import json
+
+import pytest
+
+from conftest import item_estoque
+from domain.inventory_loader import carregar_estoque, ler_registros
+from domain.item_store import ItemStore
+
+_ITENS = [item_estoque(i, i % 7, 10, 1.25 * i, nome=f'Item {i:03d}') for i in range(1, 41)]
+
+
+def _ids(registros):
+    return [registro['id'] for registro in registros]
+
+
+@pytest.mark.parametrize('tamanho_bloco', [7, 64, 1 << 16])
+def test_array_json(tamanho_bloco):
+    texto = json.dumps(_ITENS, indent=2)
+    assert _ids(ler_registros(io.StringIO(texto), tamanho_bloco)) == _ids(_ITENS)
+
+
+@pytest.mark.parametrize('tamanho_bloco', [7, 64, 1 << 16])
+def test_ndjson(tamanho_bloco):
+    texto = '\n'.join(json.dumps(item) for item in _ITENS) + '\n\n'
+    assert _ids(ler_registros(io.StringIO(texto), tamanho_bloco)) == _ids(_ITENS)
+
+
+@pytest.mark.parametrize('tamanho_bloco', [5, 1 << 16])
+def test_arrays_em_partes(tamanho_bloco):
+    partes = [_ITENS[:15], _ITENS[15:16], [], _ITENS[16:]]
+    texto = '\n'.join(json.dumps(parte) for parte in partes)
+    assert _ids(ler_registros(io.StringIO(texto), tamanho_bloco)) == _ids(_ITENS)
+
+
+def test_le_de_um_caminho(tmp_path):
+    caminho = tmp_path / 'estoque.ndjson'
+    caminho.write_text('\n'.join(json.dumps(item) for item in _ITENS[:3]), encoding='utf-8')
+    assert _ids(ler_registros(caminho)) == [1, 2, 3]
+    assert _ids(ler_registros(str(caminho))) == [1, 2, 3]
+
+
+@pytest.mark.parametrize('texto, mensagem', [
+    ('[{"id": 1}, {"id": 2', 'JSON inválido'),
+    ('{"id": 1}\n{"id": }\n', 'JSON inválido'),
+    ('[{"id": 1}', 'não terminado'),
+    ('[[{"id": 1}]]', 'aninhados'),
+    ('{"id": 1}]', 'sem array aberto'),
+    ('[1, 2]', 'deve ser um objeto'),
+])
+def test_entrada_malformada_e_rejeitada(texto, mensagem):
+    with pytest.raises(ValueError, match=mensagem):
+        list(ler_registros(io.StringIO(texto), 4))
+
+
+def test_carga_em_lotes_monta_os_indices_no_primeiro_uso():
+    estoque = ItemStore([])
+    carregados = []
+    estatisticas = carregar_estoque(
+        io.StringIO(json.dumps(_ITENS)), estoque, tamanho_lote=16, ao_carregar_lote=carregados.append
+    )
+    assert estatisticas['registros'] == len(_ITENS)
+    assert carregados == [16, 32, 40]
+    assert estoque.visao_por_id(25)['itemName'] == 'Item 025'
+    assert len(estoque.linhas_criticas()) == sum(1 for item in _ITENS if item['quantity'] < 10)
+
+    with pytest.raises(ValueError):
+        carregar_estoque(io.StringIO('[]'), estoque, tamanho_lote=0)
@@ -0,0 +1,113 @@
+import json
+
+import pytest
+
+from conftest import item_estoque
+from domain.inventory_snapshot import EstoquePersistente, JournalEstoque, SnapshotEstoque
+from domain.item_store import ItemStore
+
+
+def _origem(tmp_path, itens):
+    caminho = tmp_path / 'origem.json'
+    caminho.write_text(json.dumps(itens), encoding='utf-8')
+    return str(caminho)
+
+
+def _itens():
+    return [
+        item_estoque(1, 5, 10, 2.0, '2026-03-01', 'Dipirona 500mg'),
+        item_estoque(2, 20, 10, 1.5, None, 'Amoxicilina 500mg'),
+        dict(item_estoque(3, 0, 4, 10.0, '2026-01-15', 'Diclofenaco 50mg'), lote='L-3'),
+    ]
+
+
+def _abrir(diretorio, origem=None, **opcoes):
+    persistencia = EstoquePersistente(str(diretorio), **opcoes)
+    estoque = ItemStore()
+    estatisticas = persistencia.abrir(estoque, origem)
+    return persistencia, estoque, estatisticas
+
+
+def test_primeira_abertura_le_o_json_e_grava_o_snapshot(tmp_path):
+    persistencia, estoque, estatisticas = _abrir(tmp_path / 'dados', _origem(tmp_path, _itens()))
+    persistencia.fechar()
+    assert estatisticas['fonte'] == 'json'
+    assert [dict(item) for item in estoque] == _itens()
+
+    _, reaberto, estatisticas = _abrir(tmp_path / 'dados')
+    assert estatisticas['fonte'] == 'snapshot'
+    assert [dict(item) for item in reaberto] == _itens()
+
+
+def test_journal_reaplica_mutacoes_na_reabertura(tmp_path):
+    persistencia, estoque, _ = _abrir(tmp_path / 'dados', _origem(tmp_path, _itens()))
+    novo = estoque.append(item_estoque(4, 1, 3, 7.0, '2027-01-01', 'Seringa 5ml'))
+    persistencia.registrar_adicao(novo)
+    estoque.visao_por_id(1)['quantity'] = 9
+    persistencia.registrar_quantidade(1, 9)
+    estoque.visao_por_id(2)['quantity'] = 0
+    estoque.visao_por_id(2)['ideal_quantity'] = 30
+    persistencia.registrar_quantidade(2, 0, 30)
+    esperado = [dict(item) for item in estoque]
+    persistencia.fechar()
+
+    persistencia, reaberto, estatisticas = _abrir(tmp_path / 'dados')
+    assert estatisticas['journal_reaplicado'] == 3
+    assert [dict(item) for item in reaberto] == esperado
+    assert reaberto.mais_criticos()[0]['id'] == 2
+
+
+def test_journal_cheio_e_compactado(tmp_path):
+    persistencia, estoque, _ = _abrir(tmp_path / 'dados', _origem(tmp_path, _itens()), limite_journal=2)
+    for quantidade in (1, 2, 3):
+        estoque.visao_por_id(1)['quantity'] = quantidade
+        persistencia.registrar_quantidade(1, quantidade)
+    persistencia.fechar()
+    assert persistencia.compactacoes == 2
+    assert persistencia.journal.entradas == 1
+
+    _, reaberto, estatisticas = _abrir(tmp_path / 'dados', limite_journal=2)
+    assert estatisticas['journal_reaplicado'] == 1
+    assert reaberto.visao_por_id(1)['quantity'] == 3
+
+
+def test_snapshot_aberto_por_mmap(tmp_path):
+    persistencia, _, _ = _abrir(tmp_path / 'dados', _origem(tmp_path, _itens()))
+    persistencia.fechar()
+    with SnapshotEstoque(persistencia.caminho_snapshot) as snapshot:
+        assert len(snapshot) == 3
+        assert snapshot[2] == _itens()[2]
+        assert list(snapshot)[1]['expiryDate'] is None
+
+
+@pytest.mark.parametrize('incompleta', [
+    '{"op": "quantidade", "id": 1, "quan',
+    # Cortada exatamente no fim do JSON, antes do '\n': também não foi confirmada
+    '{"op": "quantidade", "id": 1, "quantity": 99, "ideal_quantity": null, "seq": 2}',
+])
+def test_linha_incompleta_no_fim_do_journal_e_descartada(tmp_path, incompleta):
+    persistencia, estoque, _ = _abrir(tmp_path / 'dados', _origem(tmp_path, _itens()))
+    estoque.visao_por_id(1)['quantity'] = 7
+    persistencia.registrar_quantidade(1, 7)
+    persistencia.fechar()
+    caminho = persistencia.journal.caminho
+    with open(caminho, 'a', encoding='utf-8') as arquivo:
+        arquivo.write(incompleta)
+
+    persistencia, reaberto, estatisticas = _abrir(tmp_path / 'dados')
+    assert estatisticas['journal_reaplicado'] == 1
+    assert reaberto.visao_por_id(1)['quantity'] == 7
+    reaberto.visao_por_id(1)['quantity'] = 8
+    persistencia.registrar_quantidade(1, 8)
+    persistencia.fechar()
+
+    _, reaberto, _ = _abrir(tmp_path / 'dados')
+    assert reaberto.visao_por_id(1)['quantity'] == 8
+
+
+def test_linha_corrompida_no_meio_do_journal_e_erro(tmp_path):
+    caminho = tmp_path / 'estoque.journal'
+    caminho.write_text('nao e json\n{"op": "quantidade", "id": 1, "quantity": 2, '
+                       '"ideal_quantity": null, "seq": 1}\n', encoding='utf-8')
+    with pytest.raises(ValueError):
+        JournalEstoque(str(caminho)).reaplicar(ItemStore(_itens()))
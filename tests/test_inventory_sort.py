@@ -0,0 +1,81 @@
+import json
+import random
+
+import pytest
+
+from conftest import item_estoque
+from domain.inventory_sort import (
+    CHAVE_COMPOSTA, _MAXIMO_VIAS, chave_de_registro, ordenar_chaves, ordenar_externo
+)
+
+
+@pytest.mark.parametrize('algoritmo', ['merge', 'intro', 'nativo'])
+@pytest.mark.parametrize('semente', range(5))
+def test_ordenacao_e_estavel(algoritmo, semente):
+    aleatorio = random.Random(semente)
+    # Poucas chaves distintas: muitos empates, em trechos maiores que os de inserção
+    chaves = [aleatorio.randint(0, 9) for _ in range(aleatorio.randint(0, 500))]
+    ordem = ordenar_chaves(chaves, algoritmo)
+    assert ordem == sorted(range(len(chaves)), key=chaves.__getitem__)
+
+
+@pytest.mark.parametrize('algoritmo', ['merge', 'intro'])
+def test_entradas_ja_ordenadas_e_invertidas(algoritmo):
+    crescente = list(range(1000))
+    assert ordenar_chaves(crescente, algoritmo) == crescente
+    assert ordenar_chaves(crescente[::-1], algoritmo) == crescente[::-1]
+
+
+def test_algoritmo_ou_campo_desconhecido_e_rejeitado():
+    with pytest.raises(ValueError, match='desconhecido'):
+        ordenar_chaves([3, 1, 2], 'bolha')
+    with pytest.raises(ValueError, match='desconhecidos'):
+        chave_de_registro(('itemName', 'cor'))
+
+
+def test_chave_composta_no_estoque(criar_gerenciador):
+    itens = [
+        item_estoque(1, 5, 10, 1.0, '2026-03-01', 'Dipirona', categoria='Analgésicos'),
+        item_estoque(2, 5, 10, 1.0, None, 'Aspirina', categoria='Analgésicos'),
+        item_estoque(3, 5, 10, 1.0, '2025-12-01', 'Zinco', categoria='Analgésicos'),
+        item_estoque(4, 5, 10, 1.0, '2025-01-01', 'Amoxicilina', categoria='Antibióticos'),
+        item_estoque(5, 5, 10, 1.0, '2026-03-01', 'Codeína', categoria='Analgésicos'),
+    ]
+    for algoritmo in ('merge', 'intro', 'nativo'):
+        gerenciador = criar_gerenciador([dict(item) for item in itens])
+        gerenciador.ordenar_estoque(CHAVE_COMPOSTA, algoritmo)
+        # Categoria, depois validade (sem validade por último), depois nome
+        assert [item['id'] for item in gerenciador.estoque] == [3, 5, 1, 2, 4], algoritmo
+        assert gerenciador.buscar_por_id(2)['itemName'] == 'Aspirina'
+
+
+def test_ordenacao_externa_com_mais_blocos_que_vias(tmp_path):
+    aleatorio = random.Random(7)
+    total = _MAXIMO_VIAS * 3 + 5
+    registros = [
+        item_estoque(i, 1, 2, 1.0, nome=f'Item {aleatorio.randint(0, 20):02d}') for i in range(total)
+    ]
+    destino = tmp_path / 'ordenado.ndjson'
+    resultado = ordenar_externo(registros, destino, ('itemName',), tamanho_bloco=1,
+                                diretorio_temporario=tmp_path)
+    assert resultado['registros'] == total and resultado['blocos'] == total
+    # Uma fusão intermediária (mais de _MAXIMO_VIAS arquivos) e a final
+    assert resultado['passadas'] == 2
+
+    gravados = [json.loads(linha) for linha in destino.read_text(encoding='utf-8').splitlines()]
+    # Estável: nomes iguais saem na ordem de leitura
+    assert [registro['id'] for registro in gravados] == [
+        registro['id'] for registro in sorted(registros, key=lambda registro: registro['itemName'])
+    ]
+    assert list(tmp_path.iterdir()) == [destino]
+
+
+def test_exportar_ordenado_nao_muda_o_estoque(criar_gerenciador, tmp_path):
+    itens = [item_estoque(i, 1, 2, 1.0, nome=nome) for i, nome in enumerate(['C', 'A', 'B'], 1)]
+    gerenciador = criar_gerenciador(itens)
+    versao = gerenciador.versao
+    gerenciador.exportar_ordenado(tmp_path / 'saida.ndjson', ('itemName',), tamanho_bloco=2)
+    assert [item['id'] for item in gerenciador.estoque] == [1, 2, 3]
+    assert gerenciador.versao == versao
+    linhas = (tmp_path / 'saida.ndjson').read_text(encoding='utf-8').splitlines()
+    assert [json.loads(linha)['itemName'] for linha in linhas] == ['A', 'B', 'C']
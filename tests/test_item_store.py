@@ -0,0 +1,71 @@
+import pytest
+
+from conftest import item_estoque, loja_exemplo
+from domain.item_store import ItemStore
+
+
+def test_visoes_devolvem_os_campos_do_item():
+    item = dict(item_estoque(7, 3, 8, 4.25, '2026-05-10'), lote='L-77')
+    loja = ItemStore([item])
+    assert dict(loja[0]) == item
+    assert loja[0] is loja.visao_por_id(7)
+    assert loja[0]['lote'] == 'L-77'
+
+
+def test_escrita_na_visao_vai_para_a_coluna():
+    loja = loja_exemplo()
+    loja[0]['quantity'] = 12
+    loja[0]['expiryDate'] = None
+    assert loja.quantidades[0] == 12
+    assert loja[0]['expiryDate'] is None
+    assert loja.mutacoes > 4
+
+
+def test_validade_invalida_e_rejeitada_sem_alterar_o_estoque():
+    loja = loja_exemplo()
+    with pytest.raises(ValueError):
+        loja.append(item_estoque(9, 1, 2, 1.0, '2026-13-45'))
+    assert len(loja) == 4 and len(loja.nomes) == 4
+
+
+def _colunas(loja):
+    return {
+        nome: list(getattr(loja, nome))
+        for nome in ('ids', 'nomes', 'categorias', 'quantidades', 'ideais', 'precos', 'locais',
+                     'validades', '_linha_do_slot', '_slot_da_linha', '_visoes')
+    }
+
+
+@pytest.mark.parametrize('campo, valor', [
+    ('quantity', 2.5), ('quantity', '3'), ('ideal_quantity', None), ('unity_price', 'R$ 1'),
+    ('id', 2 ** 70), ('expiryDate', 'amanhã'),
+])
+def test_adicao_rejeitada_nao_altera_nenhuma_coluna(campo, valor):
+    loja = loja_exemplo()
+    antes = _colunas(loja)
+    with pytest.raises((TypeError, ValueError, OverflowError)):
+        loja.append(dict(item_estoque(9, 1, 2, 1.0, nome='Gaze Estéril'), **{campo: valor}))
+    assert len(loja) == 4
+    assert _colunas(loja) == antes
+    assert loja.visao_por_nome('Gaze Estéril') is None
+    assert [item['id'] for item in loja.mais_criticos()] == [1, 3, 4]
+
+
+def test_adicao_sem_campo_obrigatorio_nao_altera_nenhuma_coluna():
+    loja = loja_exemplo()
+    antes = _colunas(loja)
+    item = item_estoque(9, 1, 2, 1.0)
+    del item['location']
+    with pytest.raises(KeyError):
+        loja.append(item)
+    assert _colunas(loja) == antes
+
+
+def test_escrita_rejeitada_nao_altera_os_indices():
+    loja = loja_exemplo()
+    item = loja.visao_por_id(1)
+    with pytest.raises(TypeError):
+        item['quantity'] = 'muitos'
+    assert item['quantity'] == 5
+    assert loja.resumo_grupo('Analgésicos')['itens_criticos'] == 2
+    assert [critico['id'] for critico in loja.mais_criticos()] == [1, 3, 4]
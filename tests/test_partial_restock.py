@@ -0,0 +1,62 @@
+import math
+
+import pytest
+
+from conftest import estoque_aleatorio, item_estoque
+
+
+def test_modo_parcial_compra_parte_do_deficit(criar_gerenciador):
+    gerenciador = criar_gerenciador([item_estoque(1, 0, 10, 1.00)], usar_cache=False)
+    resultado = gerenciador.otimizar_reabastecimento(5, 'vetorizado', modo='parcial', precisao='centavos')
+    [selecionado] = resultado['itens_selecionados']
+    assert selecionado['quantidade'] == 5
+    assert resultado['custo_total'] == 5.0
+
+    inteiro = gerenciador.otimizar_reabastecimento(5, 'vetorizado', precisao='centavos')
+    assert inteiro['itens_selecionados'] == []
+
+
+@pytest.mark.parametrize('semente', range(5))
+def test_modo_parcial_respeita_deficit_e_orcamento(criar_gerenciador, semente):
+    gerenciador = criar_gerenciador(estoque_aleatorio(semente, 10), usar_cache=False)
+    resultado = gerenciador.otimizar_reabastecimento(
+        120, 'iterativo', modo='parcial', precisao='centavos'
+    )
+    assert resultado['custo_total'] <= 120
+    ids = [item['item']['id'] for item in resultado['itens_selecionados']]
+    assert len(ids) == len(set(ids))
+    for item in resultado['itens_selecionados']:
+        assert 1 <= item['quantidade'] <= item['deficit']
+
+    # Com orçamento para tudo, cada déficit é comprado inteiro
+    total = sum(item['quantidade'] * item['item']['unity_price']
+                for item in gerenciador._montar_itens_criticos('centavos'))
+    completo = gerenciador.otimizar_reabastecimento(
+        math.ceil(total) + 1, 'iterativo', modo='parcial', precisao='centavos'
+    )
+    assert all(item['quantidade'] == item['deficit'] for item in completo['itens_selecionados'])
+    assert len(completo['itens_selecionados']) == len(gerenciador.estoque.linhas_criticas())
+
+
+@pytest.mark.parametrize('semente', range(6))
+@pytest.mark.parametrize('metodo', ['iterativo', 'vetorizado', 'dual', 'branch_and_bound', 'auto'])
+def test_modo_parcial_em_reais_nao_passa_do_orcamento(criar_gerenciador, semente, metodo):
+    # Preços baixos: muitos lotes custam menos de R$ 1
+    gerenciador = criar_gerenciador(estoque_aleatorio(semente, 12, preco_maximo=3.0), usar_cache=False)
+    for orcamento in (5, 20, 60):
+        resultado = gerenciador.otimizar_reabastecimento(orcamento, metodo, modo='parcial')
+        custo_real = sum(item['quantidade'] * item['item']['unity_price']
+                         for item in resultado['itens_selecionados'])
+        assert custo_real <= resultado['custo_total'] + 1e-9
+        assert resultado['custo_total'] <= orcamento
+        referencia = gerenciador.otimizar_reabastecimento(orcamento, 'iterativo', modo='parcial')
+        assert resultado['beneficio_maximo'] == referencia['beneficio_maximo']
+
+
+def test_lote_abaixo_de_um_real_nao_sai_de_graca(criar_gerenciador):
+    gerenciador = criar_gerenciador([item_estoque(1, 0, 7, 0.40)], usar_cache=False)
+    # Lotes de 1, 2 e 4 unidades: R$ 0,40, R$ 0,80 e R$ 1,60
+    resultado = gerenciador.otimizar_reabastecimento(1, 'iterativo', modo='parcial')
+    [selecionado] = resultado['itens_selecionados']
+    assert selecionado['quantidade'] * 0.40 <= 1
+    assert resultado['custo_total'] <= 1
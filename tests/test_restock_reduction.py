@@ -0,0 +1,146 @@
+import random
+
+import pytest
+
+from conftest import estoque_aleatorio, mochila_referencia
+from domain.restock_reduction import dividir_binario, expandir_selecao, reduzir_instancia
+
+
+def _itens_aleatorios(aleatorio, n, custo_maximo=30, beneficio_maximo=60):
+    return [
+        {'custo': aleatorio.randint(1, custo_maximo), 'beneficio': aleatorio.randint(0, beneficio_maximo)}
+        for _ in range(n)
+    ]
+
+
+def _resolver_lotes(lotes, capacidade):
+    """PD 0/1 sobre os lotes da redução, com reconstrução da seleção."""
+    tabela = [[0] * (capacidade + 1)]
+    for lote in lotes:
+        anterior = tabela[-1]
+        linha = list(anterior)
+        for w in range(lote['custo'], capacidade + 1):
+            linha[w] = max(anterior[w], anterior[w - lote['custo']] + lote['beneficio'])
+        tabela.append(linha)
+
+    selecionados = []
+    w = capacidade
+    for i in range(len(lotes), 0, -1):
+        if tabela[i][w] != tabela[i - 1][w]:
+            selecionados.append(lotes[i - 1])
+            w -= lotes[i - 1]['custo']
+    return tabela[-1][capacidade], selecionados
+
+
+def _verificar_reducao(itens, capacidade):
+    otimo = mochila_referencia(
+        [item['custo'] for item in itens], [item['beneficio'] for item in itens], capacidade
+    )
+    reducao = reduzir_instancia(itens, capacidade)
+    valor, lotes = _resolver_lotes(reducao['itens'], reducao['capacidade'])
+    selecionados = expandir_selecao(reducao, lotes, itens)
+
+    assert valor + sum(item['beneficio'] for item in reducao['fixos']) == otimo
+    assert sum(item['custo'] for item in selecionados) <= capacidade
+    assert sum(item['beneficio'] for item in selecionados) == otimo
+    assert len({id(item) for item in selecionados}) == len(selecionados)
+    return reducao
+
+
+@pytest.mark.parametrize('semente', range(40))
+def test_reducao_preserva_otimo_em_instancias_aleatorias(semente):
+    aleatorio = random.Random(semente)
+    itens = _itens_aleatorios(aleatorio, aleatorio.randint(1, 14))
+    _verificar_reducao(itens, aleatorio.randint(0, 120))
+
+
+@pytest.mark.parametrize('semente', range(20))
+def test_reducao_preserva_otimo_com_empates(semente):
+    aleatorio = random.Random(semente)
+    base = _itens_aleatorios(aleatorio, 4, custo_maximo=10, beneficio_maximo=20)
+    # Cópias de poucos itens: grupos de equivalentes com multiplicidade
+    itens = [dict(aleatorio.choice(base)) for _ in range(aleatorio.randint(2, 14))]
+    reducao = _verificar_reducao(itens, aleatorio.randint(5, 60))
+    if reducao['estatisticas']['aplicada']:
+        assert reducao['estatisticas']['itens_resolvidos'] <= len(itens)
+
+
+def test_reducao_remove_itens_dominados():
+    # Cabem no máximo 2 itens; o de custo 9 e benefício 3 tem 4 dominantes
+    itens = [
+        {'custo': 4, 'beneficio': 8}, {'custo': 5, 'beneficio': 9}, {'custo': 6, 'beneficio': 11},
+        {'custo': 7, 'beneficio': 12}, {'custo': 9, 'beneficio': 3},
+    ]
+    reducao = _verificar_reducao(itens, 12)
+    assert reducao['estatisticas']['removidos_dominancia'] == 1
+    restantes = [membro for lote in reducao['itens'] for membro in lote['membros']]
+    assert all(membro is not itens[4] for membro in restantes)
+
+
+def test_reducao_descarta_itens_acima_do_orcamento():
+    itens = [{'custo': 50, 'beneficio': 100}, {'custo': 3, 'beneficio': 4}]
+    reducao = _verificar_reducao(itens, 10)
+    assert reducao['estatisticas']['removidos_custo'] == 1
+
+
+def test_reducao_nao_se_aplica_com_custo_zero():
+    itens = [{'custo': 0, 'beneficio': 7}, {'custo': 4, 'beneficio': 5}]
+    reducao = reduzir_instancia(itens, 10)
+    assert reducao['estatisticas']['aplicada'] is False
+    assert reducao['capacidade'] == 10 and not reducao['fixos']
+
+
+def test_dividir_binario_cobre_todas_as_quantidades():
+    for total in range(0, 40):
+        lotes = dividir_binario(total)
+        assert sum(lotes) == total
+        somas = {0}
+        for lote in lotes:
+            somas |= {soma + lote for soma in somas}
+        assert somas == set(range(total + 1))
+
+
+@pytest.mark.parametrize('semente', range(12))
+@pytest.mark.parametrize('metodo', ['iterativo', 'vetorizado', 'memoization_pilha', 'dual'])
+def test_otimizacao_com_e_sem_reducao_tem_o_mesmo_otimo(criar_gerenciador, semente, metodo):
+    custo_zero = 2 if semente % 3 == 0 else 0
+    itens = estoque_aleatorio(semente, 16, repetidos=4, custo_zero=custo_zero)
+    gerenciador = criar_gerenciador(itens, usar_cache=False)
+    orcamento = random.Random(semente).choice([0, 15, 60, 250, 1000])
+
+    completo = gerenciador.otimizar_reabastecimento(orcamento, metodo, preprocessar=False)
+    reduzido = gerenciador.otimizar_reabastecimento(orcamento, metodo, preprocessar=True)
+
+    assert reduzido['beneficio_maximo'] == completo['beneficio_maximo']
+    if not custo_zero:
+        # Com itens de custo 0 a PD dual tem outro caso base (ver _pd_dual)
+        referencia = gerenciador.otimizar_reabastecimento(orcamento, 'iterativo', preprocessar=False)
+        assert reduzido['beneficio_maximo'] == referencia['beneficio_maximo']
+    assert reduzido['custo_total'] <= orcamento
+    assert sum(item['beneficio'] for item in reduzido['itens_selecionados']) == reduzido['beneficio_maximo']
+
+
+@pytest.mark.parametrize('semente', range(4))
+@pytest.mark.parametrize('metodo, opcoes, chave', [
+    ('branch_and_bound', {'limite_nos': 5}, 'limite_superior'),
+    ('branch_and_bound', {}, 'limite_superior'),
+    ('aproximado', {'epsilon': 0.2}, 'limite_superior_otimo'),
+])
+def test_limites_do_solver_incluem_os_itens_fixados(criar_gerenciador, semente, metodo, opcoes, chave):
+    # Sem itens de custo 0, para o vetorizado servir de referência do ótimo
+    gerenciador = criar_gerenciador(estoque_aleatorio(semente, 40, preco_minimo=1.0), usar_cache=False)
+    # Pré-processamento padrão (preprocessar=True)
+    resultado = gerenciador.otimizar_reabastecimento(1500, metodo, **opcoes)
+    estatisticas = resultado['estatisticas']
+    otimo = gerenciador.otimizar_reabastecimento(1500, 'vetorizado')['beneficio_maximo']
+    assert estatisticas[chave] >= otimo >= resultado['beneficio_maximo']
+    if 'gap' in estatisticas:
+        limite = estatisticas['limite_superior']
+        assert estatisticas['gap'] == pytest.approx((limite - resultado['beneficio_maximo']) / limite)
+
+
+def test_limites_com_itens_fixados_em_instancia_conhecida(criar_gerenciador):
+    gerenciador = criar_gerenciador(estoque_aleatorio(1, 40, preco_minimo=1.0), usar_cache=False)
+    resultado = gerenciador.otimizar_reabastecimento(1500, 'branch_and_bound', limite_nos=5)
+    assert resultado['estatisticas']['reducao']['fixados'] > 0
+    assert resultado['estatisticas']['limite_superior'] >= resultado['beneficio_maximo']
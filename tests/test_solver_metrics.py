@@ -0,0 +1,95 @@
+import tracemalloc
+
+import pytest
+
+from conftest import estoque_aleatorio
+from domain.solver_metrics import MemoInstrumentado, MetricasSolver, exportar_prometheus
+
+_ORCAMENTO = 50
+
+
+@pytest.fixture
+def gerenciador(criar_gerenciador):
+    return criar_gerenciador(estoque_aleatorio(1, 8, preco_minimo=1.0))
+
+
+@pytest.mark.parametrize('metodo', ['recursivo', 'memoization', 'memoization_pilha', 'iterativo', 'vetorizado'])
+def test_instrumentacao_nao_muda_o_resultado(gerenciador, metodo):
+    comum = gerenciador.otimizar_reabastecimento(_ORCAMENTO, metodo, preprocessar=False)
+    instrumentado = gerenciador.otimizar_reabastecimento(
+        _ORCAMENTO, metodo, preprocessar=False, instrumentar=True
+    )
+    assert 'metricas' not in comum
+    assert instrumentado['beneficio_maximo'] == comum['beneficio_maximo']
+
+    metricas = instrumentado['metricas']
+    contadores = metricas['contadores']
+    n = len(gerenciador.estoque.linhas_criticas())
+    assert metricas['metodo'] == metodo
+    assert contadores['itens_criticos'] == n
+    assert contadores['itens_resolvidos'] == n
+    assert contadores['capacidade_resolvida'] == _ORCAMENTO
+    assert contadores['itens_selecionados'] == len(instrumentado['itens_selecionados'])
+    assert {'extracao', 'resolucao', 'reconstrucao'} <= set(metricas['fases'])
+    assert metricas['segundos_total'] >= sum(fase['segundos'] for fase in metricas['fases'].values())
+
+
+def test_contadores_da_tabela_iterativa(gerenciador):
+    contadores = gerenciador.otimizar_reabastecimento(
+        _ORCAMENTO, 'iterativo', preprocessar=False, instrumentar=True
+    )['metricas']['contadores']
+    n = contadores['itens_resolvidos']
+    assert contadores['celulas_avaliadas'] == n * _ORCAMENTO
+    assert contadores['estados_armazenados'] == (n + 1) * (_ORCAMENTO + 1)
+
+
+def test_contadores_do_memo(gerenciador):
+    contadores = gerenciador.otimizar_reabastecimento(
+        _ORCAMENTO, 'memoization', preprocessar=False, instrumentar=True
+    )['metricas']['contadores']
+    assert contadores['memo_acertos'] + contadores['memo_falhas'] == contadores['chamadas_recursivas']
+    assert contadores['estados_armazenados'] == contadores['celulas_avaliadas']
+
+    memo = MemoInstrumentado()
+    memo['a'] = 1
+    assert 'a' in memo and 'b' not in memo and 'a' in memo
+    assert (memo.acertos, memo.falhas) == (2, 1)
+
+
+def test_fase_nao_mede_memoria_com_tracemalloc_ja_ligado():
+    metricas = MetricasSolver('iterativo')
+    with metricas.fase('resolucao'):
+        _ = [0] * 10_000
+    assert metricas.fases['resolucao']['pico_memoria_bytes'] > 0
+
+    outra = MetricasSolver('iterativo')
+    tracemalloc.start()
+    try:
+        with outra.fase('resolucao'):
+            pass
+        assert tracemalloc.is_tracing()
+    finally:
+        tracemalloc.stop()
+    assert outra.fases['resolucao']['pico_memoria_bytes'] is None
+
+
+def test_exportacao_prometheus():
+    metricas = MetricasSolver('iterativo')
+    metricas.contar('celulas_avaliadas', 350)
+    metricas.contar('celulas_avaliadas', 7)
+    with metricas.fase('resolucao'):
+        pass
+    metricas.fases['reconstrucao'] = {'segundos': 0.5, 'pico_memoria_bytes': None}
+    metricas.segundos_total = 1.5
+
+    texto = exportar_prometheus(metricas.como_dict(), {'loja': 'Centro "A"\n'})
+    linhas = texto.splitlines()
+    rotulos = 'metodo="iterativo",loja="Centro \\"A\\"\\n"'
+    assert texto.endswith('\n')
+    assert '# TYPE estoque_solver_segundos_total gauge' in linhas
+    assert f'estoque_solver_segundos_total{{{rotulos}}} 1.5' in linhas
+    assert f'estoque_solver_celulas_avaliadas{{{rotulos}}} 357' in linhas
+    assert f'estoque_solver_fase_segundos{{{rotulos},fase="reconstrucao"}} 0.5' in linhas
+    picos = [linha for linha in linhas if linha.startswith('estoque_solver_fase_pico_memoria_bytes{')]
+    assert len(picos) == 1 and 'fase="resolucao"' in picos[0]
+    assert all(linha.startswith(('#', 'estoque_solver_')) for linha in linhas)
@@ -0,0 +1,30 @@
+import pytest
+
+from conftest import estoque_aleatorio, plano_viavel
+
+_EXATOS = ('recursivo', 'memoization', 'memoization_pilha', 'vetorizado', 'esparso',
+           'dual', 'branch_and_bound', 'auto', 'incremental')
+
+
+@pytest.mark.parametrize('semente', range(8))
+@pytest.mark.parametrize('orcamento', [0, 40, 300, 5000])
+def test_solvers_exatos_concordam_com_o_iterativo(criar_gerenciador, semente, orcamento):
+    # Preços a partir de R$ 1: sem itens de custo 0, que a PD dual e o
+    # branch and bound tratam fora do caso base dp[i][0] = 0
+    itens = estoque_aleatorio(semente, 12, repetidos=2, preco_minimo=1.0)
+    gerenciador = criar_gerenciador(itens, usar_cache=False)
+    referencia = gerenciador.otimizar_reabastecimento(orcamento, 'iterativo', preprocessar=False)
+    for metodo in _EXATOS:
+        for preprocessar in (False, True):
+            resultado = gerenciador.otimizar_reabastecimento(orcamento, metodo, preprocessar=preprocessar)
+            assert resultado['beneficio_maximo'] == referencia['beneficio_maximo'], (metodo, preprocessar)
+            assert plano_viavel(resultado, orcamento), metodo
+
+
+@pytest.mark.parametrize('preprocessar', [False, True])
+def test_metodo_desconhecido_e_rejeitado(criar_gerenciador, preprocessar):
+    gerenciador = criar_gerenciador(estoque_aleatorio(0, 5), usar_cache=False)
+    with pytest.raises(ValueError, match='desconhecido'):
+        gerenciador.otimizar_reabastecimento(100, 'iterativ', preprocessar=preprocessar)
+    with pytest.raises(ValueError, match='desconhecido'):
+        gerenciador._resolver(gerenciador._montar_itens_criticos(), 100, 'iterativ', {}, {})
@@ -0,0 +1,51 @@
+import asyncio
+import threading
+
+import pytest
+
+from conftest import estoque_aleatorio
+from domain.stock_service import ServicoEstoque
+
+
+@pytest.fixture
+def servico(criar_gerenciador):
+    servico = ServicoEstoque(criar_gerenciador(estoque_aleatorio(2, 15, preco_minimo=1.0)), trabalhadores=1)
+    yield servico
+    asyncio.run(servico.encerrar())
+
+
+def test_leituras_vem_do_retrato_da_versao(servico):
+    async def cenario():
+        primeira = await servico.atender({'op': 'buscar', 'id': 1, 'request_id': 'a'})
+        primeira['resultado']['quantity'] = -99
+        segunda = await servico.atender({'op': 'buscar', 'id': 1, 'request_id': 'b'})
+        await servico.atender({'op': 'atualizar', 'id': 1, 'quantity': 7})
+        terceira = await servico.atender({'op': 'buscar', 'id': 1})
+        return primeira, segunda, terceira
+
+    primeira, segunda, terceira = asyncio.run(cenario())
+    assert segunda['request_id'] == 'b' and segunda['resultado']['quantity'] != -99
+    assert servico.gerenciador.buscar_por_id(1)['quantity'] == 7
+    assert terceira['resultado']['quantity'] == 7
+    assert servico.metricas()['cache_leituras']['acertos'] == 1
+
+
+def test_incremental_roda_fora_do_laco(servico, monkeypatch):
+    threads = []
+    otimizar = servico.gerenciador.otimizar_reabastecimento
+
+    def registrar_thread(*argumentos, **opcoes):
+        threads.append(threading.current_thread())
+        return otimizar(*argumentos, **opcoes)
+
+    monkeypatch.setattr(servico.gerenciador, 'otimizar_reabastecimento', registrar_thread)
+    resposta = asyncio.run(servico.atender({'op': 'otimizar', 'orcamento': 80, 'metodo': 'incremental'}))
+    assert resposta['ok'], resposta
+    assert threads and threads[0] is not threading.main_thread()
+    assert resposta['resultado']['beneficio_maximo'] == otimizar(80, 'iterativo')['beneficio_maximo']
+
+
+@pytest.mark.parametrize('orcamento', ['inf', 'nan', -3])
+def test_orcamento_invalido_vira_erro(servico, orcamento):
+    resposta = asyncio.run(servico.atender({'op': 'otimizar', 'orcamento': orcamento, 'metodo': 'dual'}))
+    assert resposta['ok'] is False and 'Orçamento inválido' in resposta['erro']
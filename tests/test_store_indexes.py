@@ -0,0 +1,117 @@
+import random
+from datetime import date
+
+import pytest
+
+from conftest import item_estoque, loja_exemplo
+from domain.item_store import ItemStore
+
+
+def test_indices_por_id_nome_prefixo_e_intervalo():
+    loja = loja_exemplo()
+    assert loja.visao_por_id(3)['itemName'] == 'Diclofenaco 50mg'
+    assert loja.visao_por_nome('Dipirona 1g')['id'] == 4
+    assert [item['id'] for item in loja.visoes_por_prefixo('Dipirona')] == [4, 1]
+    assert [item['id'] for item in loja.visoes_por_intervalo('B', 'Dipirona 5')] == [3, 4]
+
+    loja.visao_por_id(4)['itemName'] = 'Paracetamol 750mg'
+    loja.visao_por_id(2)['id'] = 20
+    assert loja.visao_por_nome('Dipirona 1g') is None
+    assert [item['id'] for item in loja.visoes_por_prefixo('Dipirona')] == [1]
+    assert loja.visao_por_id(2) is None and loja.visao_por_id(20)['itemName'] == 'Amoxicilina 500mg'
+
+
+def test_reordenar_mantem_as_visoes_e_os_indices():
+    loja = loja_exemplo()
+    visoes = list(loja)
+    loja.reordenar(list(reversed(visoes)))
+    assert list(loja) == list(reversed(visoes))
+    assert loja.visao_por_id(1) is visoes[0]
+    assert loja.linhas_criticas() == sorted(loja.linha(visao) for visao in visoes if visao['id'] != 2)
+
+    with pytest.raises(ValueError):
+        loja.reordenar_linhas([0, 0, 1, 2])
+
+
+def test_indice_de_validade_em_ordem():
+    loja = loja_exemplo()
+    ordinal = date.fromisoformat
+    assert [item['id'] for _, item in loja.validades_no_intervalo()] == [3, 4, 1]
+    assert [item['id'] for _, item in loja.validades_no_intervalo(fim=ordinal('2026-02-01').toordinal())] == [3, 4]
+    assert [item['id'] for _, item in loja.proximas_validades(2)] == [3, 4]
+
+    loja.visao_por_id(1)['expiryDate'] = '2025-12-31'
+    assert [item['id'] for _, item in loja.proximas_validades(1)] == [1]
+    assert loja.linhas_sem_validade() == [1]
+
+
+def test_consultas_de_validade_do_gerenciador(criar_gerenciador):
+    gerenciador = criar_gerenciador([dict(item) for item in loja_exemplo()])
+    hoje = '2026-02-01'
+    assert [item['id'] for item in gerenciador.itens_vencidos(hoje)] == [3]
+    assert [item['id'] for item in gerenciador.itens_vencendo(28, hoje)] == [4, 1]
+    assert [item['id'] for item in gerenciador.proximos_a_vencer(1, hoje)] == [4]
+    assert [item['id'] for item in gerenciador.proximos_a_vencer(1, hoje, incluir_vencidos=True)] == [3]
+    # Pilha: sem validade no início, depois a ordem de vencimento
+    assert [item['id'] for item in gerenciador.pilha_de_validade()] == [2, 3, 4, 1]
+
+
+def test_indice_de_criticidade_acompanha_as_escritas():
+    loja = loja_exemplo()
+    assert [item['id'] for item in loja.mais_criticos()] == [1, 3, 4]
+    assert [item['id'] for item in loja.mais_criticos(por='criticidade')] == [3, 1, 4]
+
+    loja.visao_por_id(3)['quantity'] = 4
+    loja.visao_por_id(2)['quantity'] = 0
+    assert [item['id'] for item in loja.mais_criticos()] == [2, 1, 4]
+    assert loja.linhas_criticas() == [0, 1, 3]
+
+
+def test_indices_conferem_com_varredura_apos_escritas_aleatorias():
+    aleatorio = random.Random(7)
+    loja = ItemStore([
+        item_estoque(i, aleatorio.randint(0, 20), aleatorio.randint(1, 20), 1.0,
+                     f'2026-0{aleatorio.randint(1, 9)}-1{aleatorio.randint(0, 9)}')
+        for i in range(1, 60)
+    ])
+    for _ in range(300):
+        item = loja[aleatorio.randrange(len(loja))]
+        item['quantity'] = aleatorio.randint(0, 20)
+        if aleatorio.random() < 0.2:
+            loja.append(item_estoque(len(loja) + 1, aleatorio.randint(0, 5), 10, 2.0))
+
+    criticos = [item for item in loja if item['quantity'] < item['ideal_quantity']]
+    esperado = sorted(criticos, key=lambda item: item['quantity'] - item['ideal_quantity'])
+    assert loja.mais_criticos() == esperado
+    assert loja.linhas_criticas() == [loja.linha(item) for item in criticos]
+
+
+def test_fila_de_reposicao_paginada(criar_gerenciador):
+    gerenciador = criar_gerenciador([dict(item) for item in loja_exemplo()])
+    assert [item['id'] for item in gerenciador.fila_de_reposicao()] == [1, 3, 4]
+    assert [item['id'] for item in gerenciador.fila_de_reposicao(2, itens_por_pagina=2)] == [4]
+    gerenciador.atualizar_quantidade(1, 10)
+    assert [item['id'] for item in gerenciador.fila_de_reposicao()] == [3, 4]
+
+
+def test_agregados_por_grupo():
+    loja = loja_exemplo()
+    resumo = loja.resumo_grupo('Analgésicos')
+    assert resumo['itens'] == 2 and resumo['itens_criticos'] == 2
+    assert resumo['custo_deficit'] == pytest.approx(5 * 2.0 + 1 * 3.0)
+
+    loja.visao_por_id(4)['category'] = 'Outros'
+    assert loja.resumo_grupo('Analgésicos')['itens'] == 1
+    assert loja.linhas_criticas_do_grupo(local='A1') == [0, 2]
+
+
+def test_otimizacao_filtrada_por_grupo(criar_gerenciador):
+    itens = [dict(item) for item in loja_exemplo()]
+    gerenciador = criar_gerenciador(itens, usar_cache=False)
+    filtrado = gerenciador.otimizar_reabastecimento(100, 'iterativo', categoria='Analgésicos')
+    so_do_grupo = criar_gerenciador(
+        [item for item in itens if item['category'] == 'Analgésicos'], usar_cache=False
+    ).otimizar_reabastecimento(100, 'iterativo')
+    assert filtrado['beneficio_maximo'] == so_do_grupo['beneficio_maximo']
+    assert filtrado['total_itens_criticos'] == 2
+    assert gerenciador.otimizar_reabastecimento(100, 'iterativo', local='B1')['total_itens_criticos'] == 1